@@ -2,19 +2,53 @@
 Analytics endpoints for revenue tracking and capacity management.
 """
 
-from fastapi import APIRouter, Query, Depends
-from typing import List, Dict
-from datetime import datetime, timedelta
+import asyncio
 from collections import defaultdict
+from enum import Enum
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List, Dict
+from datetime import date, datetime, timedelta
 
-from ..db.mongodb import get_database
+from ..config import get_settings
+from ..db.mongodb import analytics_sessions, get_analytics_database
 from ..models.registration import RegistrationStatus
+from ..services.daily_stats import daily_stats, day_of
+from ..services.analytics_cache import analytics_cache, cached_analytics
+from ..services.analytics_query import (
+    DATE_DIMENSIONS,
+    DEFAULT_METRICS,
+    DIMENSIONS,
+    MAX_QUERY_GROUPS,
+    METRICS,
+    build_match,
+    build_pipeline,
+    check_name_collisions,
+    format_groups,
+    parse_names,
+    pivot_records,
+    totals_of,
+)
+from ..services.occupancy import occupancy_engine
+from ..services.period_comparison import (
+    build_comparison_stages,
+    compare_to_baseline,
+    covering_range,
+    parse_ranges,
+    range_totals,
+)
+from ..services.seat_counters import seat_counters, limit_for, ALL_LOCATIONS
 from ..utils.clerk_auth import verify_clerk_token, ClerkUser
+from ..utils.etag import conditional_etag
+from ..utils.money import to_float
+from ..utils.query_budget import max_time
+from ..utils.timezone import day_start_utc, local_day, local_today, to_utc
 
 router = APIRouter()
+settings = get_settings()
 
 
-@router.get("/revenue")
+@router.get("/revenue", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("revenue")
 async def get_revenue_analytics(
     start_date: datetime = Query(None),
     end_date: datetime = Query(None),
@@ -30,119 +64,189 @@ async def get_revenue_analytics(
     - Revenue by date
     - Revenue by camp type
     """
-    db = get_database()
+    db = get_analytics_database()
     
     # Default to last 30 days if no dates provided
     if not end_date:
-        end_date = datetime.utcnow()
+        end_date = local_today()
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    query = {
-        "status": RegistrationStatus.ENROLLED.value,
-        "enrollmentDate": {"$gte": start_date, "$lte": end_date}
-    }
+    # Per-day rollups by enrollment date, maintained on write (services/daily_stats.py)
+    async with analytics_sessions() as [session]:
+        result = await daily_stats.aggregate_rollups(db, ("enrollments",), start_date, end_date, [
+            {"$facet": {
+                "totals": [
+                    {"$group": {
+                        "_id": None,
+                        "totalCost": {"$sum": "$revenue"},
+                        "totalPaid": {"$sum": "$paid"},
+                        "outstanding": {"$sum": {"$subtract": ["$revenue", "$paid"]}},
+                        "count": {"$sum": "$enrollments"}
+                    }}
+                ],
+                "byDate": [
+                    {"$group": {
+                        "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                        "revenue": {"$sum": "$revenue"}
+                    }},
+                    {"$sort": {"_id": 1}}
+                ],
+                "byCampType": [
+                    {"$group": {
+                        "_id": "$campType",
+                        "revenue": {"$sum": "$revenue"}
+                    }}
+                ]
+            }}
+        ], session=session, **max_time(settings.analytics_max_time_ms))
     
-    registrations = await db.registrations.find(query).to_list(length=10000)
-    
-    total_cost = 0
-    total_paid = 0
-    revenue_by_date = defaultdict(float)
-    revenue_by_camp_type = defaultdict(float)
-    
-    for reg in registrations:
-        cost = float(reg.get("totalCost", 0) or 0)
-        paid = float(reg.get("amountPaid", 0) or 0)
-        
-        total_cost += cost
-        total_paid += paid
-        
-        # Group by enrollment date
-        enrollment_date = reg.get("enrollmentDate")
-        if enrollment_date:
-            date_key = enrollment_date.strftime("%Y-%m-%d")
-            revenue_by_date[date_key] += cost
-        
-        # Group by camp type
-        camp_type = reg.get("campType", "Unknown")
-        revenue_by_camp_type[camp_type] += cost
+    facets = result[0]
+    totals = facets["totals"][0] if facets["totals"] else {}
     
     return {
-        "totalRevenue": total_cost,
-        "totalPaid": total_paid,
-        "outstandingBalance": total_cost - total_paid,
+        "totalRevenue": to_float(totals.get("totalCost")) or 0,
+        "totalPaid": to_float(totals.get("totalPaid")) or 0,
+        "outstandingBalance": to_float(totals.get("outstanding")) or 0,
         "dateRange": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat()
         },
-        "revenueByDate": dict(revenue_by_date),
-        "revenueByCampType": dict(revenue_by_camp_type),
-        "registrationCount": len(registrations)
+        "revenueByDate": {
+            group["_id"]: to_float(group["revenue"]) or 0
+            for group in facets["byDate"] if group["_id"]
+        },
+        "revenueByCampType": {
+            group["_id"]: to_float(group["revenue"]) or 0
+            for group in facets["byCampType"]
+        },
+        "registrationCount": totals.get("count", 0)
     }
 
 
-@router.get("/daily-capacity")
+class CapacityDetail(str, Enum):
+    NONE = "none"
+    SUMMARY = "summary"
+    FULL = "full"
+
+
+@router.get("/daily-capacity", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("daily-capacity")
 async def get_daily_capacity(
     start_date: datetime = Query(None),
     end_date: datetime = Query(None),
+    detail: CapacityDetail = Query(CapacityDetail.FULL, description="none: counts only, summary: + camp type counts, full: + names"),
     current_user: ClerkUser = Depends(verify_clerk_token)
 ):
     """
     Get daily enrollment capacity for calendar view.
     
-    Returns enrollment count per day for active registrations.
+    Returns per day the number of enrolled registrations (count), the
+    children they bring (seats) and the seats left under CAPACITY_DAILY_LIMIT
+    (remaining, null when unlimited).
+    
+    detail=none and detail=summary answer from the rollups only, in columns
+    (dates, counts, seats, remaining, plus campTypes for summary: one
+    {campType: count} object per day). detail=full returns one row per day
+    with the names of everyone enrolled; prefer fetching the names of a single
+    day from /api/registrations/by-camp-date/ when it is opened.
     """
-    db = get_database()
+    db = get_analytics_database()
     
     # Default to next 60 days if no dates provided
     if not start_date:
-        start_date = datetime.utcnow()
+        start_date = local_today()
     if not end_date:
         end_date = start_date + timedelta(days=60)
     
-    # Find all enrolled registrations
-    registrations = await db.registrations.find({
-        "status": RegistrationStatus.ENROLLED.value
-    }).to_list(length=10000)
-    
-    # Count enrollments per day
-    daily_counts = defaultdict(int)
-    daily_registrations = defaultdict(list)
-    
-    for reg in registrations:
-        camp_dates = reg.get("campDates", [])
-        for camp_date in camp_dates:
-            if start_date <= camp_date <= end_date:
-                date_key = camp_date.strftime("%Y-%m-%d")
-                daily_counts[date_key] += 1
-                daily_registrations[date_key].append({
-                    "childName": reg.get("childName"),
-                    "parentName": reg.get("parentName"),
-                    "campType": reg.get("campType")
-                })
-    
-    # Format response
-    capacity_data = []
+    group_id = {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+    if detail is CapacityDetail.SUMMARY:
+        group_id = {"date": group_id, "campType": "$campType"}
+    
+    # Counts come from the per-day rollups; only detail=full reads names from
+    # the {status, campDates} index for the window
+    async with analytics_sessions(2) as [rollup_session, names_session]:
+        lookups = [
+            daily_stats.aggregate_rollups(db, ("campDays",), start_date, end_date, [
+                {"$group": {
+                    "_id": group_id,
+                    "count": {"$sum": "$campDays"}
+                }}
+            ], session=rollup_session, **max_time(settings.analytics_max_time_ms)),
+            seat_counters.usage(start_date, end_date, max_time_ms=settings.analytics_max_time_ms)
+        ]
+        if detail is CapacityDetail.FULL:
+            lookups.append(db.registrations.aggregate([
+                {"$match": {
+                    "status": RegistrationStatus.ENROLLED.value,
+                    "campDates": {"$elemMatch": {"$gte": day_of(start_date), "$lte": end_date}}
+                }},
+                {"$project": {"campDates": 1, "childName": 1, "parentName": 1, "campType": 1}},
+                {"$unwind": "$campDates"},
+                {"$match": {"campDates": {"$gte": day_of(start_date), "$lte": end_date}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$campDates"}},
+                    "registrations": {"$push": {
+                        "childName": "$childName",
+                        "parentName": "$parentName",
+                        "campType": "$campType"
+                    }}
+                }}
+            ], session=names_session, **max_time(settings.analytics_max_time_ms)).to_list(length=None))
+        count_groups, seat_usage, *daily_groups = await asyncio.gather(*lookups)
+    
+    counts = defaultdict(int)
+    camp_types = defaultdict(dict)
+    for group in count_groups:
+        if detail is CapacityDetail.SUMMARY:
+            counts[group["_id"]["date"]] += group["count"]
+            camp_types[group["_id"]["date"]][group["_id"]["campType"]] = group["count"]
+        else:
+            counts[group["_id"]] = group["count"]
+    
+    dates = []
     current = start_date
     while current <= end_date:
-        date_key = current.strftime("%Y-%m-%d")
-        capacity_data.append({
-            "date": date_key,
-            "count": daily_counts.get(date_key, 0),
-            "registrations": daily_registrations.get(date_key, [])
-        })
+        dates.append(current.strftime("%Y-%m-%d"))
         current += timedelta(days=1)
     
-    return {
+    response = {
         "dateRange": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat()
         },
-        "capacityData": capacity_data
+        "dailyLimit": limit_for(ALL_LOCATIONS)
     }
+    
+    if detail is not CapacityDetail.FULL:
+        response.update({
+            "detail": detail.value,
+            "dates": dates,
+            "counts": [counts.get(date_key, 0) for date_key in dates],
+            "seats": [seat_usage.get(date_key, {}).get("seats", 0) for date_key in dates],
+            "remaining": [seat_usage.get(date_key, {}).get("remaining") for date_key in dates]
+        })
+        if detail is CapacityDetail.SUMMARY:
+            response["campTypes"] = [camp_types.get(date_key, {}) for date_key in dates]
+        return response
+    
+    # Days without enrollments are filled in here
+    daily = {group["_id"]: group for group in daily_groups[0]}
+    response["capacityData"] = [
+        {
+            "date": date_key,
+            "count": counts.get(date_key, 0),
+            "seats": seat_usage.get(date_key, {}).get("seats", 0),
+            "remaining": seat_usage.get(date_key, {}).get("remaining"),
+            "registrations": daily.get(date_key, {}).get("registrations", [])
+        }
+        for date_key in dates
+    ]
+    return response
 
 
-@router.get("/cancellations")
+@router.get("/cancellations", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("cancellations")
 async def get_cancellation_stats(
     start_date: datetime = Query(None),
     end_date: datetime = Query(None),
@@ -151,96 +255,160 @@ async def get_cancellation_stats(
     """
     Get cancellation statistics and trends.
     """
-    db = get_database()
+    db = get_analytics_database()
     
     if not end_date:
-        end_date = datetime.utcnow()
+        end_date = local_today()
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    query = {
-        "status": RegistrationStatus.CANCELLED.value,
-        "cancellationDate": {"$gte": start_date, "$lte": end_date}
-    }
-    
-    cancellations = await db.registrations.find(query).to_list(length=10000)
+    # Per-day rollups by cancellation date, maintained on write
+    async with analytics_sessions() as [session]:
+        result = await daily_stats.aggregate_rollups(db, ("cancellations",), start_date, end_date, [
+            {"$facet": {
+                "totals": [
+                    {"$group": {
+                        "_id": None,
+                        "lostRevenue": {"$sum": "$lostRevenue"},
+                        "count": {"$sum": "$cancellations"}
+                    }}
+                ],
+                "byDate": [
+                    {"$group": {
+                        "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                        "count": {"$sum": "$cancellations"}
+                    }},
+                    {"$sort": {"_id": 1}}
+                ]
+            }}
+        ], session=session, **max_time(settings.analytics_max_time_ms))
     
-    cancellation_by_date = defaultdict(int)
-    total_lost_revenue = 0
-    
-    for cancel in cancellations:
-        cancel_date = cancel.get("cancellationDate")
-        if cancel_date:
-            date_key = cancel_date.strftime("%Y-%m-%d")
-            cancellation_by_date[date_key] += 1
-        
-        cost = float(cancel.get("totalCost", 0) or 0)
-        paid = float(cancel.get("amountPaid", 0) or 0)
-        total_lost_revenue += (cost - paid)
+    facets = result[0]
+    totals = facets["totals"][0] if facets["totals"] else {}
     
     return {
-        "totalCancellations": len(cancellations),
-        "lostRevenue": total_lost_revenue,
+        "totalCancellations": totals.get("count", 0),
+        "lostRevenue": to_float(totals.get("lostRevenue")) or 0,
         "dateRange": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat()
         },
-        "cancellationsByDate": dict(cancellation_by_date)
+        "cancellationsByDate": {group["_id"]: group["count"] for group in facets["byDate"]}
+    }
+
+
+@router.get("/compare", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("compare")
+async def compare_periods(
+    ranges: str = Query("this_month,last_month", description="Comma-separated presets or name:YYYY-MM-DD..YYYY-MM-DD"),
+    baseline: str = Query(None, description="Range the others are compared to (default: the last one)"),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Revenue and cancellation totals for several named date ranges at once.
+    
+    All ranges are resolved in one aggregation over daily_stats. Each range
+    gets revenue, paid, outstanding and enrollments (by enrollment date) and
+    cancellations and lostRevenue (by cancellation date); every range other
+    than the baseline also gets the delta and growth (%) of each metric.
+    """
+    today = local_today()
+    resolved = parse_ranges(ranges, today)
+    baseline = baseline or list(resolved)[-1]
+    if baseline not in resolved:
+        raise HTTPException(status_code=400, detail=f"baseline must be one of: {', '.join(resolved)}")
+    
+    db = get_analytics_database()
+    first, last = covering_range(resolved)
+    async with analytics_sessions() as [session]:
+        result = await daily_stats.aggregate_rollups(
+            db,
+            ("enrollments", "cancellations"),
+            first,
+            last,
+            build_comparison_stages(resolved),
+            session=session,
+            **max_time(settings.analytics_max_time_ms)
+        )
+    totals = range_totals(result[0], resolved)
+    
+    return {
+        "baseline": baseline,
+        "ranges": {
+            name: {
+                "start": start.date().isoformat(),
+                "end": end.date().isoformat(),
+                **totals[name]
+            }
+            for name, (start, end) in resolved.items()
+        },
+        "comparisons": compare_to_baseline(totals, baseline)
     }
 
 
-@router.get("/dashboard-summary")
+@router.get("/dashboard-summary", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("dashboard-summary")
 async def get_dashboard_summary(current_user: ClerkUser = Depends(verify_clerk_token)):
     """
     Get summary statistics for dashboard KPI cards.
     """
-    db = get_database()
-    
-    # Total active registrations
-    total_enrolled = await db.registrations.count_documents({
-        "status": RegistrationStatus.ENROLLED.value
-    })
+    db = get_analytics_database()
     
-    # All-time revenue from enrolled
-    all_enrolled = await db.registrations.find({
-        "status": RegistrationStatus.ENROLLED.value
-    }).to_list(length=100000)
+    today = local_today()
+    seven_days = today + timedelta(days=7)
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     
-    enrolled_revenue = sum(float(reg.get("totalCost", 0) or 0) for reg in all_enrolled)
+    # The three KPI queries are independent, so they run concurrently:
+    # - counts and exact Decimal128 sums per status, over projected money fields
+    # - enrolled registrations with a camp day in the next 7 days (index count)
+    # - cancellations in the last 30 days (index count)
+    async with analytics_sessions(3) as [status_session, upcoming_session, cancellations_session]:
+        status_groups, upcoming_camps, recent_cancellations = await asyncio.gather(
+            db.registrations.aggregate([
+                {"$project": {"status": 1, "totalCost": 1, "amountPaid": 1, "unmatchedCancellation": 1}},
+                {"$group": {
+                    "_id": "$status",
+                    "count": {"$sum": 1},
+                    "revenue": {"$sum": "$totalCost"},
+                    "unmatchedRevenue": {"$sum": {"$cond": [{"$eq": ["$unmatchedCancellation", True]}, "$totalCost", 0]}},
+                    "paid": {"$sum": "$amountPaid"},
+                    "outstanding": {"$sum": {"$subtract": [
+                        {"$ifNull": ["$totalCost", 0]},
+                        {"$ifNull": ["$amountPaid", 0]}
+                    ]}}
+                }}
+            ], session=status_session, **max_time(settings.analytics_max_time_ms)).to_list(length=None),
+            db.registrations.count_documents({
+                "status": RegistrationStatus.ENROLLED.value,
+                "campDates": {
+                    "$elemMatch": {
+                        "$gte": today,
+                        "$lte": seven_days
+                    }
+                }
+            }, session=upcoming_session, **max_time(settings.analytics_max_time_ms)),
+            db.registrations.count_documents({
+                "status": RegistrationStatus.CANCELLED.value,
+                "cancellationDate": {"$gte": thirty_days_ago}
+            }, session=cancellations_session, **max_time(settings.analytics_max_time_ms))
+        )
     
-    # All-time lost revenue from cancellations
-    all_cancelled = await db.registrations.find({
-        "status": RegistrationStatus.CANCELLED.value
-    }).to_list(length=100000)
+    by_status = {group["_id"]: group for group in status_groups}
+    enrolled = by_status.get(RegistrationStatus.ENROLLED.value, {})
+    cancelled = by_status.get(RegistrationStatus.CANCELLED.value, {})
     
-    cancelled_revenue = sum(float(reg.get("totalCost", 0) or 0) for reg in all_cancelled)
+    total_enrolled = enrolled.get("count", 0)
+    enrolled_revenue = to_float(enrolled.get("revenue")) or 0
+    cancelled_revenue = to_float(cancelled.get("revenue")) or 0
     
-    # Net revenue = enrolled - cancelled
-    net_revenue = enrolled_revenue - cancelled_revenue
+    # Cancellations are applied to their enrollment in place (cancelled days are
+    # removed and the cost recomputed), so only cancellation emails still
+    # waiting for their enrollment are subtracted
+    unmatched_revenue = to_float(cancelled.get("unmatchedRevenue")) or 0
+    net_revenue = enrolled_revenue - unmatched_revenue
     
     # Total paid across all enrolled
-    total_paid = sum(float(reg.get("amountPaid", 0) or 0) for reg in all_enrolled)
-    
-    # Upcoming camps (next 7 days)
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    seven_days = today + timedelta(days=7)
-    
-    upcoming_registrations = await db.registrations.find({
-        "status": RegistrationStatus.ENROLLED.value,
-        "campDates": {
-            "$elemMatch": {
-                "$gte": today,
-                "$lte": seven_days
-            }
-        }
-    }).to_list(length=10000)
-    
-    # Recent cancellations (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_cancellations = await db.registrations.count_documents({
-        "status": RegistrationStatus.CANCELLED.value,
-        "cancellationDate": {"$gte": thirty_days_ago}
-    })
+    total_paid = to_float(enrolled.get("paid")) or 0
     
     return {
         "totalEnrolled": total_enrolled,
@@ -249,8 +417,227 @@ async def get_dashboard_summary(current_user: ClerkUser = Depends(verify_clerk_t
         "netRevenue": net_revenue,
         "totalRevenue30Days": net_revenue,  # Keep for backward compatibility
         "totalPaid": total_paid,
-        "outstandingBalance": enrolled_revenue - total_paid,
-        "upcomingCampsCount": len(upcoming_registrations),
+        "outstandingBalance": to_float(enrolled.get("outstanding")) or 0,
+        "upcomingCampsCount": upcoming_camps,
         "recentCancellations": recent_cancellations
     }
 
+
+@router.get("/query", dependencies=[Depends(conditional_etag(time_dependent=True))])
+@cached_analytics("query")
+async def query_analytics(
+    group_by: str = Query(None, description="Comma-separated dimensions: day|week|month, location, employer, campType, status, children"),
+    metrics: str = Query(None, description="Comma-separated metrics (default: registrations,revenue)"),
+    pivot: str = Query(None, description="One of the group_by dimensions to spread into columns"),
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None),
+    status: RegistrationStatus = Query(None),
+    location: str = Query(None),
+    employer: str = Query(None),
+    camp_type: str = Query(None),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Group registrations (by enrollment date) along any allowed dimensions.
+    day/week/month are calendar periods in BUSINESS_TIMEZONE.
+    
+    Returns one record per group ({dimension: value, ..., metric: value})
+    sorted by the dimensions, plus totals. With pivot, also returns a matrix
+    (rows × pivot values) per metric. "children" as a dimension is the number
+    of children on a registration; as a metric, the children enrolled (not both
+    in one query).
+    dateRange.end is exclusive.
+    """
+    dimensions = parse_names(group_by, DIMENSIONS, "dimension")
+    metric_names = parse_names(metrics, METRICS, "metric") or DEFAULT_METRICS
+    check_name_collisions(dimensions, metric_names)
+    if len([dimension for dimension in dimensions if dimension in DATE_DIMENSIONS]) > 1:
+        raise HTTPException(status_code=400, detail="Group by at most one of day, week, month")
+    if pivot and pivot not in dimensions:
+        raise HTTPException(status_code=400, detail="pivot must be one of the group_by dimensions")
+    
+    # Default to last 30 days; dates without a UTC offset are business-local.
+    # end_date is inclusive of its whole business-local day, so the bound is
+    # the start of the next one
+    if end_date:
+        end_before = day_start_utc(local_day(to_utc(end_date)).date() + timedelta(days=1))
+    else:
+        end_before = datetime.utcnow()
+    start_date = to_utc(start_date) if start_date else end_before - timedelta(days=30)
+    
+    match = build_match(start_date, end_before, status.value if status else None, location, employer, camp_type)
+    db = get_analytics_database()
+    async with analytics_sessions() as [session]:
+        groups = await db.registrations.aggregate(
+            build_pipeline(match, dimensions, metric_names),
+            session=session,
+            **max_time(settings.analytics_query_max_time_ms)
+        ).to_list(length=None)
+    
+    truncated = len(groups) > MAX_QUERY_GROUPS
+    records = format_groups(groups[:MAX_QUERY_GROUPS], dimensions, metric_names)
+    
+    response = {
+        "dateRange": {
+            "start": start_date.isoformat(),
+            "end": end_before.isoformat()
+        },
+        "dimensions": dimensions,
+        "metrics": metric_names,
+        "records": records,
+        "totals": totals_of(records, metric_names),
+        "truncated": truncated
+    }
+    if pivot:
+        response["pivot"] = pivot_records(records, dimensions, metric_names, pivot)
+    return response
+
+
+@router.get("/seats")
+async def get_seat_usage(
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None),
+    location: str = Query(None, description="Location (default: whole site)"),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Seats taken, limit and remaining seats per day, read from the live seat
+    counters (not cached, so it can back booking decisions).
+    """
+    if not start_date:
+        start_date = local_today()
+    if not end_date:
+        end_date = start_date + timedelta(days=60)
+    
+    usage = await seat_counters.usage(
+        start_date, end_date, location or ALL_LOCATIONS,
+        max_time_ms=settings.analytics_max_time_ms
+    )
+    return {
+        "dateRange": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat()
+        },
+        "location": location,
+        "limit": limit_for(location or ALL_LOCATIONS),
+        "days": [{"date": day, **values} for day, values in usage.items()]
+    }
+
+
+class OccupancyFilters:
+    """Shared query parameters of the /occupancy routes (default: next 90 days)"""
+    
+    def __init__(
+        self,
+        start_date: date = Query(None),
+        end_date: date = Query(None),
+        camp_type: str = Query(None),
+        location: str = Query(None)
+    ):
+        self.start = start_date or local_today().date()
+        self.end = end_date or self.start + timedelta(days=90)
+        if self.end < self.start:
+            raise HTTPException(status_code=400, detail="end_date is before start_date")
+        if (self.end - self.start).days > MAX_OCCUPANCY_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_OCCUPANCY_DAYS} days")
+        self.camp_type = camp_type
+        self.location = location
+    
+    def scope(self) -> Dict:
+        return {
+            "dateRange": {"start": self.start.isoformat(), "end": self.end.isoformat()},
+            "campType": self.camp_type,
+            "location": self.location
+        }
+
+
+MAX_OCCUPANCY_DAYS = 3660
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@router.get("/occupancy/daily")
+async def get_daily_occupancy(
+    filters: OccupancyFilters = Depends(),
+    window: int = Query(None, ge=2, le=365, description="Also return a trailing N-day rolling average"),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Children on site per day, from the in-memory occupancy matrix.
+    """
+    totals = await occupancy_engine.daily(filters.start, filters.end, filters.camp_type, filters.location)
+    days = [(filters.start + timedelta(days=offset)).isoformat() for offset in range(len(totals))]
+    
+    response = {
+        **filters.scope(),
+        "dates": days,
+        "children": totals.tolist(),
+        "childDays": int(totals.sum()),
+        "peak": int(totals.max()) if totals.size else 0
+    }
+    if window:
+        rolling = await occupancy_engine.rolling_average(filters.start, filters.end, window, filters.camp_type, filters.location)
+        response["rollingAverage"] = {"window": window, "values": [round(value, 2) for value in rolling.tolist()]}
+    return response
+
+
+@router.get("/occupancy/weekly-peak")
+async def get_weekly_peak_occupancy(
+    filters: OccupancyFilters = Depends(),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Peak concurrent children per week (weeks start on Monday).
+    """
+    weeks = await occupancy_engine.weekly_peaks(filters.start, filters.end, filters.camp_type, filters.location)
+    return {
+        **filters.scope(),
+        "weeks": [{"weekStart": week.isoformat(), "peak": peak} for week, peak in weeks]
+    }
+
+
+@router.get("/occupancy/by-weekday")
+async def get_occupancy_by_weekday(
+    filters: OccupancyFilters = Depends(),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Average, peak and total children per weekday.
+    """
+    stats = await occupancy_engine.by_weekday(filters.start, filters.end, filters.camp_type, filters.location)
+    return {
+        **filters.scope(),
+        "weekdays": [
+            {
+                "weekday": name,
+                "average": round(float(stats["average"][index]), 2),
+                "peak": int(stats["peak"][index]),
+                "childDays": int(stats["total"][index])
+            }
+            for index, name in enumerate(WEEKDAYS)
+        ]
+    }
+
+
+@router.get("/occupancy/over-threshold")
+async def get_days_over_threshold(
+    threshold: int = Query(..., ge=0, description="Return days with more than this many children"),
+    filters: OccupancyFilters = Depends(),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Days whose occupancy exceeds a threshold (e.g. staffing or room limits).
+    """
+    days = await occupancy_engine.days_over(filters.start, filters.end, threshold, filters.camp_type, filters.location)
+    return {
+        **filters.scope(),
+        "threshold": threshold,
+        "days": [{"date": day.isoformat(), "children": children} for day, children in days]
+    }
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user: ClerkUser = Depends(verify_clerk_token)):
+    """
+    Hit ratio and staleness of the analytics response cache (this process).
+    """
+    return analytics_cache.stats()
@@ -0,0 +1,128 @@
+"""
+One-shot dashboard bootstrap.
+
+First paint of the dashboard needs several independent reads: the KPI
+summary, the calendar month's enrolled counts, the selected day's
+registrations and recent revenue. /bootstrap authenticates once and runs them
+concurrently, returning one payload with a key per section.
+
+The analytics sections call the same cached functions as their own routes,
+with the arguments those routes receive from the frontend, so every section
+shares its analytics_cache entry with the standalone endpoint and each one is
+cached (and invalidated) on its own.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+from fastapi import APIRouter, Depends, Query, Response
+from pymongo.errors import ExecutionTimeout
+
+from .analytics import CapacityDetail, get_daily_capacity, get_dashboard_summary, get_revenue_analytics
+from .registrations import build_read_options, find_by_camp_date
+from ..services.analytics_query import parse_names
+from ..utils.clerk_auth import verify_clerk_token, ClerkUser
+from ..utils.etag import conditional_etag
+from ..utils.timezone import local_today
+
+router = APIRouter()
+
+# Sections returned by default, in payload order
+SECTIONS = {
+    "summary": "KPI cards (as /api/analytics/dashboard-summary)",
+    "capacity": "Enrolled counts for the calendar month of day (as /api/analytics/daily-capacity?detail=none)",
+    "day": "Registrations with a camp on day (as /api/registrations/by-camp-date/)",
+    "revenue": "Revenue for the last 30 days (as /api/analytics/revenue)",
+}
+
+# Revenue window, matching the Analytics page default
+REVENUE_DAYS = 30
+
+
+def month_bounds(day: datetime):
+    """First and last day of the calendar month containing day"""
+    first = day.replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return first, last
+
+
+def day_param(day: datetime) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+@router.get("/bootstrap", dependencies=[Depends(conditional_etag(time_dependent=True))])
+async def get_dashboard_bootstrap(
+    response: Response,
+    day: datetime = Query(None, description="Selected camp day (default: today in BUSINESS_TIMEZONE)"),
+    sections: str = Query(None, description="Comma-separated subset of: summary, capacity, day, revenue (default: all)"),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Everything the dashboard shows on first paint, in one request.
+    
+    Each section is {"params": ..., "data": ...}: params are the query
+    parameters of the equivalent standalone request (so a client can seed its
+    cache under the same key) and data is that request's response. A section
+    whose query runs over its time budget comes back as {"timedOut": true}
+    instead of failing the others; such a response carries no ETag.
+    """
+    names = parse_names(sections, SECTIONS, "sections") or list(SECTIONS)
+    today = local_today()
+    day = datetime.combine((day or today).date(), datetime.min.time())
+    month_start, month_end = month_bounds(day)
+    revenue_start = today - timedelta(days=REVENUE_DAYS)
+    
+    async def load_day():
+        projection, formatter = build_read_options(None, None)
+        registrations, truncated = await find_by_camp_date(day, None, projection)
+        return {"registrations": [formatter(reg) for reg in registrations], "truncated": truncated}
+    
+    # Keyword arguments mirror what FastAPI passes the routes, so the
+    # analytics cache keys match theirs
+    loaders = {
+        "summary": (
+            {},
+            lambda: get_dashboard_summary(current_user=current_user)
+        ),
+        "capacity": (
+            {"start_date": day_param(month_start), "end_date": day_param(month_end), "detail": CapacityDetail.NONE.value},
+            lambda: get_daily_capacity(
+                start_date=month_start,
+                end_date=month_end,
+                detail=CapacityDetail.NONE,
+                current_user=current_user
+            )
+        ),
+        "day": (
+            {"camp_date": day_param(day)},
+            load_day
+        ),
+        "revenue": (
+            {"start_date": day_param(revenue_start), "end_date": day_param(today)},
+            lambda: get_revenue_analytics(
+                start_date=revenue_start,
+                end_date=today,
+                current_user=current_user
+            )
+        ),
+    }
+    
+    results = await asyncio.gather(*(loaders[name][1]() for name in names), return_exceptions=True)
+    
+    payload: Dict[str, Dict] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, ExecutionTimeout):
+            print(f"[WARN] Dashboard bootstrap section '{name}' over its time budget: {result}")
+            payload[name] = {"timedOut": True}
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            payload[name] = {"params": loaders[name][0], "data": result}
+    
+    # A partial payload must not be revalidated as if it were complete
+    if any("timedOut" in section for section in payload.values()):
+        del response.headers["ETag"]
+        response.headers["Cache-Control"] = "no-store"
+    
+    return {"day": day_param(day), "sections": payload}
@@ -0,0 +1,63 @@
+"""
+Server-Sent Events stream of registration changes.
+"""
+
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from ..config import get_settings
+from ..services.registration_events import registration_events
+from ..utils.clerk_auth import verify_clerk_token, ClerkUser
+
+router = APIRouter()
+settings = get_settings()
+
+
+def format_event(event: dict) -> str:
+    return f"event: registration\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Live registration changes as text/event-stream.
+
+    Each "registration" event carries a compact delta:
+    - {"type": "created"|"updated"|"cancelled", "id", "dates", "status", "fields"}
+    - {"type": "deleted", "id"}
+    - {"type": "resync"}: events were dropped, refetch everything
+    - {"type": "ready"}: the change stream is open; sent once it is, after connecting
+    - {"type": "unavailable"}: change streams are unsupported, retry later
+
+    dates are the camp days (YYYY-MM-DD) of the registration, so clients can
+    refetch only the affected days. A comment line is sent every
+    EVENTS_KEEPALIVE_SECONDS to keep proxies from closing the connection.
+    """
+    if not registration_events.is_available():
+        raise HTTPException(status_code=503, detail="Live events are unavailable (change streams need a replica set)")
+
+    queue = registration_events.subscribe()
+
+    async def event_stream():
+        try:
+            yield f"retry: {settings.events_reconnect_seconds * 1000}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.events_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            registration_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,21 +2,56 @@
 CRUD endpoints for registration management.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi.responses import StreamingResponse
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+import base64
+import binascii
+import json
 
 from ..models.registration import (
     RegistrationCreate,
     RegistrationUpdate,
     RegistrationResponse,
-    RegistrationStatus
+    RegistrationSourceResponse,
+    RegistrationStatus,
+    RegistrationView,
+    RegistrationCalendarView,
+    RegistrationTableView
 )
+from ..config import get_settings
 from ..db.mongodb import get_database
+from ..services.registration_sources import registration_source_store
+from ..services.daily_stats import STATS_SOURCE_FIELDS, day_of
+from ..services.seat_counters import seat_counters, CapacityExceeded, SEAT_SOURCE_FIELDS
+from ..services.registration_writes import registration_written
+from ..services.registration_export import (
+    ExportFormat,
+    EXPORT_MEDIA_TYPES,
+    check_format_available,
+    encode_export
+)
+from ..services.registration_search import (
+    registration_search,
+    build_search_keys,
+    email_prefix_filter,
+    SEARCH_SOURCE_FIELDS
+)
 from ..utils.clerk_auth import verify_clerk_token, ClerkUser
+from ..utils.etag import conditional_etag
+from ..utils.money import to_decimal128, to_float, MONEY_FIELDS
+from ..utils.query_budget import cursor_max_time
 
 router = APIRouter()
+settings = get_settings()
+
+# Raw email bodies are served by GET /{id}/source; older documents may still
+# carry an inline copy, so keep it out of every read
+REGISTRATION_PROJECTION = {"rawEmailBody": 0}
 
 
 def registration_helper(registration) -> dict:
@@ -35,19 +70,120 @@ def registration_helper(registration) -> dict:
         "parentPhone": registration.get("parentPhone"),
         "campDates": registration.get("campDates", []),
         "campType": registration.get("campType"),
-        "totalCost": float(registration.get("totalCost")) if registration.get("totalCost") else None,
-        "amountPaid": float(registration.get("amountPaid")) if registration.get("amountPaid") else None,
+        "children": registration.get("children") or [],
+        "employer": registration.get("employer"),
+        "location": registration.get("location"),
+        "careRequestNumber": registration.get("careRequestNumber"),
+        "cancelledDates": registration.get("cancelledDates") or [],
+        "overCapacityDates": registration.get("overCapacityDates") or [],
+        "totalCost": to_float(registration.get("totalCost")),
+        "amountPaid": to_float(registration.get("amountPaid")),
         "emailId": registration.get("emailId"),
         "emailReceivedAt": registration.get("emailReceivedAt"),
         "parsedAt": registration.get("parsedAt"),
-        "rawEmailBody": registration.get("rawEmailBody"),
         "manualEntry": registration.get("manualEntry", False),
         "createdBy": registration.get("createdBy"),
         "updatedAt": registration.get("updatedAt")
     }
 
 
-@router.get("/", response_model=List[RegistrationResponse])
+REGISTRATION_VIEWS = {
+    RegistrationView.TABLE: RegistrationTableView,
+    RegistrationView.CALENDAR: RegistrationCalendarView,
+    RegistrationView.DETAIL: RegistrationResponse,
+}
+
+# Fields that can be requested with ?fields=
+SELECTABLE_FIELDS = set(registration_helper({"_id": ""}).keys()) - {"id", "_id"}
+
+# Export columns, in registration_helper order
+EXPORT_COLUMNS = [field for field in registration_helper({"_id": ""}) if field != "_id"]
+
+VIEW_QUERY = Query(None, description="Named field set: table, calendar or detail (default)")
+FIELDS_QUERY = Query(None, description="Comma-separated list of fields to return (overrides view)")
+
+
+def build_read_options(
+    view: Optional[RegistrationView],
+    fields: Optional[str]
+) -> Tuple[Dict, Callable[[dict], object]]:
+    """
+    Resolve the view/fields query parameters into a Mongo projection and a
+    formatter for each returned document.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(requested) - SELECTABLE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        
+        def select_fields(registration: dict) -> dict:
+            formatted = registration_helper(registration)
+            return {key: formatted[key] for key in ("id", "_id", *requested)}
+        
+        return {field: 1 for field in requested}, select_fields
+    
+    model = REGISTRATION_VIEWS[view or RegistrationView.DETAIL]
+    if model is RegistrationResponse:
+        projection = REGISTRATION_PROJECTION
+    else:
+        projection = {field.alias or name: 1 for name, field in model.model_fields.items()}
+    
+    return projection, lambda registration: model.model_validate(registration_helper(registration))
+
+
+LIST_SORT = [("enrollmentDate", -1), ("_id", -1)]
+
+
+def encode_cursor(registration: dict) -> str:
+    """Opaque cursor pointing just after this registration in LIST_SORT order"""
+    position = {"d": registration["enrollmentDate"].isoformat(), "i": str(registration["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Turn a cursor into a filter for the registrations that follow it"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        enrollment_date = datetime.fromisoformat(position["d"])
+        last_id = ObjectId(position["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return {"$or": [
+        {"enrollmentDate": {"$lt": enrollment_date}},
+        {"enrollmentDate": enrollment_date, "_id": {"$lt": last_id}}
+    ]}
+
+
+def build_list_query(
+    status: Optional[RegistrationStatus],
+    parent_email: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> dict:
+    """Mongo filter for the list and export filters"""
+    query = {}
+    
+    if status:
+        query["status"] = status.value
+    
+    if parent_email and parent_email.strip():
+        query.update(email_prefix_filter(parent_email))
+    
+    if start_date:
+        query["enrollmentDate"] = {"$gte": start_date}
+    
+    if end_date:
+        if "enrollmentDate" in query:
+            query["enrollmentDate"]["$lte"] = end_date
+        else:
+            query["enrollmentDate"] = {"$lte": end_date}
+    
+    return query
+
+
+@router.get("/", response_model=None, responses={200: {"model": List[RegistrationResponse]}}, dependencies=[Depends(conditional_etag())])
 async def get_registrations(
     status: Optional[RegistrationStatus] = None,
     parent_email: Optional[str] = None,
@@ -55,6 +191,9 @@ async def get_registrations(
     end_date: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    view: Optional[RegistrationView] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user: ClerkUser = Depends(verify_clerk_token)
 ):
     """
@@ -62,31 +201,107 @@ async def get_registrations(
     
     Filters:
     - status: Filter by enrollment status
-    - parent_email: Filter by parent email
+    - parent_email: Filter by parent email (prefix, case-insensitive)
     - start_date: Filter registrations from this date
     - end_date: Filter registrations until this date
+    
+    Use view (table/calendar/detail) or fields to return only part of each registration.
+    
+    Pagination:
+    - skip/limit: offset pagination, returns a list
+    - cursor: keyset pagination on (enrollmentDate, _id), returns
+      {"items": [...], "next_cursor": ...}; next_cursor is null on the last page
     """
+    projection, formatter = build_read_options(view, fields)
     db = get_database()
-    query = {}
+    query = build_list_query(status, parent_email, start_date, end_date)
     
-    if status:
-        query["status"] = status.value
+    if cursor is None:
+        registrations = await db.registrations.find(
+            query, projection, max_time_ms=cursor_max_time(settings.registrations_max_time_ms)
+        ).sort(LIST_SORT).skip(skip).limit(limit).to_list(length=limit)
+        return [formatter(reg) for reg in registrations]
     
-    if parent_email:
-        query["parentEmail"] = {"$regex": parent_email, "$options": "i"}
+    if cursor:
+        query.update(decode_cursor(cursor))
+    if 1 in projection.values():
+        # The cursor is built from the sort key
+        projection = {**projection, "enrollmentDate": 1}
     
-    if start_date:
-        query["enrollmentDate"] = {"$gte": start_date}
+    # Fetch one extra row to know whether another page exists
+    registrations = await db.registrations.find(
+        query, projection, max_time_ms=cursor_max_time(settings.registrations_max_time_ms)
+    ).sort(LIST_SORT).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(registrations) > limit
+    registrations = registrations[:limit]
     
-    if end_date:
-        if "enrollmentDate" in query:
-            query["enrollmentDate"]["$lte"] = end_date
-        else:
-            query["enrollmentDate"] = {"$lte": end_date}
+    return {
+        "items": [formatter(reg) for reg in registrations],
+        "next_cursor": encode_cursor(registrations[-1]) if has_more else None
+    }
+
+
+# Declared before /{registration_id} so "export" is not taken for an ID
+@router.get("/export")
+async def export_registrations(
+    format: ExportFormat = Query(ExportFormat.CSV),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+    status: Optional[RegistrationStatus] = None,
+    parent_email: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated list of columns (default: all)"),
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Stream every matching registration as CSV, NDJSON or Parquet.
+    
+    Takes the same filters as GET /. Rows are read from a cursor in batches of
+    EXPORT_BATCH_SIZE and encoded batch by batch (one Parquet row group per
+    EXPORT_PARQUET_ROW_GROUP_SIZE rows), so memory use does not grow with the
+    size of the export.
+    """
+    check_format_available(format)
     
-    registrations = await db.registrations.find(query).skip(skip).limit(limit).sort("enrollmentDate", -1).to_list(length=limit)
+    if fields:
+        columns = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(columns) - SELECTABLE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        columns = ["id", *columns]
+    else:
+        columns = EXPORT_COLUMNS
     
-    return [registration_helper(reg) for reg in registrations]
+    query = build_list_query(status, parent_email, start_date, end_date)
+    projection = {column: 1 for column in columns if column != "id"}
+    batch_size = settings.export_batch_size
+    rows_per_chunk = settings.export_parquet_row_group_size if format is ExportFormat.PARQUET else batch_size
+    
+    async def batches():
+        cursor = get_database().registrations.find(
+            query, projection, max_time_ms=cursor_max_time(settings.export_max_time_ms)
+        ).sort(LIST_SORT).batch_size(batch_size)
+        rows = []
+        async for registration in cursor:
+            formatted = registration_helper(registration)
+            rows.append({column: formatted[column] for column in columns})
+            if len(rows) == rows_per_chunk:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    
+    filename = f"registrations-{datetime.utcnow():%Y%m%d-%H%M%S}.{format.value}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        encode_export(batches(), columns, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{registration_id}", response_model=RegistrationResponse)
@@ -98,7 +313,7 @@ async def get_registration(
     db = get_database()
     
     try:
-        registration = await db.registrations.find_one({"_id": ObjectId(registration_id)})
+        registration = await db.registrations.find_one({"_id": ObjectId(registration_id)}, REGISTRATION_PROJECTION)
     except:
         raise HTTPException(status_code=400, detail="Invalid registration ID format")
     
@@ -108,6 +323,57 @@ async def get_registration(
     return registration_helper(registration)
 
 
+@router.get("/{registration_id}/source", response_model=RegistrationSourceResponse)
+async def get_registration_source(
+    registration_id: str,
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """Get the raw email(s) a registration was parsed from"""
+    db = get_database()
+    
+    try:
+        object_id = ObjectId(registration_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid registration ID format")
+    
+    sources = await registration_source_store.get_for_registration(object_id)
+    
+    if not sources:
+        # Not yet moved out of the registration document
+        registration = await db.registrations.find_one(
+            {"_id": object_id},
+            {"emailId": 1, "emailReceivedAt": 1, "rawEmailBody": 1}
+        )
+        if not registration:
+            raise HTTPException(status_code=404, detail="Registration not found")
+        if registration.get("rawEmailBody"):
+            sources = [{
+                "emailId": registration.get("emailId") or "",
+                "receivedAt": registration.get("emailReceivedAt"),
+                "rawEmailBody": registration["rawEmailBody"]
+            }]
+    
+    return {"id": registration_id, "sources": sources}
+
+
+# Rows returned by by-camp-date (one camp day)
+BY_CAMP_DATE_LIMIT = 500
+
+# Attempts at a conditional update before reporting a conflict
+UPDATE_RETRIES = 5
+
+# Fields a write hook needs from the previous version of a registration
+WRITE_HOOK_FIELDS = {field: 1 for field in (*STATS_SOURCE_FIELDS, *SEAT_SOURCE_FIELDS)}
+
+
+async def reserve_seats(before: Optional[dict], after: dict) -> List[datetime]:
+    """Reserve seats for a manual write; 409 when a limit is hit and limits are enforced"""
+    try:
+        return await seat_counters.reserve(before, after, enforce=settings.capacity_enforcement == "reject")
+    except CapacityExceeded as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.post("/", response_model=RegistrationResponse, status_code=201)
 async def create_registration(
     registration: RegistrationCreate,
@@ -131,15 +397,25 @@ async def create_registration(
         "parentPhone": registration.parentPhone,
         "campDates": registration.campDates,
         "campType": registration.campType,
-        "totalCost": float(registration.totalCost) if registration.totalCost else None,
-        "amountPaid": float(registration.amountPaid) if registration.amountPaid else None,
+        "totalCost": to_decimal128(registration.totalCost),
+        "amountPaid": to_decimal128(registration.amountPaid),
         "manualEntry": True,
         "createdBy": current_user.user_id,  # Clerk user ID
         "updatedAt": datetime.utcnow()
     }
+    registration_doc.update(build_search_keys(registration_doc))
     
-    result = await db.registrations.insert_one(registration_doc)
+    over_capacity = await reserve_seats(None, registration_doc)
+    if over_capacity:
+        registration_doc["overCapacityDates"] = over_capacity
+    
+    try:
+        result = await db.registrations.insert_one(registration_doc)
+    except Exception:
+        await seat_counters.undo(None, registration_doc)
+        raise
     registration_doc["_id"] = result.inserted_id
+    await registration_written(None, registration_doc)
     
     return registration_helper(registration_doc)
 
@@ -163,20 +439,53 @@ async def update_registration(
     if "status" in update_data:
         update_data["status"] = update_data["status"].value
     
+    for field in MONEY_FIELDS:
+        if field in update_data:
+            update_data[field] = to_decimal128(update_data[field])
+    
     update_data["updatedAt"] = datetime.utcnow()
     
     try:
-        result = await db.registrations.update_one(
-            {"_id": ObjectId(registration_id)},
-            {"$set": update_data}
-        )
+        object_id = ObjectId(registration_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid registration ID format")
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Registration not found")
+    # Seats are reserved against the version that was read, and the write only
+    # applies if that version is still current (otherwise undo and retry)
+    for _ in range(UPDATE_RETRIES):
+        previous = await db.registrations.find_one({"_id": object_id}, REGISTRATION_PROJECTION)
+        if previous is None:
+            raise HTTPException(status_code=404, detail="Registration not found")
+        
+        # $set only replaces the given fields, so the new state is the merge
+        changes = dict(update_data)
+        updated_registration = {**previous, **changes}
+        over_capacity = await reserve_seats(previous, updated_registration)
+        if any(field in update_data for field in SEAT_SOURCE_FIELDS):
+            still_flagged = (
+                {day_of(day) for day in previous.get("overCapacityDates") or []}
+                & {day_of(day) for day in updated_registration.get("campDates") or []}
+            )
+            changes["overCapacityDates"] = sorted(still_flagged | set(over_capacity))
+            updated_registration["overCapacityDates"] = changes["overCapacityDates"]
+        
+        result = await db.registrations.update_one(
+            {"_id": object_id, "updatedAt": previous.get("updatedAt")},
+            {"$set": changes}
+        )
+        if result.matched_count:
+            break
+        await seat_counters.undo(previous, updated_registration)
+    else:
+        raise HTTPException(status_code=409, detail="Registration is being modified concurrently, try again")
+    
+    await registration_written(previous, updated_registration)
+    
+    if any(field in update_data for field in SEARCH_SOURCE_FIELDS):
+        search_keys = build_search_keys(updated_registration)
+        await db.registrations.update_one({"_id": ObjectId(registration_id)}, {"$set": search_keys})
+        updated_registration.update(search_keys)
     
-    updated_registration = await db.registrations.find_one({"_id": ObjectId(registration_id)})
     return registration_helper(updated_registration)
 
 
@@ -191,49 +500,46 @@ async def delete_registration(
     """
     db = get_database()
     
+    cancellation = {
+        "status": RegistrationStatus.CANCELLED.value,
+        "cancellationDate": datetime.utcnow(),
+        "updatedAt": datetime.utcnow()
+    }
+    
     try:
         # Soft delete - mark as cancelled
-        result = await db.registrations.update_one(
+        previous = await db.registrations.find_one_and_update(
             {"_id": ObjectId(registration_id)},
-            {
-                "$set": {
-                    "status": RegistrationStatus.CANCELLED.value,
-                    "cancellationDate": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                }
-            }
+            {"$set": cancellation},
+            projection=WRITE_HOOK_FIELDS,
+            return_document=ReturnDocument.BEFORE
         )
     except:
         raise HTTPException(status_code=400, detail="Invalid registration ID format")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Registration not found")
     
+    await registration_written(previous, {**previous, **cancellation})
+    
     return {"status": "success", "message": "Registration cancelled"}
 
 
-@router.get("/by-camp-date/", response_model=List[RegistrationResponse])
-async def get_registrations_by_camp_date(
-    camp_date: str = Query(..., description="Camp date to filter by (YYYY-MM-DD)"),
-    status: Optional[RegistrationStatus] = None,
-    current_user: ClerkUser = Depends(verify_clerk_token)
-):
+async def find_by_camp_date(
+    day: datetime,
+    status: Optional[RegistrationStatus],
+    projection: Dict
+) -> Tuple[List[dict], bool]:
     """
-    Get all registrations for a specific camp date.
-    This queries the campDates array to find registrations with camps on the specified date.
-    Optionally filter by status (enrolled/cancelled).
+    Registrations with a camp on the given day, by child name: at most
+    BY_CAMP_DATE_LIMIT rows, and whether the day had more.
     """
     db = get_database()
     
-    # Parse the date string and create date range for the entire day
-    try:
-        date_obj = datetime.strptime(camp_date, "%Y-%m-%d")
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-    
-    # Create start and end of day in UTC
-    start_of_day = datetime.combine(date_obj.date(), datetime.min.time())
-    end_of_day = datetime.combine(date_obj.date(), datetime.max.time())
+    # campDates are day labels (naive midnights), not instants, so the day is
+    # matched as stored with no timezone shift
+    start_of_day = datetime.combine(day.date(), datetime.min.time())
+    end_of_day = datetime.combine(day.date(), datetime.max.time())
     
     # Build query - campDates is an array of datetime objects
     query = {
@@ -249,22 +555,88 @@ async def get_registrations_by_camp_date(
     if status:
         query["status"] = status.value
     
-    registrations = await db.registrations.find(query).sort("childName", 1).to_list(length=500)
+    # One row past the limit tells whether the day was cut off
+    registrations = await db.registrations.find(
+        query, projection, max_time_ms=cursor_max_time(settings.registrations_max_time_ms)
+    ).sort("childName", 1).limit(BY_CAMP_DATE_LIMIT + 1).to_list(length=BY_CAMP_DATE_LIMIT + 1)
+    return registrations[:BY_CAMP_DATE_LIMIT], len(registrations) > BY_CAMP_DATE_LIMIT
+
+
+@router.get("/by-camp-date/", response_model=None, responses={200: {"model": List[RegistrationResponse]}}, dependencies=[Depends(conditional_etag())])
+async def get_registrations_by_camp_date(
+    response: Response,
+    camp_date: str = Query(..., description="Camp date to filter by (YYYY-MM-DD)"),
+    status: Optional[RegistrationStatus] = None,
+    view: Optional[RegistrationView] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Get all registrations for a specific camp date.
+    This queries the campDates array to find registrations with camps on the specified date.
+    Optionally filter by status (enrolled/cancelled).
+    At most BY_CAMP_DATE_LIMIT rows are returned; X-Result-Truncated: true
+    marks a day that had more.
+    """
+    projection, formatter = build_read_options(view, fields)
+    
+    # Parse the date string
+    try:
+        date_obj = datetime.strptime(camp_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    registrations, truncated = await find_by_camp_date(date_obj, status, projection)
+    if truncated:
+        response.headers["X-Result-Truncated"] = "true"
+    
+    return [formatter(reg) for reg in registrations]
+
+
+@router.get("/search/", response_model=None, responses={200: {"model": List[RegistrationResponse]}})
+async def search_registrations(
+    q: str = Query(..., min_length=1, description="Child name, parent name or parent email (prefixes match)"),
+    status: Optional[RegistrationStatus] = None,
+    limit: int = Query(20, ge=1, le=100),
+    view: Optional[RegistrationView] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    current_user: ClerkUser = Depends(verify_clerk_token)
+):
+    """
+    Ranked search across child names, parent names and parent emails.
+    Case and accents are ignored; every word of q must prefix-match a word
+    of the registration. Child matches and exact words rank first.
+    """
+    projection, formatter = build_read_options(view, fields)
     
-    return [registration_helper(reg) for reg in registrations]
+    registrations = await registration_search.search(
+        q,
+        projection=projection,
+        extra_filter={"status": status.value} if status else None,
+        limit=limit,
+        max_time_ms=settings.registrations_max_time_ms
+    )
+    
+    return [formatter(reg) for reg in registrations]
 
 
 @router.get("/search/by-child/{child_name}")
 async def search_by_child_name(
     child_name: str,
+    view: Optional[RegistrationView] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user: ClerkUser = Depends(verify_clerk_token)
 ):
-    """Search registrations by child name (fuzzy search)"""
-    db = get_database()
+    """Search registrations by child name (prefix search, ranked)"""
+    projection, formatter = build_read_options(view, fields)
     
-    registrations = await db.registrations.find({
-        "childName": {"$regex": child_name, "$options": "i"}
-    }).to_list(length=100)
+    registrations = await registration_search.search(
+        child_name,
+        key_fields=["childSearchKeys"],
+        projection=projection,
+        limit=100,
+        max_time_ms=settings.registrations_max_time_ms
+    )
     
-    return [registration_helper(reg) for reg in registrations]
+    return [formatter(reg) for reg in registrations]
 
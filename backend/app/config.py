@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict
 
 
 class Settings(BaseSettings):
@@ -7,6 +8,52 @@ class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017"
     mongodb_db_name: str = "icode_portal"
     
+    # MongoDB connection pool
+    mongodb_max_pool_size: int = 100
+    mongodb_min_pool_size: int = 5
+    mongodb_connect_timeout_ms: int = 10000
+    mongodb_server_selection_timeout_ms: int = 10000
+    mongodb_compressors: str = "zlib"  # zstd / snappy need the zstandard / python-snappy packages
+    mongodb_analytics_read_preference: str = "secondaryPreferred"
+    verify_query_plans_on_startup: bool = False
+    run_migrations_on_startup: bool = True
+    migration_lease_seconds: int = 600
+    raw_email_compression: bool = True
+    export_batch_size: int = 1000  # Cursor batch size (and CSV/NDJSON chunk size) for exports
+    export_parquet_row_group_size: int = 10000
+    
+    # Query time budgets (maxTimeMS, 0 = none); a query over budget answers 504
+    registrations_max_time_ms: int = 2000  # Registration reads (list, by-camp-date, search, detail)
+    analytics_max_time_ms: int = 5000  # Analytics routes reading rollups and counters
+    analytics_query_max_time_ms: int = 15000  # /api/analytics/query (groups registrations)
+    export_max_time_ms: int = 300000  # Whole export cursor
+    
+    # Calendar days of timestamps (enrollments, cancellations, "today") are
+    # taken in this timezone; camp days are stored as plain dates
+    business_timezone: str = "America/Los_Angeles"
+    
+    # Analytics response cache
+    analytics_cache_enabled: bool = True
+    analytics_cache_ttl_seconds: int = 30
+    analytics_cache_max_entries: int = 256
+    analytics_cache_redis_url: str = ""  # Shared tier (any Redis-compatible server); needs the redis package
+    
+    # Capacity (seats = children per camp day); 0 / missing means unlimited
+    capacity_daily_limit: int = 0
+    capacity_location_limits: Dict[str, int] = {}  # JSON, e.g. {"Redmond": 40}
+    capacity_enforcement: str = "reject"  # "reject" or "flag" for manual writes; emails are always flagged
+    
+    # Rollup rebuilds (daily_stats, seat_counters; see services/rollup_rebuild.py)
+    rollup_rebuild_settle_seconds: float = 2.0  # Pause between the two passes over registrations
+    
+    # In-memory occupancy engine
+    occupancy_refresh_seconds: int = 300  # Full rebuild interval (picks up other replicas' writes)
+    
+    # Live events (SSE)
+    events_queue_size: int = 100  # Pending events per client before it is told to resync
+    events_keepalive_seconds: int = 15
+    events_reconnect_seconds: int = 5
+    
     # JWT Configuration (legacy - keeping for compatibility)
     secret_key: str = "fallback-secret-key"
     algorithm: str = "HS256"
@@ -1,4 +1,18 @@
-from .mongodb import get_database, connect_to_mongodb, close_mongodb_connection
+from .mongodb import (
+    get_database,
+    get_analytics_database,
+    analytics_sessions,
+    connect_to_mongodb,
+    warm_up_mongodb,
+    close_mongodb_connection
+)
 
-__all__ = ["get_database", "connect_to_mongodb", "close_mongodb_connection"]
+__all__ = [
+    "get_database",
+    "get_analytics_database",
+    "analytics_sessions",
+    "connect_to_mongodb",
+    "warm_up_mongodb",
+    "close_mongodb_connection"
+]
 
@@ -0,0 +1,245 @@
+"""
+Index definitions for the registrations collections and the query shapes they serve.
+
+Every route query should be listed in query_shapes() so that
+scripts/verify_query_plans.py can check it against the indexes below.
+Changes to these lists reach the database through a migration
+(see db/migrations.py).
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from ..models.registration import RegistrationStatus
+from ..services.registration_search import email_prefix_filter
+
+
+REGISTRATION_INDEXES = [
+    IndexModel([("parentEmail", ASCENDING)]),
+    # Registration listing order (enrollmentDate, _id), used by keyset pagination
+    IndexModel([("enrollmentDate", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("emailId", ASCENDING)], unique=True, sparse=True),
+    IndexModel([("careRequestNumber", ASCENDING)], sparse=True),
+    IndexModel([("cancellationEmailIds", ASCENDING)], sparse=True),
+    # Status plus range (also serve plain status filters through their prefix)
+    IndexModel([("status", ASCENDING), ("enrollmentDate", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("status", ASCENDING), ("campDates", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("cancellationDate", ASCENDING)]),
+    # Dimensional analytics filtered by location or employer (services/analytics_query.py)
+    IndexModel([("location", ASCENDING), ("enrollmentDate", ASCENDING)]),
+    IndexModel([("employer", ASCENDING), ("enrollmentDate", ASCENDING)]),
+    # Calendar lookups by camp day, listed by child
+    IndexModel([("campDates", ASCENDING), ("childName", ASCENDING)]),
+    # Normalized prefix search (see services/registration_search.py)
+    IndexModel([("childSearchKeys", ASCENDING)]),
+    IndexModel([("parentSearchKeys", ASCENDING)]),
+]
+
+REGISTRATION_SOURCE_INDEXES = [
+    IndexModel([("registration", ASCENDING)]),
+]
+
+# One rollup document per day, camp type and location (see services/daily_stats.py)
+DAILY_STATS_INDEXES = [
+    IndexModel([("date", ASCENDING), ("campType", ASCENDING), ("location", ASCENDING)], unique=True),
+]
+
+# One seat counter per day and location (see services/seat_counters.py);
+# location first so the per-location date ranges are contiguous
+SEAT_COUNTER_INDEXES = [
+    IndexModel([("location", ASCENDING), ("date", ASCENDING)], unique=True),
+]
+
+
+def query_shapes() -> List[Dict]:
+    """
+    Representative queries issued by the API routes.
+
+    Shapes run against the registrations collection unless they name another
+    one in "collection".
+
+    bounded_sort marks shapes whose sort cannot come from the index used for
+    the filter but whose result set is small (one camp day, or one parent's
+    registrations), so an in-memory SORT is accepted.
+    """
+    enrolled = RegistrationStatus.ENROLLED.value
+    cancelled = RegistrationStatus.CANCELLED.value
+    end = datetime.utcnow()
+    start = end - timedelta(days=30)
+    day_start = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1) - timedelta(microseconds=1)
+
+    return [
+        {
+            "route": "GET /api/registrations/",
+            "filter": {},
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+        },
+        {
+            "route": "GET /api/registrations/?status=",
+            "filter": {"status": enrolled},
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+        },
+        {
+            "route": "GET /api/registrations/?status=&start_date=&end_date=",
+            "filter": {"status": enrolled, "enrollmentDate": {"$gte": start, "$lt": end}},
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+        },
+        {
+            "route": "GET /api/registrations/?cursor=",
+            "filter": {"$or": [
+                {"enrollmentDate": {"$lt": end}},
+                {"enrollmentDate": end, "_id": {"$lt": ObjectId()}}
+            ]},
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+        },
+        {
+            "route": "GET /api/registrations/?status=&cursor=",
+            "filter": {"status": enrolled, "$or": [
+                {"enrollmentDate": {"$lt": end}},
+                {"enrollmentDate": end, "_id": {"$lt": ObjectId()}}
+            ]},
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+        },
+        {
+            "route": "GET /api/registrations/by-camp-date/",
+            "filter": {"campDates": {"$elemMatch": {"$gte": day_start, "$lte": day_end}}},
+            "sort": [("childName", ASCENDING)],
+            "bounded_sort": True,
+        },
+        {
+            "route": "GET /api/registrations/by-camp-date/?status=",
+            "filter": {
+                "status": enrolled,
+                "campDates": {"$elemMatch": {"$gte": day_start, "$lte": day_end}}
+            },
+            "sort": [("childName", ASCENDING)],
+            "bounded_sort": True,
+        },
+        {
+            "route": "GET /api/analytics/revenue",
+            "collection": "daily_stats",
+            "filter": {"date": {"$gte": day_start - timedelta(days=30), "$lte": day_start}, "enrollments": {"$gt": 0}},
+        },
+        {
+            "route": "GET /api/analytics/daily-capacity",
+            "collection": "daily_stats",
+            "filter": {"date": {"$gte": day_start, "$lte": day_start + timedelta(days=60)}, "campDays": {"$gt": 0}},
+        },
+        {
+            "route": "GET /api/analytics/daily-capacity (registrations per day)",
+            "filter": {
+                "status": enrolled,
+                "campDates": {"$elemMatch": {"$gte": day_start, "$lte": day_start + timedelta(days=60)}}
+            },
+        },
+        {
+            "route": "GET /api/analytics/daily-capacity (seats)",
+            "collection": "seat_counters",
+            "filter": {"location": "*", "date": {"$gte": day_start, "$lte": day_start + timedelta(days=60)}},
+        },
+        {
+            "route": "GET /api/analytics/cancellations",
+            "collection": "daily_stats",
+            "filter": {"date": {"$gte": day_start - timedelta(days=30), "$lte": day_start}, "cancellations": {"$gt": 0}},
+        },
+        {
+            "route": "GET /api/analytics/compare",
+            "collection": "daily_stats",
+            "filter": {
+                "date": {"$gte": day_start - timedelta(days=60), "$lte": day_start},
+                "$or": [{"enrollments": {"$gt": 0}}, {"cancellations": {"$gt": 0}}]
+            },
+        },
+        {
+            "route": "GET /api/analytics/dashboard-summary (upcoming camps)",
+            "filter": {
+                "status": enrolled,
+                "campDates": {"$elemMatch": {"$gte": day_start, "$lte": day_start + timedelta(days=7)}}
+            },
+        },
+        {
+            "route": "GET /api/analytics/dashboard-summary (recent cancellations)",
+            "filter": {"status": cancelled, "cancellationDate": {"$gte": start}},
+        },
+        {
+            "route": "GET /api/analytics/query",
+            "filter": {"enrollmentDate": {"$gte": start, "$lt": end}},
+        },
+        {
+            "route": "GET /api/analytics/query?status=",
+            "filter": {"status": enrolled, "enrollmentDate": {"$gte": start, "$lt": end}},
+        },
+        {
+            "route": "GET /api/analytics/query?location=",
+            "filter": {"location": "Redmond", "enrollmentDate": {"$gte": start, "$lt": end}},
+        },
+        {
+            "route": "GET /api/analytics/query?employer=",
+            "filter": {"employer": "Microsoft", "enrollmentDate": {"$gte": start, "$lt": end}},
+        },
+        {
+            "route": "GET /api/registrations/search/",
+            "filter": {"$or": [
+                {"childSearchKeys": {"$all": [re.compile("^jo")]}},
+                {"parentSearchKeys": {"$all": [re.compile("^jo")]}}
+            ]},
+        },
+        {
+            "route": "GET /api/registrations/?parent_email=",
+            "filter": email_prefix_filter("jane@"),
+            "sort": [("enrollmentDate", DESCENDING), ("_id", DESCENDING)],
+            "bounded_sort": True,
+        },
+        {
+            "route": "pubsub_handler.process_email (care request lookup)",
+            "filter": {"careRequestNumber": "CR-0"},
+        },
+    ]
+
+
+def _plan_stages(plan: Dict) -> List[str]:
+    """Collect every stage name in an explain plan tree"""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_query_shapes(db: AsyncIOMotorDatabase) -> List[Dict]:
+    """
+    Explain every query shape and report the winning plan.
+
+    Returns one entry per shape with its stages and a list of problems
+    (COLLSCAN, or an in-memory SORT on a shape that is not bounded).
+    """
+    results = []
+    for shape in query_shapes():
+        cursor = db[shape.get("collection", "registrations")].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explanation = await cursor.explain()
+
+        stages = _plan_stages(explanation["queryPlanner"]["winningPlan"])
+        problems = []
+        if "COLLSCAN" in stages:
+            problems.append("COLLSCAN")
+        if "SORT" in stages and not shape.get("bounded_sort"):
+            problems.append("in-memory SORT")
+
+        results.append({
+            "route": shape["route"],
+            "stages": stages,
+            "problems": problems,
+        })
+    return results
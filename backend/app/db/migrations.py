@@ -0,0 +1,426 @@
+"""
+Versioned schema and index migrations.
+
+Applied versions are recorded in the _migrations collection. At startup the
+runner reads them in one query; when the schema is current nothing else
+happens. Pending migrations run in a background task under a lease document
+(_id "lease" in _migrations), so when several replicas boot at once only one
+of them builds indexes and backfills data while all of them serve traffic.
+A migration that fails is recorded (_id "failure") and makes /health answer
+503 on every replica until a later run succeeds; if the lease cannot be
+renewed the running migration is cancelled.
+
+Add a migration by appending a function decorated with @migration and the
+next version number. Never renumber or edit an applied migration.
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from ..config import get_settings
+from .indexes import (
+    DAILY_STATS_INDEXES,
+    REGISTRATION_INDEXES,
+    REGISTRATION_SOURCE_INDEXES,
+    SEAT_COUNTER_INDEXES,
+    explain_query_shapes,
+)
+
+settings = get_settings()
+
+LEASE_ID = "lease"
+
+# Last failed migration, reported by /health until a run succeeds
+FAILURE_ID = "failure"
+
+
+class Migration:
+    """A numbered, one-time change to the database"""
+
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        apply: Callable[[AsyncIOMotorDatabase], Awaitable[None]],
+        rewrites_data: bool = False
+    ):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        # Changes registrations or the rollups analytics read, so ETags and
+        # cached analytics computed before it are stale
+        self.rewrites_data = rewrites_data
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str, rewrites_data: bool = False):
+    """Register a migration function"""
+    def register(apply):
+        MIGRATIONS.append(Migration(version, description, apply, rewrites_data))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return apply
+    return register
+
+
+async def sync_indexes(collection: AsyncIOMotorCollection, indexes: list):
+    """
+    Create indexes, first dropping any existing index with the same name but
+    different options (e.g. a non-unique emailId_1 left by an old script).
+    """
+    existing = await collection.index_information()
+    for index in indexes:
+        spec = index.document
+        current = existing.get(spec["name"])
+        if current and (
+            current.get("unique", False) != spec.get("unique", False)
+            or current.get("sparse", False) != spec.get("sparse", False)
+        ):
+            await collection.drop_index(spec["name"])
+            print(f"[MIGRATE] Dropped {collection.name}.{spec['name']} (options changed)")
+    await collection.create_indexes(indexes)
+
+
+async def drop_indexes_if_present(collection: AsyncIOMotorCollection, names: List[str]):
+    existing = await collection.index_information()
+    for name in names:
+        if name in existing:
+            await collection.drop_index(name)
+            print(f"[MIGRATE] Dropped {collection.name}.{name}")
+
+
+@migration(1, "Create registrations and registration_sources indexes")
+async def create_initial_indexes(db: AsyncIOMotorDatabase):
+    await sync_indexes(db.registrations, REGISTRATION_INDEXES)
+    await sync_indexes(db.registration_sources, REGISTRATION_SOURCE_INDEXES)
+
+
+@migration(2, "Drop single-field indexes superseded by compound indexes")
+async def drop_superseded_indexes(db: AsyncIOMotorDatabase):
+    await drop_indexes_if_present(
+        db.registrations,
+        ["status_1", "campDates_1", "enrollmentDate_1", "status_1_enrollmentDate_-1"]
+    )
+
+
+@migration(3, "Move inline rawEmailBody into registration_sources", rewrites_data=True)
+async def move_raw_email_bodies(db: AsyncIOMotorDatabase):
+    from ..services.registration_sources import registration_source_store
+
+    # registration_sources is keyed by emailId; bodies without one stay inline
+    # (GET /{id}/sources still serves them) rather than being dropped
+    cursor = db.registrations.find(
+        {"rawEmailBody": {"$exists": True}, "emailId": {"$exists": True, "$nin": [None, ""]}},
+        {"emailId": 1, "emailReceivedAt": 1, "rawEmailBody": 1}
+    ).batch_size(200)
+
+    moved = 0
+    async for registration in cursor:
+        if registration.get("rawEmailBody"):
+            await registration_source_store.save(
+                registration["_id"],
+                registration["emailId"],
+                registration["rawEmailBody"],
+                registration.get("emailReceivedAt")
+            )
+        await db.registrations.update_one({"_id": registration["_id"]}, {"$unset": {"rawEmailBody": ""}})
+        moved += 1
+    print(f"[MIGRATE] Moved {moved} email bodies")
+
+
+@migration(4, "Backfill childSearchKeys/parentSearchKeys")
+async def backfill_search_keys(db: AsyncIOMotorDatabase):
+    from ..services.registration_search import build_search_keys, SEARCH_SOURCE_FIELDS
+
+    batch = []
+    updated = 0
+    cursor = db.registrations.find({}, {field: 1 for field in SEARCH_SOURCE_FIELDS}).batch_size(500)
+    async for registration in cursor:
+        batch.append(UpdateOne({"_id": registration["_id"]}, {"$set": build_search_keys(registration)}))
+        if len(batch) == 500:
+            await db.registrations.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await db.registrations.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    print(f"[MIGRATE] Search keys written on {updated} registrations")
+
+
+@migration(5, "Store totalCost/amountPaid as Decimal128", rewrites_data=True)
+async def convert_money_to_decimal128(db: AsyncIOMotorDatabase):
+    from ..utils.money import MONEY_FIELDS
+
+    for field in MONEY_FIELDS:
+        result = await db.registrations.update_many(
+            {field: {"$type": ["double", "int", "long"]}},
+            [{"$set": {field: {"$toDecimal": {"$round": [f"${field}", 2]}}}}]
+        )
+        print(f"[MIGRATE] Converted {field} on {result.modified_count} registrations")
+
+
+@migration(6, "Build daily_stats rollups", rewrites_data=True)
+async def build_daily_stats(db: AsyncIOMotorDatabase):
+    from ..services.daily_stats import daily_stats
+
+    await sync_indexes(db.daily_stats, DAILY_STATS_INDEXES)
+    corrected = await daily_stats.rebuild(db)
+    print(f"[MIGRATE] Wrote {corrected} daily_stats documents")
+
+
+@migration(7, "Build seat_counters", rewrites_data=True)
+async def build_seat_counters(db: AsyncIOMotorDatabase):
+    from ..services.seat_counters import seat_counters
+
+    await sync_indexes(db.seat_counters, SEAT_COUNTER_INDEXES)
+    corrected = await seat_counters.rebuild(db)
+    print(f"[MIGRATE] Wrote {corrected} seat counters")
+
+
+@migration(8, "Index location/employer by enrollmentDate for dimensional analytics")
+async def create_dimension_indexes(db: AsyncIOMotorDatabase):
+    await sync_indexes(db.registrations, REGISTRATION_INDEXES)
+
+
+@migration(9, "Store parsed enrollment dates as local midnight and rebucket daily_stats by BUSINESS_TIMEZONE", rewrites_data=True)
+async def localize_enrollment_days(db: AsyncIOMotorDatabase):
+    from ..services.daily_stats import daily_stats
+    from ..utils.timezone import business_timezone_name
+
+    # Parsed emails used the first camp day (a UTC-midnight day label) as
+    # enrollmentDate; make it the instant that day starts in the business timezone
+    result = await db.registrations.update_many(
+        {
+            "manualEntry": {"$ne": True},
+            # $and short-circuits, so $dateToString only sees dates
+            "$expr": {"$and": [
+                {"$eq": [{"$type": "$enrollmentDate"}, "date"]},
+                {"$eq": [
+                    {"$dateToString": {"format": "%H:%M:%S.%L", "date": "$enrollmentDate"}},
+                    "00:00:00.000"
+                ]}
+            ]}
+        },
+        [{"$set": {"enrollmentDate": {"$dateFromParts": {
+            "year": {"$year": "$enrollmentDate"},
+            "month": {"$month": "$enrollmentDate"},
+            "day": {"$dayOfMonth": "$enrollmentDate"},
+            "timezone": business_timezone_name()
+        }}}}]
+    )
+    print(f"[MIGRATE] Localized enrollmentDate on {result.modified_count} registrations")
+
+    corrected = await daily_stats.rebuild(db)
+    print(f"[MIGRATE] Wrote {corrected} daily_stats documents")
+
+
+@migration(10, "Backfill careRequestNumber and reconcile stored cancellation emails with their enrollments", rewrites_data=True)
+async def reconcile_cancellation_pairs(db: AsyncIOMotorDatabase):
+    from ..models.registration import RegistrationStatus
+    from ..services.email_parser import email_parser
+    from ..services.pubsub_handler import pubsub_handler
+    from ..services.registration_sources import registration_source_store
+
+    # Parsed rows missing their care request number, and cancelled rows that
+    # may be cancellation emails stored on their own (never applied)
+    cursor = db.registrations.find(
+        {
+            "manualEntry": {"$ne": True},
+            "emailId": {"$exists": True, "$ne": None},
+            "unmatchedCancellation": {"$ne": True},
+            "$or": [
+                {"careRequestNumber": None},
+                {"status": RegistrationStatus.CANCELLED.value, "cancellationEmailIds": {"$exists": False}}
+            ]
+        },
+        {"emailId": 1, "emailReceivedAt": 1, "status": 1, "careRequestNumber": 1, "cancellationEmailIds": 1, "campDates": 1}
+    ).batch_size(200)
+
+    backfilled = standalone = 0
+    async for registration in cursor:
+        changes = {}
+        body = await registration_source_store.get(registration["emailId"])
+        parsed = email_parser.parse_email(body, "", registration.get("emailReceivedAt")) if body else None
+
+        if parsed and parsed["careRequestNumber"] and not registration.get("careRequestNumber"):
+            changes["careRequestNumber"] = parsed["careRequestNumber"]
+            backfilled += 1
+
+        # Only rows whose own email parses as a cancellation; other cancelled
+        # rows (e.g. soft-deleted by staff) keep counting as ordinary cancellations
+        if (
+            parsed
+            and parsed["status"] == RegistrationStatus.CANCELLED
+            and registration["status"] == RegistrationStatus.CANCELLED.value
+            and "cancellationEmailIds" not in registration
+        ):
+            changes["unmatchedCancellation"] = True
+            changes["cancelledDates"] = parsed["cancelledDates"] or registration.get("campDates") or []
+            standalone += 1
+
+        if changes:
+            await db.registrations.update_one({"_id": registration["_id"]}, {"$set": changes})
+    print(f"[MIGRATE] Backfilled careRequestNumber on {backfilled} and found {standalone} standalone cancellations")
+
+    counts = await pubsub_handler.reconcile_cancellations()
+    print(f"[MIGRATE] Merged {counts['merged']} cancellations into their enrollment, {counts['unmatched']} still unmatched")
+
+
+class MigrationRunner:
+    """Applies pending migrations once across all replicas"""
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.task: Optional[asyncio.Task] = None
+        self.lease_lost = False
+
+    async def applied_versions(self, db: AsyncIOMotorDatabase) -> set:
+        records = await db._migrations.find({"_id": {"$type": "number"}}, {"_id": 1}).to_list(length=None)
+        return {record["_id"] for record in records}
+
+    async def pending(self, db: AsyncIOMotorDatabase) -> List[Migration]:
+        applied = await self.applied_versions(db)
+        return [m for m in MIGRATIONS if m.version not in applied]
+
+    async def _acquire_lease(self, db: AsyncIOMotorDatabase) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db._migrations.update_one(
+                {"_id": LEASE_ID, "$or": [{"expiresAt": {"$lt": now}}, {"holder": self.holder}]},
+                {"$set": {
+                    "holder": self.holder,
+                    "expiresAt": now + timedelta(seconds=settings.migration_lease_seconds)
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Lease exists and belongs to another live process
+            return False
+
+    async def _renew_lease(self, db: AsyncIOMotorDatabase, migrating: asyncio.Task):
+        """Keep the lease alive; if it cannot be renewed, stop the migration"""
+        while True:
+            await asyncio.sleep(settings.migration_lease_seconds / 3)
+            try:
+                renewed = await self._acquire_lease(db)
+            except Exception as e:
+                print(f"[WARN] Could not renew the migration lease: {e}")
+                renewed = False
+            if not renewed:
+                # Another instance may take over once it expires; never run concurrently with it
+                self.lease_lost = True
+                migrating.cancel()
+                return
+
+    async def _release_lease(self, db: AsyncIOMotorDatabase):
+        await db._migrations.delete_one({"_id": LEASE_ID, "holder": self.holder})
+
+    async def run(self, db: AsyncIOMotorDatabase) -> bool:
+        """
+        Apply pending migrations if this process wins the lease.
+
+        Returns:
+            True if the schema is current afterwards
+        """
+        if not await self._acquire_lease(db):
+            print("[MIGRATE] Another instance holds the migration lease, skipping")
+            return False
+
+        self.lease_lost = False
+        renewer = asyncio.create_task(self._renew_lease(db, asyncio.current_task()))
+        pending = None
+        try:
+            # Re-read under the lease: another instance may have just finished
+            for pending in await self.pending(db):
+                print(f"[MIGRATE] Applying {pending.version}: {pending.description}")
+                started = time.monotonic()
+                await pending.apply(db)
+                await db._migrations.insert_one({
+                    "_id": pending.version,
+                    "description": pending.description,
+                    "appliedAt": datetime.utcnow(),
+                    "appliedBy": self.holder,
+                    "durationMs": int((time.monotonic() - started) * 1000)
+                })
+                if pending.rewrites_data:
+                    await self._data_rewritten()
+            await db._migrations.delete_one({"_id": FAILURE_ID})
+            print("[OK] Database schema is current")
+            return True
+        except asyncio.CancelledError:
+            if not self.lease_lost:
+                raise
+            print(f"[ERROR] Lost the migration lease during migration {pending.version if pending else '-'}, stopped")
+            return False
+        except Exception as e:
+            print(f"[ERROR] Migration {pending.version if pending else '-'} failed: {e}")
+            await self._record_failure(db, pending, e)
+            return False
+        finally:
+            renewer.cancel()
+            await self._release_lease(db)
+
+    async def _data_rewritten(self):
+        """Revalidate ETags and drop cached analytics, as after any registration write"""
+        from ..services.analytics_cache import analytics_cache
+        from ..services.change_counter import registration_changes
+
+        await registration_changes.bump()
+        await analytics_cache.invalidate()
+
+    async def _record_failure(self, db: AsyncIOMotorDatabase, failed: Optional[Migration], error: Exception):
+        try:
+            await db._migrations.replace_one({"_id": FAILURE_ID}, {
+                "version": failed.version if failed else None,
+                "description": failed.description if failed else None,
+                "error": str(error),
+                "failedAt": datetime.utcnow(),
+                "failedBy": self.holder
+            }, upsert=True)
+        except Exception as e:
+            print(f"[WARN] Could not record the migration failure: {e}")
+
+    async def failure(self, db: AsyncIOMotorDatabase) -> Optional[dict]:
+        """The last migration failure on any instance, None once a run succeeds"""
+        return await db._migrations.find_one({"_id": FAILURE_ID}, {"_id": 0})
+
+    async def _run_in_background(self, db: AsyncIOMotorDatabase):
+        if await self.run(db) and settings.verify_query_plans_on_startup:
+            await log_query_plan_problems(db)
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Startup hook: no-op when current, otherwise migrate in a background task"""
+        pending = await self.pending(db)
+        if not pending:
+            print("[OK] Database schema is current")
+            if settings.verify_query_plans_on_startup:
+                await log_query_plan_problems(db)
+            return
+
+        print(f"[MIGRATE] {len(pending)} pending migration(s), applying in the background")
+        self.task = asyncio.create_task(self._run_in_background(db))
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+async def log_query_plan_problems(db: AsyncIOMotorDatabase):
+    for result in await explain_query_shapes(db):
+        if result["problems"]:
+            print(f"[WARN] {result['route']}: {', '.join(result['problems'])} ({' <- '.join(result['stages'])})")
+
+
+# Singleton instance
+migration_runner = MigrationRunner()
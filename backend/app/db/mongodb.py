@@ -1,4 +1,9 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from ..config import get_settings
 
 settings = get_settings()
@@ -7,27 +12,51 @@ settings = get_settings()
 class MongoDB:
     client: AsyncIOMotorClient = None
     db: AsyncIOMotorDatabase = None
+    analytics_db: AsyncIOMotorDatabase = None
 
 
 mongodb = MongoDB()
 
+# (clusterTime, operationTime) that analytics reads in this context must not
+# be older than (set by ChangeCounter.reads_after)
+analytics_read_anchor: ContextVar[Optional[Tuple[Any, Any]]] = ContextVar("analytics_read_anchor", default=None)
+
 
 async def connect_to_mongodb():
-    """Connect to MongoDB and create indexes"""
-    mongodb.client = AsyncIOMotorClient(settings.mongodb_url)
+    """Connect to MongoDB (indexes are managed by db/migrations.py)"""
+    client_options = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+    }
+    if settings.mongodb_compressors:
+        client_options["compressors"] = settings.mongodb_compressors
+    
+    mongodb.client = AsyncIOMotorClient(settings.mongodb_url, **client_options)
     mongodb.db = mongodb.client[settings.mongodb_db_name]
     
-    # Create indexes for registrations collection
-    registrations_collection = mongodb.db.registrations
-    await registrations_collection.create_index("parentEmail")
-    await registrations_collection.create_index("campDates")
-    await registrations_collection.create_index("status")
-    await registrations_collection.create_index("enrollmentDate")
-    await registrations_collection.create_index("emailId", unique=True, sparse=True)
+    # Analytics reads can be served by secondaries, leaving the primary for ingestion
+    mongodb.analytics_db = mongodb.client.get_database(
+        settings.mongodb_db_name,
+        read_preference=make_read_preference(
+            read_pref_mode_from_name(settings.mongodb_analytics_read_preference), None
+        )
+    )
     
     print(f"[OK] Connected to MongoDB: {settings.mongodb_db_name}")
 
 
+async def warm_up_mongodb():
+    """
+    Open the minimum pool of connections before serving traffic, so the first
+    requests after a deploy do not pay for connection and TLS setup.
+    """
+    connections = max(settings.mongodb_min_pool_size, 1)
+    await asyncio.gather(*(mongodb.db.command("ping") for _ in range(connections)))
+    print(f"[OK] Warmed up {connections} MongoDB connection(s)")
+
+
 async def close_mongodb_connection():
     """Close MongoDB connection"""
     if mongodb.client:
@@ -39,3 +68,30 @@ def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
     return mongodb.db
 
+
+def get_analytics_database() -> AsyncIOMotorDatabase:
+    """Get database instance for analytics reads (uses the analytics read preference)"""
+    return mongodb.analytics_db
+
+
+@asynccontextmanager
+async def analytics_sessions(count: int = 1):
+    """
+    Sessions for analytics reads, one per concurrent operation (a session
+    cannot run two at once). Under an anchor they are causally consistent
+    with it, so a secondary answers only once it has replicated that far
+    (afterClusterTime); without one they are None, i.e. plain reads.
+    """
+    anchor = analytics_read_anchor.get()
+    if anchor is None:
+        yield [None] * count
+        return
+    cluster_time, operation_time = anchor
+    async with AsyncExitStack() as stack:
+        sessions = []
+        for _ in range(count):
+            session = await stack.enter_async_context(await mongodb.client.start_session(causal_consistency=True))
+            session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+            sessions.append(session)
+        yield sessions
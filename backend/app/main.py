@@ -1,9 +1,16 @@
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.errors import ExecutionTimeout
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import get_settings
-from .db.mongodb import connect_to_mongodb, close_mongodb_connection
+from .db.mongodb import connect_to_mongodb, warm_up_mongodb, close_mongodb_connection, get_database
+from .db.migrations import migration_runner
+from .services.analytics_cache import analytics_cache
+from .services.registration_events import registration_events
+from .utils.query_budget import query_timeout_handler
 
 settings = get_settings()
 
@@ -12,8 +19,15 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongodb()
+    await warm_up_mongodb()
+    if settings.run_migrations_on_startup:
+        await migration_runner.start(get_database())
+    await analytics_cache.connect()
     yield
     # Shutdown
+    await migration_runner.stop()
+    await analytics_cache.close()
+    await registration_events.stop()
     await close_mongodb_connection()
 
 
@@ -35,8 +49,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Result-Truncated"],
 )
 
+# Queries aborted by their maxTimeMS budget (see utils/query_budget.py)
+app.add_exception_handler(ExecutionTimeout, query_timeout_handler)
+
 
 @app.get("/")
 async def root():
@@ -49,11 +67,15 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    # A failed migration leaves later ones unapplied, so the instance is not healthy
+    failure = await migration_runner.failure(get_database())
+    if failure:
+        return JSONResponse(status_code=503, content=jsonable_encoder({"status": "unhealthy", "migrationFailure": failure}))
     return {"status": "healthy"}
 
 
 # Import and include routers
-from .api import webhook, registrations, analytics
+from .api import webhook, registrations, analytics, dashboard, events
 
 # Auth disabled for now - will use external auth service later
 # from .api import auth
@@ -62,4 +84,6 @@ from .api import webhook, registrations, analytics
 app.include_router(webhook.router, prefix="/api/webhook", tags=["webhook"])
 app.include_router(registrations.router, prefix="/api/registrations", tags=["registrations"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
@@ -5,6 +5,11 @@ from .registration import (
     RegistrationUpdate,
     RegistrationInDB,
     RegistrationResponse,
+    RegistrationView,
+    RegistrationCalendarView,
+    RegistrationTableView,
+    RegistrationSourceEmail,
+    RegistrationSourceResponse,
     User,
     UserInDB,
     Token,
@@ -18,6 +23,11 @@ __all__ = [
     "RegistrationUpdate",
     "RegistrationInDB",
     "RegistrationResponse",
+    "RegistrationView",
+    "RegistrationCalendarView",
+    "RegistrationTableView",
+    "RegistrationSourceEmail",
+    "RegistrationSourceResponse",
     "User",
     "UserInDB",
     "Token",
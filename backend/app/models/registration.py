@@ -51,13 +51,24 @@ class RegistrationUpdate(BaseModel):
     amountPaid: Optional[Decimal] = None
 
 
+class RegistrationView(str, Enum):
+    TABLE = "table"
+    CALENDAR = "calendar"
+    DETAIL = "detail"
+
+
 class RegistrationInDB(RegistrationBase):
     id: str = Field(alias="_id")
     registrationId: str
+    children: List[str] = []
+    employer: Optional[str] = None
+    location: Optional[str] = None
+    careRequestNumber: Optional[str] = None
+    cancelledDates: List[datetime] = []
+    overCapacityDates: List[datetime] = []  # Camp days booked past a capacity limit
     emailId: Optional[str] = None
     emailReceivedAt: Optional[datetime] = None
     parsedAt: Optional[datetime] = None
-    rawEmailBody: Optional[str] = None
     manualEntry: bool = False
     createdBy: Optional[str] = None
     updatedAt: datetime
@@ -74,6 +85,42 @@ class RegistrationResponse(RegistrationInDB):
     pass
 
 
+class RegistrationCalendarView(BaseModel):
+    """Fields needed to place a registration on the calendar"""
+    id: str = Field(alias="_id")
+    status: RegistrationStatus
+    childName: Optional[str] = None
+    children: List[str] = []
+    campDates: List[datetime] = []
+    campType: Optional[str] = None
+    
+    class Config:
+        populate_by_name = True
+
+
+class RegistrationTableView(RegistrationCalendarView):
+    """Fields shown in the registrations table"""
+    registrationId: Optional[str] = None
+    enrollmentDate: Optional[datetime] = None
+    parentName: Optional[str] = None
+    parentEmail: Optional[str] = None
+    parentPhone: Optional[str] = None
+    employer: Optional[str] = None
+    totalCost: Optional[float] = None
+    amountPaid: Optional[float] = None
+
+
+class RegistrationSourceEmail(BaseModel):
+    emailId: str
+    receivedAt: Optional[datetime] = None
+    rawEmailBody: str
+
+
+class RegistrationSourceResponse(BaseModel):
+    id: str
+    sources: List[RegistrationSourceEmail]
+
+
 class User(BaseModel):
     username: str
     email: EmailStr
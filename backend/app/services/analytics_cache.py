@@ -0,0 +1,227 @@
+"""
+Response cache for the analytics routes.
+
+Responses are keyed by route and normalized query parameters and kept in two
+tiers: an in-process LRU with a TTL, and an optional shared tier (any
+Redis-compatible server, set ANALYTICS_CACHE_REDIS_URL) so replicas reuse each
+other's results.
+
+Every registration write calls invalidate(), which bumps a generation counter
+(in the shared tier when configured, so all replicas see it). The generation
+is part of every cache key, so entries computed before a write are never
+served after it. The TTL bounds how stale "last 30 days" style results get
+between writes.
+"""
+
+import functools
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..config import get_settings
+from .change_counter import registration_changes
+
+settings = get_settings()
+
+GENERATION_KEY = "analytics:generation"
+
+# Route arguments that do not change the response
+UNCACHED_ARGUMENTS = ("current_user",)
+
+
+class RedisCacheBackend:
+    """Shared tier on a Redis-compatible server (requires the redis package)"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int):
+        await self.client.set(key, value, ex=ttl_seconds)
+
+    async def get_generation(self) -> int:
+        return int(await self.client.get(GENERATION_KEY) or 0)
+
+    async def bump_generation(self) -> int:
+        return await self.client.incr(GENERATION_KEY)
+
+    async def close(self):
+        await self.client.close()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def cache_key(route: str, params: Dict[str, Any], generation: int) -> str:
+    """Stable key for a route call (parameter order does not matter)"""
+    normalized = json.dumps(
+        {name: _normalize(value) for name, value in params.items() if name not in UNCACHED_ARGUMENTS},
+        sort_keys=True,
+        default=str
+    )
+    return f"analytics:{generation}:{route}:{normalized}"
+
+
+class AnalyticsCache:
+    """Two-tier LRU/TTL cache with generation-based invalidation"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.local: "OrderedDict[str, tuple]" = OrderedDict()
+        self.shared: Optional[RedisCacheBackend] = None
+        self.generation = 0
+        self.metrics = {
+            "localHits": 0,
+            "sharedHits": 0,
+            "misses": 0,
+            "expired": 0,
+            "invalidations": 0,
+            "sharedErrors": 0,
+        }
+        self.hit_age_total = 0.0
+        self.hit_age_max = 0.0
+
+    async def connect(self):
+        """Startup hook: attach the shared tier if configured"""
+        if not settings.analytics_cache_redis_url:
+            return
+        try:
+            self.shared = RedisCacheBackend(settings.analytics_cache_redis_url)
+            self.generation = await self.shared.get_generation()
+            print("[OK] Analytics cache shared tier connected")
+        except ImportError:
+            print("[WARN] ANALYTICS_CACHE_REDIS_URL is set but the redis package is not installed; using the local tier only")
+            self.shared = None
+        except Exception as e:
+            print(f"[WARN] Analytics cache shared tier unavailable ({e}); using the local tier only")
+            self.shared = None
+
+    async def close(self):
+        if self.shared:
+            await self.shared.close()
+            self.shared = None
+
+    async def _current_generation(self) -> int:
+        if self.shared:
+            try:
+                self.generation = max(self.generation, await self.shared.get_generation())
+            except Exception:
+                self.metrics["sharedErrors"] += 1
+        return self.generation
+
+    async def invalidate(self):
+        """Called after every registration write"""
+        self.generation += 1
+        self.metrics["invalidations"] += 1
+        # Entries of older generations can never be read again
+        self.local.clear()
+        if self.shared:
+            try:
+                self.generation = max(self.generation, await self.shared.bump_generation())
+            except Exception:
+                self.metrics["sharedErrors"] += 1
+
+    def _record_hit(self, tier: str, stored_at: float):
+        self.metrics[tier] += 1
+        age = self.clock() - stored_at
+        self.hit_age_total += age
+        self.hit_age_max = max(self.hit_age_max, age)
+
+    def _store_local(self, key: str, stored_at: float, value: Any):
+        self.local[key] = (stored_at, value)
+        self.local.move_to_end(key)
+        while len(self.local) > settings.analytics_cache_max_entries:
+            self.local.popitem(last=False)
+
+    async def get_or_compute(self, route: str, params: Dict[str, Any], compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached response for the route call, computing it on a miss"""
+        ttl = settings.analytics_cache_ttl_seconds
+        key = cache_key(route, params, await self._current_generation())
+        now = self.clock()
+
+        entry = self.local.get(key)
+        if entry:
+            stored_at, value = entry
+            if now - stored_at < ttl:
+                self.local.move_to_end(key)
+                self._record_hit("localHits", stored_at)
+                return value
+            del self.local[key]
+            self.metrics["expired"] += 1
+
+        if self.shared:
+            try:
+                payload = await self.shared.get(key)
+                if payload:
+                    shared_entry = json.loads(payload)
+                    self._store_local(key, shared_entry["storedAt"], shared_entry["value"])
+                    self._record_hit("sharedHits", shared_entry["storedAt"])
+                    return shared_entry["value"]
+            except Exception:
+                self.metrics["sharedErrors"] += 1
+
+        self.metrics["misses"] += 1
+        value = await compute()
+        self._store_local(key, now, value)
+
+        if self.shared:
+            try:
+                await self.shared.set(key, json.dumps({"storedAt": now, "value": value}, default=str), ttl)
+            except Exception:
+                self.metrics["sharedErrors"] += 1
+
+        return value
+
+    def stats(self) -> Dict:
+        """Hit ratio and staleness of served entries"""
+        hits = self.metrics["localHits"] + self.metrics["sharedHits"]
+        lookups = hits + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hitRatio": round(hits / lookups, 4) if lookups else 0,
+            "generation": self.generation,
+            "localEntries": len(self.local),
+            "sharedTier": self.shared is not None,
+            "ttlSeconds": settings.analytics_cache_ttl_seconds,
+            "staleness": {
+                "avgAgeSeconds": round(self.hit_age_total / hits, 3) if hits else 0,
+                "maxAgeSeconds": round(self.hit_age_max, 3),
+            },
+        }
+
+
+# Singleton instance
+analytics_cache = AnalyticsCache()
+
+
+def cached_analytics(route: str):
+    """
+    Cache a route's response in analytics_cache, keyed by its arguments.
+    functools.wraps keeps the signature, so FastAPI still sees the parameters.
+    The route runs under registration_changes.reads_after(), after the
+    generation (and the ETag's counter) was read, so its analytics reads
+    include every write those reflect.
+    """
+    def decorate(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            async def compute():
+                async with registration_changes.reads_after():
+                    return await endpoint(**kwargs)
+
+            if not settings.analytics_cache_enabled:
+                return await compute()
+            return await analytics_cache.get_or_compute(route, kwargs, compute)
+        return wrapper
+    return decorate
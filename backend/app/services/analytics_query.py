@@ -0,0 +1,173 @@
+"""
+Dimensional analytics over registrations.
+
+A query names the dimensions to group by, the metrics to compute and some
+filters; it compiles to a single $match/$group/$sort pipeline on
+registrations. The $match always leads with an indexed field (status,
+location or employer, then enrollmentDate; see db/indexes.py).
+
+Date dimensions are bucketed with $dateToString in BUSINESS_TIMEZONE.
+
+Results come back as one record per group and, when a pivot dimension is
+given, also as a matrix: one row per combination of the other dimensions and
+one column per value of the pivot dimension.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..utils.money import to_float
+from ..utils.timezone import business_timezone_name
+
+# Upper bound on groups returned by one query
+MAX_QUERY_GROUPS = 5000
+
+UNKNOWN = "Unknown"
+
+# Date granularities (formats for $dateToString); at most one per query
+DATE_DIMENSIONS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+
+CHILD_COUNT = {"$max": [1, {"$size": {"$ifNull": ["$children", []]}}]}
+
+DIMENSIONS = {
+    **DATE_DIMENSIONS,
+    "location": {"$ifNull": ["$location", UNKNOWN]},
+    "employer": {"$ifNull": ["$employer", UNKNOWN]},
+    "campType": {"$ifNull": ["$campType", UNKNOWN]},
+    "status": "$status",
+    "children": CHILD_COUNT,
+}
+
+METRICS = {
+    "registrations": {"$sum": 1},
+    "children": {"$sum": CHILD_COUNT},
+    "campDays": {"$sum": {"$size": {"$ifNull": ["$campDates", []]}}},
+    "revenue": {"$sum": "$totalCost"},
+    "paid": {"$sum": "$amountPaid"},
+    "outstanding": {"$sum": {"$subtract": ["$totalCost", "$amountPaid"]}},
+}
+
+MONEY_METRICS = {"revenue", "paid", "outstanding"}
+
+DEFAULT_METRICS = ["registrations", "revenue"]
+
+
+def parse_names(value: Optional[str], allowed: Dict, kind: str) -> List[str]:
+    """Split a comma-separated list and check every name is allowed (400 otherwise)"""
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {kind}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail=f"Duplicate {kind}")
+    return names
+
+
+def check_name_collisions(dimensions: List[str], metrics: List[str]):
+    """Records hold dimensions and metrics side by side, so a name can only be one of them"""
+    shared = [name for name in dimensions if name in metrics]
+    if shared:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{', '.join(shared)} cannot be both a dimension and a metric in one query"
+        )
+
+
+def build_match(
+    start_date: datetime,
+    end_before: datetime,
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    employer: Optional[str] = None,
+    camp_type: Optional[str] = None
+) -> Dict:
+    match = {}
+    if status:
+        match["status"] = status
+    if location:
+        match["location"] = location
+    if employer:
+        match["employer"] = employer
+    if camp_type:
+        match["campType"] = camp_type
+    match["enrollmentDate"] = {"$gte": start_date, "$lt": end_before}
+    return match
+
+
+def dimension_expression(dimension: str):
+    if dimension in DATE_DIMENSIONS:
+        # Bucketed in the database, by the business-local calendar
+        return {"$dateToString": {
+            "format": DATE_DIMENSIONS[dimension],
+            "date": "$enrollmentDate",
+            "timezone": business_timezone_name()
+        }}
+    return DIMENSIONS[dimension]
+
+
+def build_pipeline(match: Dict, dimensions: List[str], metrics: List[str]) -> List[Dict]:
+    group = {"_id": {dimension: dimension_expression(dimension) for dimension in dimensions} or None}
+    group.update({metric: METRICS[metric] for metric in metrics})
+    return [
+        {"$match": match},
+        {"$group": group},
+        {"$sort": {f"_id.{dimension}": 1 for dimension in dimensions} or {"_id": 1}},
+        {"$limit": MAX_QUERY_GROUPS + 1},
+    ]
+
+
+def format_groups(groups: List[Dict], dimensions: List[str], metrics: List[str]) -> List[Dict]:
+    """One flat record per group: dimension values then metric values"""
+    records = []
+    for group in groups:
+        record = dict(group["_id"] or {})
+        for metric in metrics:
+            value = group.get(metric)
+            record[metric] = to_float(value) if metric in MONEY_METRICS else (value or 0)
+        records.append(record)
+    return records
+
+
+def totals_of(records: List[Dict], metrics: List[str]) -> Dict:
+    totals = {}
+    for metric in metrics:
+        total = sum(record[metric] for record in records)
+        totals[metric] = round(total, 2) if metric in MONEY_METRICS else total
+    return totals
+
+
+def pivot_records(records: List[Dict], dimensions: List[str], metrics: List[str], pivot: str) -> Dict:
+    """
+    Matrix form of the records: rows are the distinct combinations of the
+    non-pivot dimensions (in result order), columns the values of the pivot
+    dimension (sorted); values[metric][row][column], 0 where a cell is empty.
+    """
+    row_dimensions = [dimension for dimension in dimensions if dimension != pivot]
+    rows: Dict[tuple, int] = {}
+    columns = sorted({record[pivot] for record in records}, key=lambda value: (value is None, value))
+    column_index = {value: i for i, value in enumerate(columns)}
+
+    for record in records:
+        rows.setdefault(tuple(record[dimension] for dimension in row_dimensions), len(rows))
+    values = {metric: [[0] * len(columns) for _ in rows] for metric in metrics}
+    for record in records:
+        row = rows[tuple(record[dimension] for dimension in row_dimensions)]
+        for metric in metrics:
+            values[metric][row][column_index[record[pivot]]] = record[metric]
+
+    return {
+        "rowDimensions": row_dimensions,
+        "columnDimension": pivot,
+        "rows": [list(key) for key in rows],
+        "columns": columns,
+        "values": values,
+    }
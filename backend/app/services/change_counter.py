@@ -0,0 +1,58 @@
+"""
+Per-collection change counters.
+
+A counter document in the _counters collection is incremented on every write
+to the collection it tracks. Reading it is a single _id lookup, so readers can
+cheaply tell whether anything changed since a response was built (see
+utils/etag.py).
+
+Analytics reads may be served by secondaries. reads_after() ties them to the
+counter: it is read from the primary in a causally consistent session, and
+analytics_sessions() opened inside wait for that point (afterClusterTime), so
+a response is never older than the counter value (or the cache generation,
+bumped after it on every write) it is labelled with.
+"""
+
+from contextlib import asynccontextmanager
+
+from ..db.mongodb import analytics_read_anchor, get_database
+
+
+class ChangeCounter:
+    """Monotonic version number of one collection"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def current(self, session=None) -> int:
+        counter = await get_database()._counters.find_one({"_id": self.name}, {"version": 1}, session=session)
+        return counter["version"] if counter else 0
+
+    @asynccontextmanager
+    async def reads_after(self):
+        """Analytics reads in this context see every write counted so far"""
+        db = get_database()
+        async with await db.client.start_session(causal_consistency=True) as session:
+            await self.current(session=session)
+            # No operation time on a standalone server: reads there are already current
+            anchor = (session.cluster_time, session.operation_time) if session.operation_time else None
+        token = analytics_read_anchor.set(anchor)
+        try:
+            yield
+        finally:
+            analytics_read_anchor.reset(token)
+
+    async def bump(self):
+        try:
+            await get_database()._counters.update_one(
+                {"_id": self.name},
+                {"$inc": {"version": 1}},
+                upsert=True
+            )
+        except Exception as e:
+            # A missed bump only means clients may revalidate against an old ETag
+            print(f"[WARN] Failed to bump {self.name} change counter: {e}")
+
+
+# Singleton instance
+registration_changes = ChangeCounter("registrations")
@@ -0,0 +1,262 @@
+"""
+Materialized per-day rollups of registrations.
+
+The daily_stats collection has one document per (date, campType, location)
+with counters that the analytics routes read instead of scanning
+registrations:
+
+- campDays: enrolled registrations with a camp day on the date (capacity)
+- enrollments, revenue, paid: enrolled registrations by enrollment date
+- cancellations, lostRevenue: cancelled registrations by cancellation date
+
+date is a day label: camp days as stored, enrollment and cancellation
+timestamps by their day in BUSINESS_TIMEZONE (see utils/timezone.py).
+
+Every registration write calls apply_change(before, after); the difference
+between the two snapshots is applied with atomic $inc upserts. rebuild()
+recomputes the collection in place when it drifts, without losing the $inc
+made while it runs. Until the collection is first built, aggregate_rollups()
+computes the same rows from registrations.
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from ..db.mongodb import get_database
+from ..models.registration import RegistrationStatus
+from ..utils.money import to_decimal, to_decimal128
+from ..utils.timezone import business_timezone_name, day_start_utc, local_day
+from .rollup_rebuild import rebuild_in_place
+
+# Migration that first fills the collection; analytics read registrations until it is applied
+BUILD_MIGRATION = 6
+
+# How often an unbuilt collection is checked again
+BUILT_CHECK_SECONDS = 10
+
+COUNTER_FIELDS = ("campDays", "enrollments", "revenue", "paid", "cancellations", "lostRevenue")
+MONEY_COUNTERS = ("revenue", "paid", "lostRevenue")
+
+# Registration fields that affect the rollups
+STATS_SOURCE_FIELDS = (
+    "status", "campDates", "campType", "location",
+    "enrollmentDate", "cancellationDate", "totalCost", "amountPaid",
+)
+
+StatsKey = Tuple[datetime, str, str]
+
+
+def day_of(value: datetime) -> datetime:
+    """Naive midnight label of value's day (aware values are taken in UTC, as Mongo stores them)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def registration_contributions(registration: Optional[Dict]) -> Dict[StatsKey, Dict[str, Decimal]]:
+    """Counters a single registration adds to daily_stats"""
+    contributions = defaultdict(lambda: defaultdict(Decimal))
+    if not registration:
+        return contributions
+
+    camp_type = registration.get("campType") or "Unknown"
+    location = registration.get("location") or "Unknown"
+    cost = to_decimal(registration.get("totalCost")) or Decimal(0)
+    paid = to_decimal(registration.get("amountPaid")) or Decimal(0)
+    status = registration.get("status")
+
+    if status == RegistrationStatus.ENROLLED.value:
+        for camp_date in registration.get("campDates") or []:
+            contributions[(day_of(camp_date), camp_type, location)]["campDays"] += 1
+        if registration.get("enrollmentDate"):
+            counters = contributions[(local_day(registration["enrollmentDate"]), camp_type, location)]
+            counters["enrollments"] += 1
+            counters["revenue"] += cost
+            counters["paid"] += paid
+    elif status == RegistrationStatus.CANCELLED.value and registration.get("cancellationDate"):
+        counters = contributions[(local_day(registration["cancellationDate"]), camp_type, location)]
+        counters["cancellations"] += 1
+        counters["lostRevenue"] += cost - paid
+
+    return contributions
+
+
+def _local_day_label(field: str) -> Dict:
+    """Aggregation expression: day label of an instant field's business-local day"""
+    local = {"date": f"${field}", "timezone": business_timezone_name()}
+    return {"$dateFromParts": {
+        "year": {"$year": local},
+        "month": {"$month": local},
+        "day": {"$dayOfMonth": local}
+    }}
+
+
+def registration_rows(counter: str, start: datetime, end: datetime) -> List[Dict]:
+    """
+    Pipeline on registrations producing, for start..end, one daily_stats-shaped
+    row per contribution to counter (campDays, enrollments or cancellations).
+    Same rules as registration_contributions, evaluated in the database.
+    """
+    first_day, after_last_day = day_of(start), day_of(end) + timedelta(days=1)
+    dimensions = {
+        "_id": 0,
+        "campType": {"$ifNull": ["$campType", "Unknown"]},
+        "location": {"$ifNull": ["$location", "Unknown"]},
+    }
+
+    if counter == "campDays":
+        window = {"$gte": first_day, "$lt": after_last_day}
+        return [
+            {"$match": {"status": RegistrationStatus.ENROLLED.value, "campDates": {"$elemMatch": window}}},
+            {"$project": {"campDates": 1, "campType": 1, "location": 1}},
+            {"$unwind": "$campDates"},
+            {"$match": {"campDates": window}},
+            {"$project": {**dimensions, "date": {"$dateTrunc": {"date": "$campDates", "unit": "day"}}, "campDays": {"$literal": 1}}},
+        ]
+
+    # Instants: the window is the business-local days, converted to UTC
+    window = {"$gte": day_start_utc(first_day.date()), "$lt": day_start_utc(after_last_day.date())}
+    if counter == "enrollments":
+        return [
+            {"$match": {"status": RegistrationStatus.ENROLLED.value, "enrollmentDate": window}},
+            {"$project": {
+                **dimensions,
+                "date": _local_day_label("enrollmentDate"),
+                "enrollments": {"$literal": 1},
+                "revenue": {"$ifNull": ["$totalCost", 0]},
+                "paid": {"$ifNull": ["$amountPaid", 0]},
+            }},
+        ]
+    if counter == "cancellations":
+        return [
+            {"$match": {"status": RegistrationStatus.CANCELLED.value, "cancellationDate": window}},
+            {"$project": {
+                **dimensions,
+                "date": _local_day_label("cancellationDate"),
+                "cancellations": {"$literal": 1},
+                "lostRevenue": {"$subtract": [{"$ifNull": ["$totalCost", 0]}, {"$ifNull": ["$amountPaid", 0]}]},
+            }},
+        ]
+    raise ValueError(f"Unknown rollup counter: {counter}")
+
+
+def _counters_to_bson(counters: Dict[str, Decimal]) -> Dict:
+    return {
+        field: to_decimal128(value) if field in MONEY_COUNTERS else int(value)
+        for field, value in counters.items()
+    }
+
+
+class DailyStats:
+    """Keeps daily_stats in step with registration writes"""
+
+    def __init__(self):
+        self.built = False
+        self.checked_at = float("-inf")
+
+    async def apply_change(self, before: Optional[Dict], after: Optional[Dict]):
+        """
+        Apply the difference between two snapshots of a registration.
+        Pass before=None for inserts and after=None for hard deletes.
+        """
+        deltas = defaultdict(lambda: defaultdict(Decimal))
+        for key, counters in registration_contributions(after).items():
+            for field, value in counters.items():
+                deltas[key][field] += value
+        for key, counters in registration_contributions(before).items():
+            for field, value in counters.items():
+                deltas[key][field] -= value
+
+        operations = []
+        for (date, camp_type, location), counters in deltas.items():
+            changed = {field: value for field, value in counters.items() if value}
+            if not changed:
+                continue
+            operations.append(UpdateOne(
+                {"date": date, "campType": camp_type, "location": location},
+                {"$inc": {**_counters_to_bson(changed), "version": 1}},
+                upsert=True
+            ))
+
+        if not operations:
+            return
+
+        try:
+            await get_database().daily_stats.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The registration write already succeeded; a rebuild repairs the drift
+            print(f"[WARN] daily_stats update failed ({e}); run python -m scripts.rebuild_daily_stats")
+
+    async def rebuild(self, db: Optional[AsyncIOMotorDatabase] = None) -> int:
+        """
+        Recompute daily_stats from all registrations, in place and without
+        losing updates made meanwhile (see services/rollup_rebuild.py).
+
+        Returns:
+            Number of daily_stats documents corrected
+        """
+        db = db or get_database()
+
+        async def compute():
+            totals = defaultdict(lambda: defaultdict(Decimal))
+            cursor = db.registrations.find({}, {field: 1 for field in STATS_SOURCE_FIELDS}).batch_size(1000)
+            async for registration in cursor:
+                for key, counters in registration_contributions(registration).items():
+                    for field, value in counters.items():
+                        totals[key][field] += value
+            return {
+                key: _counters_to_bson({field: counters.get(field, Decimal(0)) for field in COUNTER_FIELDS})
+                for key, counters in totals.items()
+            }
+
+        zero = _counters_to_bson({field: Decimal(0) for field in COUNTER_FIELDS})
+        return await rebuild_in_place(db.daily_stats, ("date", "campType", "location"), compute, zero)
+
+    async def is_built(self) -> bool:
+        """
+        True once migration BUILD_MIGRATION has filled the rollups. Checked
+        at most every BUILT_CHECK_SECONDS until then, never again after.
+        """
+        if self.built:
+            return True
+        if time.monotonic() - self.checked_at >= BUILT_CHECK_SECONDS:
+            self.checked_at = time.monotonic()
+            self.built = await get_database()._migrations.find_one({"_id": BUILD_MIGRATION}, {"_id": 1}) is not None
+        return self.built
+
+    async def aggregate_rollups(
+        self,
+        db: AsyncIOMotorDatabase,
+        counters: Tuple[str, ...],
+        start: datetime,
+        end: datetime,
+        stages: List[Dict],
+        **options
+    ) -> List[Dict]:
+        """
+        Run stages over the daily_stats documents of start..end (inclusive
+        days) that have any of the given counters (campDays, enrollments,
+        cancellations). Until the rollups are built the same documents are
+        computed from registrations, so routes never read a half-built
+        collection.
+        """
+        if await self.is_built():
+            present = [{counter: {"$gt": 0}} for counter in counters]
+            match = {"date": {"$gte": day_of(start), "$lte": day_of(end)}}
+            match.update(present[0] if len(present) == 1 else {"$or": present})
+            return await db.daily_stats.aggregate([{"$match": match}, *stages], **options).to_list(length=None)
+
+        pipelines = [registration_rows(counter, start, end) for counter in counters]
+        for other in pipelines[1:]:
+            pipelines[0].append({"$unionWith": {"coll": "registrations", "pipeline": other}})
+        return await db.registrations.aggregate([*pipelines[0], *stages], **options).to_list(length=None)
+
+
+# Singleton instance
+daily_stats = DailyStats()
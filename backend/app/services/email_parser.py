@@ -11,11 +11,16 @@ from ..utils.parser_patterns import (
     PATTERNS,
     parse_date,
     extract_all_dates,
+    extract_cancelled_dates,
     parse_phone,
     parse_care_dates,
     extract_hours_from_dates
 )
 from ..models.registration import RegistrationStatus
+from ..utils.timezone import day_start_utc
+
+# Revenue per child per day of care
+DAILY_RATE = 100
 
 
 class EmailParser:
@@ -94,7 +99,8 @@ class EmailParser:
         
         # Extract all care dates
         camp_dates = extract_all_dates(email_text)
-        enrollment_date = camp_dates[0] if camp_dates else (email_date or datetime.utcnow())
+        # enrollmentDate is an instant; a camp day stands for its local midnight
+        enrollment_date = day_start_utc(camp_dates[0].date()) if camp_dates else (email_date or datetime.utcnow())
         
         # Extract ALL children
         children = self.extract_all_children(email_text)
@@ -113,7 +119,13 @@ class EmailParser:
         # Calculate revenue: $100 per day per child
         num_children = len(children) if children else 1
         num_days = len(camp_dates) if camp_dates else 1
-        total_cost = num_children * num_days * 100  # $100 per day per child
+        total_cost = num_children * num_days * DAILY_RATE
+        
+        # Days this email cancels. Per-day "Cancelled" lines make it a partial
+        # cancellation; otherwise a cancellation covers every listed date.
+        cancelled_dates = []
+        if status == RegistrationStatus.CANCELLED:
+            cancelled_dates = extract_cancelled_dates(email_text) or list(camp_dates)
         
         registration_id = care_request or f"BH-{int(datetime.utcnow().timestamp())}"
         
@@ -132,6 +144,8 @@ class EmailParser:
             "totalCost": total_cost,
             "amountPaid": total_cost if status == RegistrationStatus.ENROLLED else 0,
             "registrationId": registration_id,
+            "careRequestNumber": care_request,
+            "cancelledDates": cancelled_dates,
             "employer": employer,
             "location": location,
         }
@@ -0,0 +1,228 @@
+"""
+In-memory occupancy engine.
+
+Occupancy (children on site) is kept in a NumPy matrix of int32 counters with
+one row per calendar day and one column per (campType, location) group. An
+enrolled registration adds one child per entry of `children` (at least one)
+to each of its camp days. Range sums, rolling windows, weekly peaks and
+threshold queries are vectorized slices over that matrix.
+
+The matrix is built from MongoDB on first use, updated in place by
+registration writes in this process (see services/registration_writes.py) and
+rebuilt in the background every OCCUPANCY_REFRESH_SECONDS, which also picks
+up writes made by other replicas. A build reads after the change counter
+(so a lagging secondary still includes every write made before it started),
+and registrations written while it runs are replaced by their latest state
+before the new matrix is swapped in.
+"""
+
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..config import get_settings
+from ..db.mongodb import analytics_sessions, get_analytics_database
+from ..models.registration import RegistrationStatus
+from .change_counter import registration_changes
+
+settings = get_settings()
+
+GroupKey = Tuple[str, str]
+
+# Extra days allocated when the matrix grows, so growth is rare
+GROWTH_MARGIN_DAYS = 90
+
+OCCUPANCY_SOURCE_FIELDS = ("status", "campDates", "children", "campType", "location")
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def registration_occupancy(registration: Optional[Dict]) -> List[Tuple[date, GroupKey, int]]:
+    """(day, group, children) entries a registration contributes"""
+    if not registration or registration.get("status") != RegistrationStatus.ENROLLED.value:
+        return []
+    group = (registration.get("campType") or "Unknown", registration.get("location") or "Unknown")
+    seats = max(1, len(registration.get("children") or []))
+    return [(_as_date(day), group, seats) for day in registration.get("campDates") or []]
+
+
+class OccupancyMatrix:
+    """Day × group counters with automatic growth"""
+
+    def __init__(self):
+        self.origin: Optional[date] = None
+        self.counts = np.zeros((0, 0), dtype=np.int32)
+        self.groups: Dict[GroupKey, int] = {}
+        self.camp_types = np.array([], dtype=object)
+        self.locations = np.array([], dtype=object)
+
+    def _group_column(self, group: GroupKey) -> int:
+        column = self.groups.get(group)
+        if column is None:
+            column = len(self.groups)
+            self.groups[group] = column
+            self.counts = np.pad(self.counts, ((0, 0), (0, 1)))
+            self.camp_types = np.append(self.camp_types, group[0])
+            self.locations = np.append(self.locations, group[1])
+        return column
+
+    def _day_row(self, day: date) -> int:
+        if self.origin is None:
+            self.origin = day - timedelta(days=GROWTH_MARGIN_DAYS)
+            self.counts = np.zeros((2 * GROWTH_MARGIN_DAYS, len(self.groups)), dtype=np.int32)
+        row = (day - self.origin).days
+        if row < 0:
+            grow = -row + GROWTH_MARGIN_DAYS
+            self.counts = np.pad(self.counts, ((grow, 0), (0, 0)))
+            self.origin -= timedelta(days=grow)
+            row += grow
+        elif row >= self.counts.shape[0]:
+            self.counts = np.pad(self.counts, ((0, row - self.counts.shape[0] + 1 + GROWTH_MARGIN_DAYS), (0, 0)))
+        return row
+
+    def add(self, entries: List[Tuple[date, GroupKey, int]], sign: int = 1):
+        for day, group, seats in entries:
+            # Resolve both indexes first: either call may reallocate counts
+            column = self._group_column(group)
+            row = self._day_row(day)
+            self.counts[row, column] += sign * seats
+
+    def column_mask(self, camp_type: Optional[str] = None, location: Optional[str] = None) -> np.ndarray:
+        mask = np.ones(len(self.groups), dtype=bool)
+        if camp_type:
+            mask &= self.camp_types == camp_type
+        if location:
+            mask &= self.locations == location
+        return mask
+
+    def daily_totals(self, start: date, end: date, mask: np.ndarray) -> np.ndarray:
+        """Children per day for start..end inclusive (zeros outside the stored range)"""
+        days = (end - start).days + 1
+        totals = np.zeros(max(days, 0), dtype=np.int64)
+        if self.origin is None or days <= 0:
+            return totals
+        first = (start - self.origin).days
+        lo, hi = max(first, 0), min(first + days, self.counts.shape[0])
+        if lo < hi:
+            totals[lo - first:hi - first] = self.counts[lo:hi][:, mask].sum(axis=1)
+        return totals
+
+
+class OccupancyEngine:
+    """Shared occupancy matrix with lazy build and periodic refresh"""
+
+    def __init__(self):
+        self.matrix: Optional[OccupancyMatrix] = None
+        self.built_at = 0.0
+        self.lock = asyncio.Lock()
+        self.refresh_task: Optional[asyncio.Task] = None
+        # Latest state of each registration written while a build runs
+        self.pending: Optional[Dict] = None
+
+    async def build(self, db: Optional[AsyncIOMotorDatabase] = None):
+        """Rebuild the matrix from MongoDB and swap it in, without losing concurrent writes"""
+        db = db or get_analytics_database()
+        matrix = OccupancyMatrix()
+        counted: Dict = {}
+        self.pending = pending = {}
+        try:
+            async with registration_changes.reads_after():
+                async with analytics_sessions() as [session]:
+                    cursor = db.registrations.find(
+                        {"status": RegistrationStatus.ENROLLED.value},
+                        {field: 1 for field in OCCUPANCY_SOURCE_FIELDS},
+                        session=session
+                    ).batch_size(1000)
+                    async for registration in cursor:
+                        counted[registration["_id"]] = registration_occupancy(registration)
+                        matrix.add(counted[registration["_id"]])
+            # The scan may have read these before or after their write
+            for registration_id, latest in pending.items():
+                matrix.add(counted.get(registration_id, []), sign=-1)
+                matrix.add(registration_occupancy(latest))
+            self.matrix = matrix
+            self.built_at = time.time()
+        finally:
+            self.pending = None
+
+    async def _refresh(self):
+        try:
+            await self.build()
+        except Exception as e:
+            print(f"[WARN] Occupancy rebuild failed: {e}")
+
+    async def ready(self) -> OccupancyMatrix:
+        """Return the current matrix, building it on first use"""
+        if self.matrix is None:
+            async with self.lock:
+                if self.matrix is None:
+                    await self.build()
+        elif time.time() - self.built_at > settings.occupancy_refresh_seconds:
+            if self.refresh_task is None or self.refresh_task.done():
+                # Serve the current matrix while the new one is built
+                self.built_at = time.time()
+                self.refresh_task = asyncio.create_task(self._refresh())
+        return self.matrix
+
+    def apply_change(self, before: Optional[Dict], after: Optional[Dict]):
+        """Apply a registration write in place (only recorded for a build in flight until the first one ends)"""
+        registration_id = (after or before or {}).get("_id")
+        if self.pending is not None and registration_id is not None:
+            self.pending[registration_id] = after
+        if self.matrix is None:
+            return
+        self.matrix.add(registration_occupancy(before), sign=-1)
+        self.matrix.add(registration_occupancy(after))
+
+    async def daily(self, start: date, end: date, camp_type: Optional[str] = None, location: Optional[str] = None) -> np.ndarray:
+        matrix = await self.ready()
+        return matrix.daily_totals(start, end, matrix.column_mask(camp_type, location))
+
+    async def rolling_average(self, start: date, end: date, window: int, camp_type: Optional[str] = None, location: Optional[str] = None) -> np.ndarray:
+        """Trailing `window`-day average ending on each day of start..end"""
+        totals = await self.daily(start - timedelta(days=window - 1), end, camp_type, location)
+        return np.convolve(totals, np.ones(window), mode="valid") / window
+
+    async def weekly_peaks(self, start: date, end: date, camp_type: Optional[str] = None, location: Optional[str] = None) -> List[Tuple[date, int]]:
+        """Peak children on a single day for each Monday-based week"""
+        totals = await self.daily(start, end, camp_type, location)
+        if not totals.size:
+            return []
+        week_ids = (np.arange(totals.size) + start.weekday()) // 7
+        week_starts = np.concatenate(([0], np.flatnonzero(np.diff(week_ids)) + 1))
+        peaks = np.maximum.reduceat(totals, week_starts)
+        weeks = []
+        for offset, peak in zip(week_starts, peaks):
+            day = start + timedelta(days=int(offset))
+            weeks.append((day - timedelta(days=day.weekday()), int(peak)))
+        return weeks
+
+    async def by_weekday(self, start: date, end: date, camp_type: Optional[str] = None, location: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Average, peak and total children per weekday (index 0 = Monday)"""
+        totals = await self.daily(start, end, camp_type, location)
+        weekdays = (np.arange(totals.size) + start.weekday()) % 7
+        days = np.bincount(weekdays, minlength=7)
+        total = np.bincount(weekdays, weights=totals, minlength=7)
+        peak = np.zeros(7, dtype=np.int64)
+        np.maximum.at(peak, weekdays, totals)
+        average = np.divide(total, days, out=np.zeros(7), where=days > 0)
+        return {"average": average, "peak": peak, "total": total}
+
+    async def days_over(self, start: date, end: date, threshold: int, camp_type: Optional[str] = None, location: Optional[str] = None) -> List[Tuple[date, int]]:
+        """Days with more than `threshold` children"""
+        totals = await self.daily(start, end, camp_type, location)
+        over = np.flatnonzero(totals > threshold)
+        return [(start + timedelta(days=int(offset)), int(totals[offset])) for offset in over]
+
+    def groups(self) -> List[GroupKey]:
+        return list(self.matrix.groups) if self.matrix else []
+
+
+# Singleton instance
+occupancy_engine = OccupancyEngine()
@@ -0,0 +1,157 @@
+"""
+Period-over-period comparison over the daily_stats rollups.
+
+Several named date ranges are resolved in one aggregation: the rollups of the
+union of the ranges are read once and a $facet computes each range's totals,
+so N ranges cost one pass over the rollups. Deltas and growth rates are computed
+against a baseline range.
+
+Ranges are either presets relative to today in BUSINESS_TIMEZONE (see
+PRESETS) or custom "name:YYYY-MM-DD..YYYY-MM-DD" entries; both ends are
+inclusive days.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .daily_stats import day_of
+from ..utils.money import to_float
+
+# Upper bound on ranges in one request
+MAX_COMPARE_RANGES = 12
+
+DateRange = Tuple[datetime, datetime]
+
+
+def _month_start(day: datetime, months_back: int = 0) -> datetime:
+    month = day.month - 1 - months_back
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def _year_ago(day: datetime) -> datetime:
+    # Feb 29 maps to Feb 28
+    return day.replace(year=day.year - 1, day=min(day.day, 28) if day.month == 2 else day.day)
+
+
+PRESETS: Dict[str, Callable[[datetime], DateRange]] = {
+    "last_7_days": lambda today: (today - timedelta(days=6), today),
+    "previous_7_days": lambda today: (today - timedelta(days=13), today - timedelta(days=7)),
+    "last_30_days": lambda today: (today - timedelta(days=29), today),
+    "previous_30_days": lambda today: (today - timedelta(days=59), today - timedelta(days=30)),
+    "this_month": lambda today: (_month_start(today), today),
+    "last_month": lambda today: (_month_start(today, 1), _month_start(today) - timedelta(days=1)),
+    "this_month_last_year": lambda today: (_year_ago(_month_start(today)), _year_ago(today)),
+    "this_year": lambda today: (today.replace(month=1, day=1), today),
+    "last_year": lambda today: (today.replace(year=today.year - 1, month=1, day=1), today.replace(month=1, day=1) - timedelta(days=1)),
+    "last_year_to_date": lambda today: (today.replace(year=today.year - 1, month=1, day=1), _year_ago(today)),
+}
+
+# Totals computed for every range
+COMPARISON_GROUP = {
+    "_id": None,
+    "revenue": {"$sum": "$revenue"},
+    "paid": {"$sum": "$paid"},
+    "outstanding": {"$sum": {"$subtract": ["$revenue", "$paid"]}},
+    "enrollments": {"$sum": "$enrollments"},
+    "cancellations": {"$sum": "$cancellations"},
+    "lostRevenue": {"$sum": "$lostRevenue"},
+}
+
+MONEY_METRICS = ("revenue", "paid", "outstanding", "lostRevenue")
+COUNT_METRICS = ("enrollments", "cancellations")
+
+
+def parse_ranges(value: str, today: datetime) -> Dict[str, DateRange]:
+    """
+    Resolve a comma-separated list of presets and name:start..end entries,
+    keeping the request order. Raises 400 on anything it cannot parse.
+    """
+    ranges = {}
+    for entry in (part.strip() for part in (value or "").split(",")):
+        if not entry:
+            continue
+        if ":" in entry:
+            name, _, span = entry.partition(":")
+            start, separator, end = span.partition("..")
+            try:
+                if not separator:
+                    raise ValueError
+                resolved = (datetime.strptime(start, "%Y-%m-%d"), datetime.strptime(end, "%Y-%m-%d"))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid range '{entry}'. Use name:YYYY-MM-DD..YYYY-MM-DD")
+        elif entry in PRESETS:
+            name, resolved = entry, PRESETS[entry](today)
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown range '{entry}'. Presets: {', '.join(PRESETS)}, or name:YYYY-MM-DD..YYYY-MM-DD"
+            )
+        if not name or name in ranges:
+            raise HTTPException(status_code=400, detail=f"Range names must be unique and non-empty ('{entry}')")
+        if resolved[0] > resolved[1]:
+            raise HTTPException(status_code=400, detail=f"Range '{name}' ends before it starts")
+        ranges[name] = resolved
+
+    if not ranges:
+        raise HTTPException(status_code=400, detail="Give at least one range")
+    if len(ranges) > MAX_COMPARE_RANGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARE_RANGES} ranges per request")
+    return ranges
+
+
+def covering_range(ranges: Dict[str, DateRange]) -> DateRange:
+    """First and last day of the union of the ranges"""
+    return min(start for start, _ in ranges.values()), max(end for _, end in ranges.values())
+
+
+def build_comparison_stages(ranges: Dict[str, DateRange]) -> List[Dict]:
+    """
+    Stages run over the rollups of covering_range(ranges): one $facet branch
+    per range
+    """
+    return [
+        {"$facet": {
+            # Facet names cannot contain "." or start with "$", so branches are numbered
+            f"r{i}": [
+                {"$match": {"date": {"$gte": day_of(start), "$lte": day_of(end)}}},
+                {"$group": COMPARISON_GROUP}
+            ]
+            for i, (start, end) in enumerate(ranges.values())
+        }},
+    ]
+
+
+def range_totals(facets: Dict, ranges: Dict[str, DateRange]) -> Dict[str, Dict]:
+    totals = {}
+    for i, name in enumerate(ranges):
+        group = facets[f"r{i}"][0] if facets[f"r{i}"] else {}
+        values = {metric: to_float(group.get(metric)) or 0 for metric in MONEY_METRICS}
+        values.update({metric: group.get(metric, 0) for metric in COUNT_METRICS})
+        totals[name] = values
+    return totals
+
+
+def growth_rate(value: float, baseline: float) -> Optional[float]:
+    """Percent change from baseline; None when the baseline is zero"""
+    if not baseline:
+        return None
+    return round((value - baseline) / abs(baseline) * 100, 1)
+
+
+def compare_to_baseline(totals: Dict[str, Dict], baseline: str) -> Dict[str, Dict]:
+    """Per range (other than the baseline): delta and growth of every metric"""
+    base = totals[baseline]
+    comparisons = {}
+    for name, values in totals.items():
+        if name == baseline:
+            continue
+        comparisons[name] = {
+            metric: {
+                "delta": round(value - base[metric], 2),
+                "growth": growth_rate(value, base[metric])
+            }
+            for metric, value in values.items()
+        }
+    return comparisons
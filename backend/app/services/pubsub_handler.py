@@ -4,14 +4,23 @@ Service to handle Gmail Pub/Sub notifications and process emails.
 
 import base64
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from decimal import Decimal
 from bson import ObjectId
 
 from .gmail_service import gmail_service
-from .email_parser import parse_bright_horizon_email
+from .email_parser import parse_bright_horizon_email, DAILY_RATE
+from .registration_sources import registration_source_store
+from .registration_search import build_search_keys
+from .registration_writes import registration_written
+from .seat_counters import seat_counters
 from ..db.mongodb import get_database
 from ..models.registration import RegistrationStatus
+from ..utils.money import to_decimal, to_decimal128, to_float, MONEY_FIELDS
+
+# Attempts at a conditional cancellation write before giving up
+CANCELLATION_RETRIES = 5
 
 
 class PubSubHandler:
@@ -72,8 +81,11 @@ class PubSubHandler:
         db = get_database()
         
         try:
-            # Check if already processed
-            existing = await db.registrations.find_one({'emailId': message_id})
+            # Check if already processed (as a new registration or as a cancellation
+            # applied to an existing one)
+            existing = await db.registrations.find_one({
+                '$or': [{'emailId': message_id}, {'cancellationEmailIds': message_id}]
+            })
             if existing:
                 print(f"[SKIP] Email {message_id} already processed")
                 return None
@@ -97,10 +109,30 @@ class PubSubHandler:
                 await self._store_unparsed_email(message_id, email_data)
                 return None
             
+            # Cancellations are applied to the enrollment they refer to
+            care_request = parsed_data.get('careRequestNumber')
+            if parsed_data['status'] == RegistrationStatus.CANCELLED and care_request:
+                reconciled = await self._apply_cancellation(
+                    care_request,
+                    parsed_data.get('cancelledDates') or parsed_data['campDates'],
+                    message_id
+                )
+                if reconciled:
+                    await registration_source_store.save(
+                        reconciled['_id'], message_id, email_data['body'], email_data['date']
+                    )
+                    reconciled.pop('rawEmailBody', None)
+                    reconciled['_id'] = str(reconciled['_id'])
+                    self._money_to_float(reconciled)
+                    print(f"[OK] Applied cancellation {message_id} to {care_request} -> {reconciled['status']}")
+                    return reconciled
+            
             # Create registration document with all children
+            is_cancellation = parsed_data['status'] == RegistrationStatus.CANCELLED
             num_children = len(parsed_data.get('children', []))
             registration_doc = {
                 'registrationId': f"BH-{message_id[:8]}-{int(datetime.utcnow().timestamp())}",
+                'careRequestNumber': care_request,
                 'status': parsed_data['status'].value,
                 'enrollmentDate': parsed_data['enrollmentDate'],
                 'cancellationDate': parsed_data.get('cancellationDate'),
@@ -114,20 +146,52 @@ class PubSubHandler:
                 'location': parsed_data.get('location'),
                 'campDates': parsed_data['campDates'],
                 'campType': parsed_data.get('campType'),
-                'totalCost': parsed_data.get('totalCost'),
-                'amountPaid': parsed_data.get('amountPaid'),
+                'totalCost': to_decimal128(parsed_data.get('totalCost')),
+                'amountPaid': to_decimal128(parsed_data.get('amountPaid')),
                 'emailId': message_id,
                 'emailReceivedAt': email_data['date'],
                 'parsedAt': datetime.utcnow(),
-                'rawEmailBody': email_data['body'],
                 'manualEntry': False,
                 'createdBy': None,
                 'updatedAt': datetime.utcnow()
             }
             
+            if is_cancellation:
+                # No enrollment to apply it to (yet): kept as a standalone record
+                # until its enrollment arrives, and subtracted from net revenue
+                registration_doc['cancelledDates'] = parsed_data.get('cancelledDates') or parsed_data['campDates']
+                registration_doc['unmatchedCancellation'] = True
+                pending = []
+            else:
+                # Emails are not always processed in order (the reprocess scripts
+                # go newest first), so its cancellations may already be stored
+                pending = await self._merge_pending_cancellations(registration_doc)
+            
+            registration_doc.update(build_search_keys(registration_doc))
+            
+            # The booking has already been made with Bright Horizons, so capacity
+            # limits only flag it for staff instead of rejecting it
+            over_capacity = await seat_counters.reserve(None, registration_doc, enforce=False)
+            if over_capacity:
+                registration_doc['overCapacityDates'] = over_capacity
+                print(f"[WARN] Email {message_id} books past capacity on {len(over_capacity)} day(s)")
+            
             # Insert into database
-            result = await db.registrations.insert_one(registration_doc)
+            try:
+                result = await db.registrations.insert_one(registration_doc)
+            except Exception:
+                await seat_counters.undo(None, registration_doc)
+                raise
+            await registration_written(None, registration_doc)
+            for cancellation in pending:
+                await self._remove_merged_cancellation(cancellation, result.inserted_id)
             registration_doc['_id'] = str(result.inserted_id)
+            self._money_to_float(registration_doc)
+            
+            # Raw body is kept out of the registrations collection
+            await registration_source_store.save(
+                result.inserted_id, message_id, email_data['body'], email_data['date']
+            )
             
             child_info = f"{num_children} children" if num_children > 1 else parsed_data['childName']
             print(f"[OK] Successfully processed email {message_id} -> {registration_doc['registrationId']} ({child_info})")
@@ -138,6 +202,145 @@ class PubSubHandler:
             print(f"[ERROR] Error processing email {message_id}: {e}")
             return None
     
+    def _money_to_float(self, registration: Dict):
+        """Make a returned registration JSON-serializable (Decimal128 -> float)"""
+        for field in MONEY_FIELDS:
+            if field in registration:
+                registration[field] = to_float(registration[field])
+    
+    async def _apply_cancellation(self, care_request: str, cancelled_dates: list, message_id: str) -> Optional[Dict]:
+        """
+        Apply a cancellation email to the enrollment with the same care request number.
+        
+        Cancelled days are removed from campDates and the cost is recomputed at the
+        daily rate. If no days remain the enrollment itself becomes cancelled.
+        The write is conditional on updatedAt being unchanged since the read, so
+        concurrent emails cannot interleave; a lost race is retried on fresh data.
+        
+        Returns:
+            Updated registration document, or None if no enrollment matches
+        """
+        db = get_database()
+        
+        for _ in range(CANCELLATION_RETRIES):
+            # Prefer the live enrollment over one that is already cancelled
+            current = await db.registrations.find_one(
+                {'careRequestNumber': care_request, 'unmatchedCancellation': {'$ne': True}},
+                {'rawEmailBody': 0},
+                sort=[('status', -1), ('enrollmentDate', 1)]
+            )
+            if not current:
+                return None
+            
+            changes = self._cancellation_changes(current, cancelled_dates, message_id)
+            result = await db.registrations.update_one(
+                {'_id': current['_id'], 'updatedAt': current.get('updatedAt')},
+                {'$set': changes}
+            )
+            if result.matched_count:
+                updated = {**current, **changes}
+                await registration_written(current, updated)
+                return updated
+        
+        print(f"[WARN] Cancellation {message_id} for {care_request} kept losing to concurrent updates")
+        return None
+    
+    async def _merge_pending_cancellations(self, registration_doc: Dict) -> List[Dict]:
+        """
+        Apply standalone cancellations stored before this enrollment arrived to
+        the document about to be inserted, oldest first.
+        
+        Returns:
+            The merged cancellation records (removed once the insert succeeds)
+        """
+        care_request = registration_doc.get('careRequestNumber')
+        if not care_request:
+            return []
+        
+        db = get_database()
+        pending = await db.registrations.find(
+            {'careRequestNumber': care_request, 'unmatchedCancellation': True},
+            {'rawEmailBody': 0}
+        ).sort('emailReceivedAt', 1).to_list(length=None)
+        
+        for cancellation in pending:
+            registration_doc.update(self._cancellation_changes(
+                registration_doc,
+                cancellation.get('cancelledDates') or cancellation.get('campDates') or [],
+                cancellation['emailId']
+            ))
+        return pending
+    
+    async def _remove_merged_cancellation(self, cancellation: Dict, registration_id: ObjectId):
+        """Delete a standalone cancellation now applied to registration_id and move its source email"""
+        db = get_database()
+        
+        result = await db.registrations.delete_one({'_id': cancellation['_id'], 'unmatchedCancellation': True})
+        if result.deleted_count:
+            await registration_source_store.reassign(cancellation['_id'], registration_id)
+            await registration_written(cancellation, None)
+    
+    async def reconcile_cancellations(self) -> Dict[str, int]:
+        """
+        Apply every standalone cancellation that now has an enrollment with the
+        same care request number (used by the backfill migration).
+        
+        Returns:
+            Counts of merged and still unmatched cancellation records
+        """
+        db = get_database()
+        merged = unmatched = 0
+        
+        cursor = db.registrations.find(
+            {'unmatchedCancellation': True, 'careRequestNumber': {'$ne': None}},
+            {'rawEmailBody': 0}
+        ).sort('emailReceivedAt', 1)
+        async for cancellation in cursor:
+            reconciled = await self._apply_cancellation(
+                cancellation['careRequestNumber'],
+                cancellation.get('cancelledDates') or cancellation.get('campDates') or [],
+                cancellation['emailId']
+            )
+            if reconciled:
+                await self._remove_merged_cancellation(cancellation, reconciled['_id'])
+                merged += 1
+            else:
+                unmatched += 1
+        return {'merged': merged, 'unmatched': unmatched}
+    
+    def _cancellation_changes(self, registration: Dict, cancelled_dates: list, message_id: str) -> Dict:
+        """Fields to $set on an enrollment when some of its days are cancelled"""
+        now = datetime.utcnow()
+        cancelled = set(cancelled_dates)
+        camp_dates = registration.get('campDates') or []
+        remaining = [day for day in camp_dates if day not in cancelled]
+        
+        changes = {
+            'cancelledDates': sorted(
+                set(registration.get('cancelledDates') or []) | (set(camp_dates) & cancelled)
+            ),
+            'cancellationEmailIds': sorted(set(registration.get('cancellationEmailIds') or []) | {message_id}),
+            'updatedAt': now
+        }
+        
+        if not remaining:
+            changes.update({
+                'status': RegistrationStatus.CANCELLED.value,
+                'cancellationDate': now,
+                'amountPaid': to_decimal128(0)
+            })
+            return changes
+        
+        seats = max(1, len(registration.get('children') or []))
+        remaining_cost = Decimal(len(remaining) * seats * DAILY_RATE)
+        paid = to_decimal(registration.get('amountPaid'))
+        changes.update({
+            'campDates': remaining,
+            'totalCost': to_decimal128(remaining_cost),
+            'amountPaid': to_decimal128(remaining_cost if paid is None else min(paid, remaining_cost))
+        })
+        return changes
+    
     async def _store_unparsed_email(self, message_id: str, email_data: Dict):
         """Store unparsed emails for manual review"""
         db = get_database()
@@ -0,0 +1,177 @@
+"""
+Live registration change events for Server-Sent Events clients.
+
+A single change stream on the registrations collection is shared by every
+connected client: each change is reduced to a compact delta (registration id,
+kind of change, affected camp days) and fanned out to one bounded queue per
+subscriber. A subscriber that falls behind has its queue replaced by a single
+"resync" event, telling it to refetch everything, so a slow client never
+holds back the others or grows memory.
+
+The stream is opened when the first client subscribes and closed when the
+last one leaves; while it is open, subscribers receive a "ready" event (on
+subscribing, or as soon as it opens). A stream that fails is reopened with
+exponential backoff. Change streams need a replica set (a single-node replica
+set is enough locally); when they are unsupported the hub reports itself
+unavailable and tries again after the backoff.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ..config import get_settings
+from ..db.mongodb import get_database
+from ..models.registration import RegistrationStatus
+
+settings = get_settings()
+
+# Server error returned when change streams are not supported (standalone mongod)
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+# Only the fields needed to build a delta leave the server
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "fullDocument.status": 1,
+        "fullDocument.campDates": 1,
+        "fullDocument.cancelledDates": 1,
+        "updateDescription.updatedFields": 1,
+    }},
+]
+
+# Longest wait between attempts to (re)open the change stream
+MAX_REOPEN_SECONDS = 300
+
+RESYNC_EVENT = {"type": "resync"}
+
+READY_EVENT = {"type": "ready"}
+
+
+def _day_keys(dates) -> List[str]:
+    return sorted({day.strftime("%Y-%m-%d") for day in dates or []})
+
+
+def change_to_event(change: Dict) -> Dict:
+    """Reduce a change stream document to a compact delta"""
+    operation = change["operationType"]
+    registration_id = str(change["documentKey"]["_id"])
+
+    if operation == "delete":
+        return {"type": "deleted", "id": registration_id}
+
+    document = change.get("fullDocument") or {}
+    updated_fields = (change.get("updateDescription") or {}).get("updatedFields") or {}
+    dates = _day_keys((document.get("campDates") or []) + (document.get("cancelledDates") or []))
+
+    if operation == "insert":
+        kind = "created"
+    elif (
+        updated_fields.get("status") == RegistrationStatus.CANCELLED.value
+        or "cancelledDates" in updated_fields
+    ):
+        kind = "cancelled"
+    else:
+        kind = "updated"
+
+    event = {"type": kind, "id": registration_id, "dates": dates}
+    if document.get("status"):
+        event["status"] = document["status"]
+    if updated_fields:
+        # Field names only; clients refetch the values they display
+        event["fields"] = sorted({name.split(".")[0] for name in updated_fields})
+    return event
+
+
+class RegistrationEventHub:
+    """One shared change stream, many bounded subscriber queues"""
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.available = True
+        self.streaming = False
+        # While unavailable: when to try again, and the wait after that
+        self.retry_at = 0.0
+        self.unavailable_backoff = settings.events_reconnect_seconds
+
+    def is_available(self) -> bool:
+        """False while change streams are known to be unsupported, until the next retry is due"""
+        return self.available or time.monotonic() >= self.retry_at
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.events_queue_size)
+        self.subscribers.add(queue)
+        if self.streaming:
+            queue.put_nowait(READY_EVENT)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task:
+            self.task.cancel()
+            self.task = None
+
+    def publish(self, event: Dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for deltas to be useful: collapse to one resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+
+    async def _watch(self):
+        resume_token = None
+        delay = settings.events_reconnect_seconds
+        try:
+            while self.subscribers:
+                try:
+                    async with get_database().registrations.watch(
+                        CHANGE_STREAM_PIPELINE,
+                        full_document="updateLookup",
+                        resume_after=resume_token
+                    ) as stream:
+                        self.available = True
+                        self.streaming = True
+                        self.unavailable_backoff = delay = settings.events_reconnect_seconds
+                        self.publish(READY_EVENT)
+                        async for change in stream:
+                            resume_token = stream.resume_token
+                            self.publish(change_to_event(change))
+                except asyncio.CancelledError:
+                    raise
+                except OperationFailure as e:
+                    if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                        print(f"[WARN] Change streams need a replica set; live events are disabled for {self.unavailable_backoff}s")
+                        self.available = False
+                        self.retry_at = time.monotonic() + self.unavailable_backoff
+                        self.unavailable_backoff = min(self.unavailable_backoff * 2, MAX_REOPEN_SECONDS)
+                        self.publish({"type": "unavailable"})
+                        return
+                    print(f"[WARN] Registration change stream failed ({e}); reopening in {delay}s")
+                    resume_token = None
+                    self.publish(RESYNC_EVENT)
+                except PyMongoError as e:
+                    print(f"[WARN] Registration change stream interrupted ({e}); resuming in {delay}s")
+                self.streaming = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_REOPEN_SECONDS)
+        finally:
+            self.streaming = False
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+
+# Singleton instance
+registration_events = RegistrationEventHub()
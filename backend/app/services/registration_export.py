@@ -0,0 +1,195 @@
+"""
+Streaming encoders for registration exports (CSV, NDJSON, Parquet).
+
+Each encoder consumes an async iterator of batches (lists of flat row dicts)
+and yields bytes, so only one batch is in memory at a time whatever the size
+of the export. Parquet writes one row group per batch and needs the optional
+pyarrow package.
+
+CSV and NDJSON are read by people and spreadsheets: instants are written in
+BUSINESS_TIMEZONE with their UTC offset, day labels (campDates, ...) as plain
+dates and amounts as numbers. Parquet keeps typed UTC timestamps.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Dict, List
+
+from bson.decimal128 import Decimal128
+from fastapi import HTTPException
+
+from ..utils.money import to_float
+from ..utils.timezone import business_time
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Column types for Parquet; other columns are strings
+DATETIME_COLUMNS = {"enrollmentDate", "cancellationDate", "emailReceivedAt", "parsedAt", "updatedAt"}
+DATETIME_LIST_COLUMNS = {"campDates", "cancelledDates", "overCapacityDates"}
+STRING_LIST_COLUMNS = {"children"}
+FLOAT_COLUMNS = {"totalCost", "amountPaid"}
+INT_COLUMNS = {"childAge"}
+BOOL_COLUMNS = {"manualEntry"}
+
+Batches = AsyncIterator[List[Dict]]
+
+
+def _text_value(column: str, value):
+    """A row value as CSV / NDJSON write it"""
+    if isinstance(value, Decimal128):
+        return to_float(value)
+    if isinstance(value, datetime):
+        if column in DATETIME_LIST_COLUMNS:
+            return value.date().isoformat()
+        return business_time(value).isoformat()
+    if isinstance(value, list):
+        return [_text_value(column, item) for item in value]
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    return value
+
+
+async def encode_csv(batches: Batches, columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in batches:
+        for row in rows:
+            writer.writerow([_csv_value(_text_value(column, row.get(column))) for column in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_ndjson(batches: Batches, columns: List[str]) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        yield "".join(
+            json.dumps({column: _text_value(column, row.get(column)) for column in columns}, default=str) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands its bytes out in chunks while keeping tell() absolute"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema(columns: List[str]):
+    import pyarrow as pa
+
+    def column_type(column):
+        if column in DATETIME_COLUMNS:
+            return pa.timestamp("ms")
+        if column in DATETIME_LIST_COLUMNS:
+            return pa.list_(pa.timestamp("ms"))
+        if column in STRING_LIST_COLUMNS:
+            return pa.list_(pa.string())
+        if column in FLOAT_COLUMNS:
+            return pa.float64()
+        if column in INT_COLUMNS:
+            return pa.int64()
+        if column in BOOL_COLUMNS:
+            return pa.bool_()
+        return pa.string()
+
+    return pa.schema([(column, column_type(column)) for column in columns])
+
+
+async def encode_parquet(batches: Batches, columns: List[str]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in batches:
+            table = pa.Table.from_pydict(
+                {column: [row.get(column) for row in rows] for column in columns},
+                schema=schema
+            )
+            writer.write_table(table, row_group_size=len(rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    ExportFormat.CSV: encode_csv,
+    ExportFormat.NDJSON: encode_ndjson,
+    ExportFormat.PARQUET: encode_parquet,
+}
+
+
+def check_format_available(export_format: ExportFormat):
+    if export_format is ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export needs the pyarrow package on the server")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_export(batches: Batches, columns: List[str], export_format: ExportFormat, gzip: bool) -> AsyncIterator[bytes]:
+    """Byte stream of an export; only non-empty chunks are emitted"""
+    async def non_empty(chunks):
+        async for chunk in chunks:
+            if chunk:
+                yield chunk
+
+    chunks = ENCODERS[export_format](batches, columns)
+    if gzip:
+        chunks = gzip_chunks(chunks)
+    return non_empty(chunks)
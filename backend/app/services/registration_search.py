@@ -0,0 +1,189 @@
+"""
+Indexed search over child names, parent names and parent emails.
+
+Each registration stores two arrays of normalized search keys (case-folded,
+accents removed): childSearchKeys for childName/children and parentSearchKeys
+for parentName/parentEmail. Both are indexed, and every query term becomes an
+anchored (prefix) regex, so lookups are index range scans instead of
+collection scans. Matches are scored and sorted by the server before the
+limit is applied, exact word matches first, so the best results are never cut.
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+from ..db.mongodb import get_database
+from ..utils.query_budget import max_time
+
+# Fields whose values feed the search keys
+CHILD_FIELDS = ("childName", "children")
+PARENT_FIELDS = ("parentName", "parentEmail")
+SEARCH_SOURCE_FIELDS = CHILD_FIELDS + PARENT_FIELDS
+
+# Key fields and their ranking weight
+SEARCH_KEY_WEIGHTS = {"childSearchKeys": 2.0, "parentSearchKeys": 1.0}
+
+# Computed relevance, removed from the results
+SCORE_FIELD = "_searchScore"
+
+
+def normalize_text(value: str) -> str:
+    """Case-fold and strip accents ("José" -> "jose")"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold().strip()
+
+
+def _word_keys(value: str) -> Set[str]:
+    """Whole words plus their alphanumeric pieces ("webber-nechifor" -> webber-nechifor, webber, nechifor)"""
+    keys = set()
+    for word in normalize_text(value).split():
+        keys.add(word)
+        keys.update(piece for piece in re.split(r"[\W_]+", word) if piece)
+    return keys
+
+
+def _email_keys(email: str) -> Set[str]:
+    email = normalize_text(email)
+    local, _, domain = email.partition("@")
+    keys = {email, local} | _word_keys(local.replace(".", " "))
+    if domain:
+        keys.add(domain)
+    return {key for key in keys if key}
+
+
+def build_search_keys(registration: Dict) -> Dict[str, List[str]]:
+    """Compute the search key fields for a registration document"""
+    child_keys = set()
+    if registration.get("childName"):
+        child_keys |= _word_keys(registration["childName"])
+    for child in registration.get("children") or []:
+        child_keys |= _word_keys(child)
+
+    parent_keys = set()
+    if registration.get("parentName"):
+        parent_keys |= _word_keys(registration["parentName"])
+    if registration.get("parentEmail"):
+        parent_keys |= _email_keys(registration["parentEmail"])
+
+    return {
+        "childSearchKeys": sorted(child_keys),
+        "parentSearchKeys": sorted(parent_keys),
+    }
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a user query into normalized terms"""
+    return normalize_text(query).split()
+
+
+def search_filter(terms: List[str], key_field: str) -> Dict:
+    """Every term must prefix-match one of the keys; user input is escaped"""
+    return {key_field: {"$all": [re.compile("^" + re.escape(term)) for term in terms]}}
+
+
+def _key_score(term: str, key_field: str) -> Dict:
+    """Best score of one term against the keys of one field"""
+    weight = SEARCH_KEY_WEIGHTS[key_field]
+    return {"$max": {"$map": {
+        "input": {"$ifNull": ["$" + key_field, []]},
+        "as": "key",
+        "in": {"$switch": {
+            "branches": [
+                {"case": {"$eq": ["$$key", term]}, "then": 2 * weight},
+                {
+                    "case": {"$eq": [{"$substrCP": ["$$key", 0, len(term)]}, term]},
+                    # Shorter keys are closer to the typed term
+                    "then": {"$multiply": [
+                        weight / 2,
+                        {"$add": [1, {"$divide": [len(term), {"$strLenCP": "$$key"}]}]}
+                    ]}
+                },
+            ],
+            "default": 0
+        }}
+    }}}
+
+
+def email_prefix_filter(email: str) -> Dict:
+    """
+    Registrations whose parent email starts with email. The anchored key
+    prefix is the indexed part; the parentEmail check only drops parent name
+    words that share the prefix, on the documents the index returned.
+    """
+    prefix = normalize_text(email)
+    return {
+        "parentSearchKeys": re.compile("^" + re.escape(prefix)),
+        "parentEmail": re.compile("^" + re.escape(prefix), re.IGNORECASE),
+    }
+
+
+def score_expression(terms: List[str], key_fields: List[str]) -> Dict:
+    """
+    Relevance of a registration: per term, its best match in any key field.
+    Exact word matches score above prefix matches; child matches above parent matches.
+    """
+    return {"$add": [
+        {"$ifNull": [{"$max": [_key_score(term, key_field) for key_field in key_fields]}, 0]}
+        for term in terms
+    ]}
+
+
+class RegistrationSearch:
+    """Ranked prefix search over registrations"""
+
+    async def search(
+        self,
+        query: str,
+        key_fields: Optional[List[str]] = None,
+        projection: Optional[Dict] = None,
+        extra_filter: Optional[Dict] = None,
+        limit: int = 20,
+        max_time_ms: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Find registrations matching every term of the query.
+
+        Args:
+            query: Free-text query (names or email fragments)
+            key_fields: Which key fields to search (defaults to child and parent)
+            projection: Mongo projection for the returned documents
+            extra_filter: Additional filter ANDed with the search
+            limit: Maximum number of ranked results
+            max_time_ms: Server-side time budget for the search (maxTimeMS)
+
+        Returns:
+            Registration documents, best match first
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        key_fields = key_fields or list(SEARCH_KEY_WEIGHTS)
+        db = get_database()
+
+        # One indexed branch per key field
+        branches = [search_filter(terms, key_field) for key_field in key_fields]
+        mongo_filter = branches[0] if len(branches) == 1 else {"$or": branches}
+        if extra_filter:
+            mongo_filter = {"$and": [mongo_filter, extra_filter]}
+
+        # $sort followed by $limit keeps only the top `limit` documents in memory
+        pipeline = [
+            {"$match": mongo_filter},
+            {"$addFields": {SCORE_FIELD: score_expression(terms, key_fields)}},
+            {"$sort": {SCORE_FIELD: -1, "enrollmentDate": -1, "_id": -1}},
+            {"$limit": limit},
+            {"$unset": SCORE_FIELD},
+        ]
+        if projection:
+            pipeline.append({"$project": projection})
+
+        return await db.registrations.aggregate(
+            pipeline, **max_time(max_time_ms or 0)
+        ).to_list(length=limit)
+
+
+# Singleton instance
+registration_search = RegistrationSearch()
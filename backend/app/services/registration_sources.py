@@ -0,0 +1,90 @@
+"""
+Storage for the raw email bodies behind registrations.
+
+Bodies live in the registration_sources collection (one document per email,
+keyed by Gmail message ID) so the registrations collection only holds the
+fields the dashboard reads.
+"""
+
+import zlib
+from typing import Dict, List, Optional
+from datetime import datetime
+from bson import Binary, ObjectId
+
+from ..config import get_settings
+from ..db.mongodb import get_database
+
+settings = get_settings()
+
+
+class RegistrationSourceStore:
+    """Read/write raw email bodies for registrations"""
+
+    def _encode(self, body: str) -> Dict:
+        if settings.raw_email_compression:
+            return {'body': Binary(zlib.compress(body.encode('utf-8'))), 'compression': 'zlib'}
+        return {'body': body, 'compression': None}
+
+    def _decode(self, source: Dict) -> str:
+        body = source.get('body')
+        if source.get('compression') == 'zlib':
+            return zlib.decompress(body).decode('utf-8')
+        return body
+
+    async def save(
+        self,
+        registration_id: ObjectId,
+        email_id: str,
+        body: str,
+        received_at: Optional[datetime] = None
+    ):
+        """Store (or replace) the raw body of an email that created or changed a registration"""
+        db = get_database()
+
+        await db.registration_sources.replace_one(
+            {'_id': email_id},
+            {
+                'registration': registration_id,
+                'receivedAt': received_at,
+                'storedAt': datetime.utcnow(),
+                **self._encode(body)
+            },
+            upsert=True
+        )
+
+    async def get(self, email_id: str) -> Optional[str]:
+        """Return the raw body of one email, or None if it was never stored"""
+        db = get_database()
+
+        source = await db.registration_sources.find_one({'_id': email_id})
+        return self._decode(source) if source else None
+
+    async def reassign(self, from_registration: ObjectId, to_registration: ObjectId):
+        """Point the source emails of one registration at another (after a merge)"""
+        db = get_database()
+
+        await db.registration_sources.update_many(
+            {'registration': from_registration},
+            {'$set': {'registration': to_registration}}
+        )
+
+    async def get_for_registration(self, registration_id: ObjectId) -> List[Dict]:
+        """Return every source email of a registration, oldest first"""
+        db = get_database()
+
+        sources = await db.registration_sources.find(
+            {'registration': registration_id}
+        ).sort('receivedAt', 1).to_list(length=100)
+
+        return [
+            {
+                'emailId': source['_id'],
+                'receivedAt': source.get('receivedAt'),
+                'rawEmailBody': self._decode(source)
+            }
+            for source in sources
+        ]
+
+
+# Singleton instance
+registration_source_store = RegistrationSourceStore()
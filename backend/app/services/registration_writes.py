@@ -0,0 +1,31 @@
+"""
+Side effects of a registration write.
+
+Every code path that inserts or modifies a registration calls
+registration_written(before, after) once the write has succeeded.
+"""
+
+from typing import Dict, Optional
+
+from .analytics_cache import analytics_cache
+from .change_counter import registration_changes
+from .daily_stats import daily_stats
+from .occupancy import occupancy_engine
+from .seat_counters import seat_counters
+
+
+async def registration_written(before: Optional[Dict], after: Optional[Dict]):
+    """
+    Release the seats the write gave up (seats it takes are reserved before
+    the write), update the daily_stats rollups and the occupancy matrix, bump
+    the registrations change counter (ETags) and invalidate cached analytics.
+
+    Args:
+        before: Registration before the write (None for inserts)
+        after: Registration after the write (None for hard deletes)
+    """
+    await seat_counters.release(before, after)
+    await daily_stats.apply_change(before, after)
+    occupancy_engine.apply_change(before, after)
+    await registration_changes.bump()
+    await analytics_cache.invalidate()
@@ -0,0 +1,111 @@
+"""
+In-place rebuild of counter collections (daily_stats, seat_counters).
+
+Counters are kept current by atomic $inc upserts issued around registration
+writes, and every $inc also bumps a per-document `version`. A rebuild never
+swaps in a side collection (that would drop the $inc made while it ran).
+Instead it corrects each counter document where it stands:
+
+1. read the current documents and their versions
+2. compute the totals from registrations twice, ROLLUP_REBUILD_SETTLE_SECONDS
+   apart, so writes in flight during the first pass settle
+3. $set the computed values only where both passes agree, and only if the
+   document's version is still the one read in step 1
+
+Keys that changed underneath are left for the next round, so concurrent
+writers are never overwritten.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..config import get_settings
+
+settings = get_settings()
+
+# Rounds before giving up on keys that keep changing
+REBUILD_ROUNDS = 5
+
+# Operations per bulk_write
+REBUILD_BATCH_SIZE = 1000
+
+Totals = Dict[Tuple, Dict]
+
+
+async def _write(collection: AsyncIOMotorCollection, operations: list) -> int:
+    """Apply conditional updates; returns how many of them took effect"""
+    applied = 0
+    for start in range(0, len(operations), REBUILD_BATCH_SIZE):
+        batch = operations[start:start + REBUILD_BATCH_SIZE]
+        try:
+            result = await collection.bulk_write(batch, ordered=False)
+            applied += result.matched_count + result.upserted_count
+        except BulkWriteError as e:
+            # Duplicate keys: a concurrent $inc created the document first
+            applied += e.details.get("nMatched", 0) + e.details.get("nUpserted", 0)
+    return applied
+
+
+async def rebuild_in_place(
+    collection: AsyncIOMotorCollection,
+    key_fields: Tuple[str, ...],
+    compute: Callable[[], Awaitable[Totals]],
+    zero: Dict,
+    settle_seconds: Optional[float] = None
+) -> int:
+    """
+    Make every document of collection match compute(), without losing
+    concurrent $inc.
+
+    Args:
+        collection: Counter collection, unique on key_fields
+        key_fields: Fields identifying a counter document
+        compute: Totals from registrations, {key tuple: {field: value}}
+        zero: Values of a counter no registration contributes to
+        settle_seconds: Pause between the two passes (default ROLLUP_REBUILD_SETTLE_SECONDS)
+
+    Returns:
+        Number of documents corrected
+    """
+    settle = settings.rollup_rebuild_settle_seconds if settle_seconds is None else settle_seconds
+    corrected = 0
+
+    for _ in range(REBUILD_ROUNDS):
+        current = {
+            tuple(document[field] for field in key_fields): document
+            async for document in collection.find({}, {"_id": 0})
+        }
+        first = await compute()
+        await asyncio.sleep(settle)
+        second = await compute()
+
+        operations = []
+        unsettled = 0
+        for key in current.keys() | second.keys():
+            target = second.get(key, zero)
+            if first.get(key, zero) != target:
+                unsettled += 1
+                continue
+            document = current.get(key)
+            if document is not None and all(document.get(field) == value for field, value in target.items()):
+                continue
+            # Documents without a version (new, or from before versions) must
+            # still lack one; $exists rather than null so an upsert can $inc it
+            version = document["version"] if document and "version" in document else {"$exists": False}
+            operations.append(UpdateOne(
+                {**dict(zip(key_fields, key)), "version": version},
+                {"$set": target, "$inc": {"version": 1}},
+                upsert=document is None
+            ))
+
+        applied = await _write(collection, operations)
+        corrected += applied
+        if not unsettled and applied == len(operations):
+            return corrected
+
+    print(f"[WARN] {collection.name} kept changing during the rebuild; some counters were left for the next one")
+    return corrected
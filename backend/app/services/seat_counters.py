@@ -0,0 +1,243 @@
+"""
+Per-day seat counters and capacity limits.
+
+A seat is one child on one camp day: an enrolled registration takes
+max(1, len(children)) seats on each of its campDates. The seat_counters
+collection holds one document per (date, location) plus a "*" document per
+date for the whole site, each with a `seats` count.
+
+Seats are reserved before a registration write with a conditional $inc
+({seats: {$lte: limit - n}}), so concurrent writers can never push a counter
+past its limit: no value is read and written back. Seats freed by a write are
+released after it (see services/registration_writes.py). If the write fails,
+undo() returns the reserved seats.
+
+The conditional upsert needs the unique (location, date) index: without it a
+failed condition inserts a second counter instead of failing. Writers create
+the index themselves before the first counter write (migration 7 may not have
+run yet) and, if that fails, reserve without upserting on a failed condition.
+
+Limits come from CAPACITY_DAILY_LIMIT (whole site) and
+CAPACITY_LOCATION_LIMITS (JSON object of location -> seats); 0 / missing
+means unlimited.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from ..config import get_settings
+from ..db.indexes import SEAT_COUNTER_INDEXES
+from ..db.mongodb import get_database
+from ..models.registration import RegistrationStatus
+from .daily_stats import day_of
+from .rollup_rebuild import rebuild_in_place
+
+settings = get_settings()
+
+ALL_LOCATIONS = "*"
+
+# Registration fields that affect seat counts
+SEAT_SOURCE_FIELDS = ("status", "campDates", "children", "location")
+
+CounterKey = Tuple[datetime, str]
+
+
+class CapacityExceeded(Exception):
+    """A reservation would take a counter past its limit"""
+
+    def __init__(self, days: List[datetime]):
+        self.days = days
+        super().__init__(f"Over capacity on {', '.join(day.strftime('%Y-%m-%d') for day in days)}")
+
+
+def seats_for(registration: Optional[Dict]) -> int:
+    return max(1, len(registration.get("children") or [])) if registration else 0
+
+
+def limit_for(location: str) -> Optional[int]:
+    if location == ALL_LOCATIONS:
+        limit = settings.capacity_daily_limit
+    else:
+        limit = settings.capacity_location_limits.get(location, 0)
+    return limit or None
+
+
+def registration_seats(registration: Optional[Dict]) -> Dict[CounterKey, int]:
+    """Seats a registration holds, per (day, location) and per (day, "*")"""
+    seats = defaultdict(int)
+    if not registration or registration.get("status") != RegistrationStatus.ENROLLED.value:
+        return seats
+    count = seats_for(registration)
+    location = registration.get("location") or "Unknown"
+    for camp_date in registration.get("campDates") or []:
+        # Request bodies carry aware datetimes, stored documents naive UTC ones
+        day = day_of(camp_date)
+        seats[(day, location)] += count
+        seats[(day, ALL_LOCATIONS)] += count
+    return seats
+
+
+def seat_deltas(before: Optional[Dict], after: Optional[Dict]) -> Dict[CounterKey, int]:
+    deltas = defaultdict(int)
+    for key, count in registration_seats(after).items():
+        deltas[key] += count
+    for key, count in registration_seats(before).items():
+        deltas[key] -= count
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+class SeatCounters:
+    """Atomic per-day seat accounting"""
+
+    def __init__(self):
+        self.unique_index = False
+
+    async def _ensure_unique_index(self) -> bool:
+        """Create the unique (location, date) index once per process; False if it cannot be"""
+        if not self.unique_index:
+            try:
+                await get_database().seat_counters.create_indexes(SEAT_COUNTER_INDEXES)
+                self.unique_index = True
+            except Exception as e:
+                print(f"[WARN] Could not create the seat_counters unique index ({e}); reserving without conditional upserts")
+        return self.unique_index
+
+    async def _increment(self, key: CounterKey, seats: int):
+        await self._ensure_unique_index()
+        day, location = key
+        await get_database().seat_counters.update_one(
+            {"date": day, "location": location},
+            {"$inc": {"seats": seats, "version": 1}},
+            upsert=True
+        )
+
+    async def _increment_within_limit(self, key: CounterKey, seats: int, limit: int) -> bool:
+        """$inc only if the counter stays within the limit; False when it would not"""
+        if seats > limit:
+            return False
+        day, location = key
+        conditional = {"date": day, "location": location, "seats": {"$lte": limit - seats}}
+        if not await self._ensure_unique_index():
+            result = await get_database().seat_counters.update_one(conditional, {"$inc": {"seats": seats, "version": 1}})
+            if result.matched_count == 1:
+                return True
+            if await get_database().seat_counters.count_documents({"date": day, "location": location}, limit=1):
+                return False
+            await self._increment(key, seats)
+            return True
+        try:
+            result = await get_database().seat_counters.update_one(conditional, {"$inc": {"seats": seats, "version": 1}}, upsert=True)
+            return True if result.upserted_id else result.matched_count == 1
+        except DuplicateKeyError:
+            # The counter exists, so the upsert only ran because the condition failed,
+            # or a concurrent writer created it first: try again without upsert
+            result = await get_database().seat_counters.update_one(conditional, {"$inc": {"seats": seats, "version": 1}})
+            return result.matched_count == 1
+
+    async def reserve(self, before: Optional[Dict], after: Optional[Dict], enforce: bool) -> List[datetime]:
+        """
+        Take the seats a write adds, before the write happens.
+
+        Args:
+            before: Registration before the write (None for inserts)
+            after: Registration as it will be written
+            enforce: Raise CapacityExceeded (and take nothing) when a limit is hit;
+                otherwise take the seats anyway and report the days
+
+        Returns:
+            Days over capacity (always empty when enforce is True)
+        """
+        applied = []
+        over = set()
+        for key, seats in sorted(seat_deltas(before, after).items()):
+            if seats < 0:
+                continue
+            limit = limit_for(key[1])
+            if limit is None or await self._increment_within_limit(key, seats, limit):
+                applied.append((key, seats))
+                continue
+            if enforce:
+                for applied_key, applied_seats in applied:
+                    await self._increment(applied_key, -applied_seats)
+                raise CapacityExceeded([key[0]])
+            await self._increment(key, seats)
+            applied.append((key, seats))
+            over.add(key[0])
+        return sorted(over)
+
+    async def undo(self, before: Optional[Dict], after: Optional[Dict]):
+        """Return the seats reserved for a write that did not happen"""
+        for key, seats in seat_deltas(before, after).items():
+            if seats > 0:
+                await self._increment(key, -seats)
+
+    async def release(self, before: Optional[Dict], after: Optional[Dict]):
+        """Free the seats a completed write gave up"""
+        for key, seats in seat_deltas(before, after).items():
+            if seats < 0:
+                try:
+                    await self._increment(key, seats)
+                except Exception as e:
+                    print(f"[WARN] Seat counter release failed ({e}); run python -m scripts.rebuild_daily_stats")
+
+    async def usage(
+        self,
+        start: datetime,
+        end: datetime,
+        location: str = ALL_LOCATIONS,
+        max_time_ms: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """Seats, limit and remaining seats per day (YYYY-MM-DD) for start..end"""
+        first_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        counters = await get_database().seat_counters.find(
+            {"location": location, "date": {"$gte": first_day, "$lte": end}},
+            {"date": 1, "seats": 1},
+            max_time_ms=max_time_ms or None
+        ).to_list(length=None)
+        taken = {counter["date"].strftime("%Y-%m-%d"): counter["seats"] for counter in counters}
+
+        limit = limit_for(location)
+        usage = {}
+        day = first_day
+        while day <= end:
+            key = day.strftime("%Y-%m-%d")
+            seats = taken.get(key, 0)
+            usage[key] = {
+                "seats": seats,
+                "limit": limit,
+                "remaining": max(limit - seats, 0) if limit is not None else None,
+                "overCapacity": limit is not None and seats > limit
+            }
+            day += timedelta(days=1)
+        return usage
+
+    async def rebuild(self, db: Optional[AsyncIOMotorDatabase] = None) -> int:
+        """
+        Recompute seat_counters from all registrations, in place and without
+        losing reservations made meanwhile (see services/rollup_rebuild.py).
+
+        Returns:
+            Number of counters corrected
+        """
+        db = db or get_database()
+
+        async def compute():
+            totals = defaultdict(int)
+            cursor = db.registrations.find(
+                {"status": RegistrationStatus.ENROLLED.value},
+                {field: 1 for field in SEAT_SOURCE_FIELDS}
+            ).batch_size(1000)
+            async for registration in cursor:
+                for key, seats in registration_seats(registration).items():
+                    totals[key] += seats
+            return {key: {"seats": seats} for key, seats in totals.items()}
+
+        return await rebuild_in_place(db.seat_counters, ("date", "location"), compute, {"seats": 0})
+
+
+# Singleton instance
+seat_counters = SeatCounters()
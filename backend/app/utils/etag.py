@@ -0,0 +1,59 @@
+"""
+Conditional GET support (ETag / If-None-Match).
+
+ETags are built from the registrations change counter, the request path and
+its query parameters, so they can be checked before the route runs. When the
+client already holds the current version the route is skipped entirely and a
+bodyless 304 is returned.
+"""
+
+import hashlib
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from ..config import get_settings
+from ..services.change_counter import registration_changes
+from .clerk_auth import verify_clerk_token, ClerkUser
+
+settings = get_settings()
+
+
+def make_etag(request: Request, version: int, time_bucket: Optional[int] = None) -> str:
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    source = f"{version}:{time_bucket}:{request.url.path}?{query}"
+    return '"' + hashlib.sha1(source.encode()).hexdigest() + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison (proxies may add W/ when they re-encode)
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_etag(time_dependent: bool = False):
+    """
+    Route dependency that answers 304 when the registrations are unchanged.
+
+    time_dependent routes (analytics windows that default to "now") also
+    change with time, so their ETag rolls over every analytics cache TTL.
+    Runs after authentication, so a 304 is never sent to anonymous callers.
+    """
+    async def check(
+        request: Request,
+        response: Response,
+        current_user: ClerkUser = Depends(verify_clerk_token)
+    ):
+        version = await registration_changes.current()
+        time_bucket = int(time.time() // max(settings.analytics_cache_ttl_seconds, 1)) if time_dependent else None
+        etag = make_etag(request, version, time_bucket)
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
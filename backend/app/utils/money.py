@@ -0,0 +1,39 @@
+"""
+Money conversion helpers.
+
+Amounts are stored as BSON Decimal128 so sums in aggregation pipelines are
+exact. API responses keep returning plain numbers.
+"""
+
+from decimal import Decimal
+from typing import Optional
+from bson.decimal128 import Decimal128
+
+CENTS = Decimal("0.01")
+
+MONEY_FIELDS = ("totalCost", "amountPaid")
+
+
+def to_decimal128(value) -> Optional[Decimal128]:
+    """Convert a number (int, float, Decimal, str) to Decimal128 rounded to cents"""
+    if value is None or isinstance(value, Decimal128):
+        return value
+    return Decimal128(Decimal(str(value)).quantize(CENTS))
+
+
+def to_float(value) -> Optional[float]:
+    """Convert a stored amount (Decimal128 or legacy number) to float for JSON"""
+    if value is None:
+        return None
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    return float(value)
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    """Convert a stored amount (Decimal128 or legacy number) to Decimal for arithmetic"""
+    if value is None:
+        return None
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    return Decimal(str(value))
@@ -110,6 +110,20 @@ def extract_all_dates(email_text: str) -> List[datetime]:
     return dates
 
 
+def extract_cancelled_dates(email_text: str) -> List[datetime]:
+    """Extract the care dates marked as Cancelled in the detailed format"""
+    dates = []
+    
+    for date_str, _, _, _, status in parse_care_dates(email_text):
+        if status != "Cancelled":
+            continue
+        parsed = parse_date(date_str)
+        if parsed and parsed not in dates:
+            dates.append(parsed)
+    
+    return dates
+
+
 def parse_phone(phone_str: str) -> str:
     """Clean up phone number string"""
     if not phone_str:
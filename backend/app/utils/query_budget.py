@@ -0,0 +1,36 @@
+"""
+Per-route time budgets for MongoDB queries.
+
+Routes pass their budget to the server as maxTimeMS, so an oversized query is
+aborted by MongoDB instead of holding a pooled connection for everyone else.
+Budgets are settings (REGISTRATIONS_MAX_TIME_MS, ANALYTICS_MAX_TIME_MS, ...);
+0 disables one. An aborted query raises pymongo's ExecutionTimeout, which the
+handler below turns into a 504 that says so explicitly.
+"""
+
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pymongo.errors import ExecutionTimeout
+
+
+def max_time(budget_ms: int) -> Dict:
+    """maxTimeMS option for aggregate() and count_documents() ({} when unlimited)"""
+    return {"maxTimeMS": budget_ms} if budget_ms else {}
+
+
+def cursor_max_time(budget_ms: int) -> Optional[int]:
+    """max_time_ms argument for find() and find_one() (None when unlimited)"""
+    return budget_ms or None
+
+
+async def query_timeout_handler(request: Request, exc: ExecutionTimeout) -> JSONResponse:
+    print(f"[WARN] Query over its time budget on {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=504,
+        content={
+            "detail": "The query took longer than its time budget; narrow the date range or filters",
+            "timedOut": True
+        }
+    )
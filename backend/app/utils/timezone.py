@@ -0,0 +1,72 @@
+"""
+Business timezone helpers.
+
+Two kinds of datetimes are stored:
+
+- Instants (enrollmentDate, cancellationDate, updatedAt, ...) are naive UTC.
+  Their calendar day is the day in BUSINESS_TIMEZONE.
+- Day labels (campDates, daily_stats.date, seat_counters.date) are naive
+  midnights naming a calendar day; they are never shifted.
+
+Aggregations bucket instants with {"$dateToString": {..., "timezone": ...}}
+so grouping stays in the database, and range filters on instants convert
+local day boundaries to UTC first.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from ..config import get_settings
+
+
+@lru_cache()
+def business_tz() -> ZoneInfo:
+    return ZoneInfo(get_settings().business_timezone)
+
+
+def business_timezone_name() -> str:
+    """Olson name for the timezone option of MongoDB date operators"""
+    return get_settings().business_timezone
+
+
+def _as_utc(instant: datetime) -> datetime:
+    if instant.tzinfo is None:
+        return instant.replace(tzinfo=timezone.utc)
+    return instant.astimezone(timezone.utc)
+
+
+def business_time(instant: datetime) -> datetime:
+    """Aware datetime of an instant in the business timezone"""
+    return _as_utc(instant).astimezone(business_tz())
+
+
+def local_day(instant: datetime) -> datetime:
+    """Day label (naive midnight) of the business-local day an instant falls on"""
+    return datetime.combine(business_time(instant).date(), time.min)
+
+
+def local_today() -> datetime:
+    """Day label of today in the business timezone"""
+    return local_day(datetime.utcnow())
+
+
+def day_start_utc(day: date) -> datetime:
+    """Naive UTC instant at which a business-local day starts"""
+    local_midnight = datetime.combine(day, time.min, tzinfo=business_tz())
+    return local_midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def day_bounds_utc(day: date) -> tuple:
+    """(start, end) naive UTC instants of a business-local day, end inclusive"""
+    return day_start_utc(day), day_start_utc(day + timedelta(days=1)) - timedelta(microseconds=1)
+
+
+def to_utc(value: datetime) -> datetime:
+    """
+    Naive UTC instant for a query parameter. Aware values are converted;
+    naive values (e.g. ?start_date=2026-07-01) are business-local wall time.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=business_tz())
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -24,6 +24,9 @@ async def clear_and_reprocess():
     print("[INFO] Clearing database...")
     r1 = await db.registrations.delete_many({})
     r2 = await db.unparsed_emails.delete_many({})
+    # Rollups are rebuilt by the reprocessed inserts
+    await db.daily_stats.delete_many({})
+    await db.seat_counters.delete_many({})
     print(f"[OK] Deleted {r1.deleted_count} registrations, {r2.deleted_count} unparsed emails\n")
     
     # Fetch all message IDs
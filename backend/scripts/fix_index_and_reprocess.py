@@ -1,5 +1,8 @@
 """
-Drop unique index on emailId and reprocess.
+Clear registrations and reprocess all emails.
+
+Indexes (including the unique emailId index, one registration per email)
+are owned by app/db/migrations.py and are no longer changed here.
 """
 
 import asyncio
@@ -12,28 +15,18 @@ settings = get_settings()
 
 
 async def fix_and_reprocess():
-    """Drop unique index and reprocess"""
+    """Clear data and reprocess"""
     await connect_to_mongodb()
     db = get_database()
     
-    print("\n[INFO] Fixing MongoDB index for multi-child support...")
-    
-    # Drop the unique index on emailId
-    try:
-        await db.registrations.drop_index("emailId_1")
-        print("[OK] Dropped unique index on emailId")
-    except Exception as e:
-        print(f"[INFO] No unique index to drop (or already removed): {e}")
-    
     # Clear database
     print("\n[INFO] Clearing existing data...")
     r1 = await db.registrations.delete_many({})
     r2 = await db.unparsed_emails.delete_many({})
-    print(f"[OK] Deleted {r1.deleted_count} registrations, {r2.deleted_count} unparsed emails")
-    
-    # Create a regular (non-unique) index on emailId for performance
-    await db.registrations.create_index("emailId")
-    print("[OK] Created non-unique index on emailId for performance\n")
+    # Rollups are rebuilt by the reprocessed inserts
+    await db.daily_stats.delete_many({})
+    await db.seat_counters.delete_many({})
+    print(f"[OK] Deleted {r1.deleted_count} registrations, {r2.deleted_count} unparsed emails\n")
     
     # Fetch all emails
     print(f"[INFO] Fetching emails from label: {settings.gmail_label_name}")
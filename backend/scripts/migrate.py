@@ -0,0 +1,36 @@
+"""
+Show or apply database migrations (see app/db/migrations.py).
+
+Usage (from the backend directory):
+    python -m scripts.migrate            # apply pending migrations
+    python -m scripts.migrate --status   # list applied and pending versions
+"""
+
+import asyncio
+import sys
+from app.db.mongodb import connect_to_mongodb, close_mongodb_connection, get_database
+from app.db.migrations import MIGRATIONS, migration_runner
+
+
+async def migrate(status_only: bool) -> bool:
+    """Print migration status and optionally apply pending migrations"""
+    await connect_to_mongodb()
+    db = get_database()
+    
+    applied = await migration_runner.applied_versions(db)
+    print("\n=== Migrations ===\n")
+    for m in MIGRATIONS:
+        state = "applied" if m.version in applied else "pending"
+        print(f"[{state.upper()}] {m.version}: {m.description}")
+    print()
+    
+    ok = True
+    if not status_only and len(applied) < len(MIGRATIONS):
+        ok = await migration_runner.run(db)
+    
+    await close_mongodb_connection()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(migrate("--status" in sys.argv)) else 1)
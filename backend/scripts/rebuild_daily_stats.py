@@ -0,0 +1,32 @@
+"""
+Recompute the daily_stats rollups and seat_counters from the registrations collection.
+
+Run it after bulk edits made outside the API, or if the rollups drift.
+
+Usage (from the backend directory):
+    python -m scripts.rebuild_daily_stats
+"""
+
+import asyncio
+from app.db.mongodb import connect_to_mongodb, close_mongodb_connection, get_database
+from app.services.daily_stats import daily_stats
+from app.services.seat_counters import seat_counters
+
+
+async def rebuild():
+    """Correct daily_stats and seat_counters in place (safe while the API serves traffic)"""
+    await connect_to_mongodb()
+    
+    print("[INFO] Rebuilding daily_stats from registrations...")
+    corrected = await daily_stats.rebuild(get_database())
+    print(f"[OK] Corrected {corrected} daily_stats documents")
+    
+    print("[INFO] Rebuilding seat_counters from registrations...")
+    corrected = await seat_counters.rebuild(get_database())
+    print(f"[OK] Corrected {corrected} seat counters")
+    
+    await close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,40 @@
+"""
+Explain every route's query shape and fail if any needs a COLLSCAN or an
+in-memory SORT.
+
+Usage (from the backend directory):
+    python -m scripts.verify_query_plans
+"""
+
+import asyncio
+import sys
+from app.db.mongodb import connect_to_mongodb, close_mongodb_connection, get_database
+from app.db.indexes import explain_query_shapes
+
+
+async def verify_query_plans() -> bool:
+    """Explain all query shapes and print the winning plans"""
+    await connect_to_mongodb()
+    db = get_database()
+    
+    print("\n=== Query Plan Verification ===\n")
+    
+    results = await explain_query_shapes(db)
+    failed = [r for r in results if r["problems"]]
+    
+    for result in results:
+        plan = " <- ".join(result["stages"])
+        if result["problems"]:
+            print(f"[FAIL] {result['route']}: {', '.join(result['problems'])}")
+            print(f"       {plan}")
+        else:
+            print(f"[OK] {result['route']}: {plan}")
+    
+    print(f"\n{len(results) - len(failed)}/{len(results)} query shapes use an index")
+    
+    await close_mongodb_connection()
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(verify_query_plans()) else 1)
@@ -0,0 +1,4 @@
+import os
+
+# Day-bucketing tests assume the default business timezone
+os.environ["BUSINESS_TIMEZONE"] = "America/Los_Angeles"
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.services import analytics_cache as analytics_cache_module
+from app.services.analytics_cache import AnalyticsCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(analytics_cache_module.settings, "analytics_cache_ttl_seconds", 30)
+    monkeypatch.setattr(analytics_cache_module.settings, "analytics_cache_max_entries", 2)
+    return AnalyticsCache(clock=Clock())
+
+
+def get(cache, route, **params):
+    """Cached value for the call, or a freshly computed one tagged with the miss count"""
+    async def compute():
+        return f"{route}#{cache.metrics['misses']}"
+    return asyncio.run(cache.get_or_compute(route, params, compute))
+
+
+def test_hit_until_the_ttl_expires(cache):
+    first = get(cache, "summary", days=30)
+
+    cache.clock.now += 29
+    assert get(cache, "summary", days=30) == first
+
+    cache.clock.now += 1
+    assert get(cache, "summary", days=30) != first
+    assert cache.metrics["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    a = get(cache, "a")
+    get(cache, "b")
+    assert get(cache, "a") == a
+
+    get(cache, "c")
+
+    # b was used least recently
+    assert [key.split(":")[2] for key in cache.local] == ["a", "c"]
+    assert get(cache, "a") == a
+    assert cache.metrics["misses"] == 3
+
+
+def test_invalidate_starts_a_new_generation(cache):
+    first = get(cache, "summary", days=30)
+
+    asyncio.run(cache.invalidate())
+
+    assert cache.generation == 1
+    assert not cache.local
+    assert get(cache, "summary", days=30) != first
+
+
+def test_hit_age_is_measured_on_the_clock(cache):
+    get(cache, "summary")
+    cache.clock.now += 10
+    get(cache, "summary")
+
+    assert cache.stats()["staleness"] == {"avgAgeSeconds": 10, "maxAgeSeconds": 10}
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from bson import Decimal128
+from fastapi import HTTPException
+
+from app.services.analytics_query import (
+    DIMENSIONS,
+    build_match,
+    check_name_collisions,
+    format_groups,
+    parse_names,
+    pivot_records,
+    totals_of,
+)
+
+
+def test_parse_names_rejects_unknown_and_duplicate_names():
+    assert parse_names("month, location", DIMENSIONS, "dimension") == ["month", "location"]
+    with pytest.raises(HTTPException):
+        parse_names("month,planet", DIMENSIONS, "dimension")
+    with pytest.raises(HTTPException):
+        parse_names("month,month", DIMENSIONS, "dimension")
+
+
+def test_dimension_and_metric_names_cannot_collide():
+    # "children" is both; the metric would overwrite the dimension in every record
+    with pytest.raises(HTTPException) as error:
+        check_name_collisions(["children", "location"], ["children", "registrations"])
+    assert error.value.status_code == 400
+    check_name_collisions(["children", "location"], ["registrations"])
+
+
+def test_build_match_end_bound_is_exclusive():
+    match = build_match(datetime(2026, 7, 1, 7), datetime(2026, 8, 1, 7), status="enrolled")
+    assert match == {
+        "status": "enrolled",
+        "enrollmentDate": {"$gte": datetime(2026, 7, 1, 7), "$lt": datetime(2026, 8, 1, 7)},
+    }
+
+
+def test_format_groups_flattens_ids_and_converts_money():
+    groups = [
+        {"_id": {"month": "2026-07", "location": "Redmond"}, "registrations": 3, "revenue": Decimal128("450.50")},
+        {"_id": {"month": "2026-08", "location": "Redmond"}, "revenue": None},
+    ]
+    records = format_groups(groups, ["month", "location"], ["registrations", "revenue"])
+    assert records == [
+        {"month": "2026-07", "location": "Redmond", "registrations": 3, "revenue": 450.5},
+        {"month": "2026-08", "location": "Redmond", "registrations": 0, "revenue": None},
+    ]
+
+
+def test_totals_round_money_metrics():
+    records = [{"registrations": 1, "revenue": 0.1}, {"registrations": 2, "revenue": 0.2}]
+    assert totals_of(records, ["registrations", "revenue"]) == {"registrations": 3, "revenue": 0.3}
+
+
+def test_pivot_spreads_a_dimension_into_columns():
+    records = [
+        {"month": "2026-07", "location": "Redmond", "registrations": 3},
+        {"month": "2026-07", "location": "Bellevue", "registrations": 1},
+        {"month": "2026-08", "location": "Redmond", "registrations": 2},
+    ]
+    pivot = pivot_records(records, ["month", "location"], ["registrations"], "location")
+    assert pivot == {
+        "rowDimensions": ["month"],
+        "columnDimension": "location",
+        "rows": [["2026-07"], ["2026-08"]],
+        "columns": ["Bellevue", "Redmond"],
+        "values": {"registrations": [[1, 3], [0, 2]]},
+    }
+
+
+def test_pivot_on_the_only_dimension_has_one_row():
+    records = [{"status": "enrolled", "registrations": 5}, {"status": "cancelled", "registrations": 2}]
+    pivot = pivot_records(records, ["status"], ["registrations"], "status")
+    assert pivot["rows"] == [[]]
+    assert pivot["values"] == {"registrations": [[2, 5]]}
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from bson import Decimal128, ObjectId
+
+from app.services import pubsub_handler as pubsub_module
+from app.services.email_parser import DAILY_RATE
+from app.services.pubsub_handler import pubsub_handler
+
+MON, TUE, WED = datetime(2026, 7, 6), datetime(2026, 7, 7), datetime(2026, 7, 8)
+
+
+def enrollment(**fields):
+    return {
+        "status": "enrolled",
+        "careRequestNumber": "CR-1",
+        "campDates": [MON, TUE, WED],
+        "children": ["Ada", "Bo"],
+        "totalCost": Decimal128(str(3 * 2 * DAILY_RATE)),
+        "amountPaid": Decimal128(str(3 * 2 * DAILY_RATE)),
+        **fields,
+    }
+
+
+def money(value):
+    return value.to_decimal()
+
+
+def test_partial_cancellation_removes_days_and_recomputes_cost():
+    changes = pubsub_handler._cancellation_changes(enrollment(), [TUE], "m1")
+
+    assert changes["campDates"] == [MON, WED]
+    assert changes["cancelledDates"] == [TUE]
+    assert changes["cancellationEmailIds"] == ["m1"]
+    assert money(changes["totalCost"]) == Decimal(2 * 2 * DAILY_RATE)
+    # Paid in full before: capped at the new cost
+    assert money(changes["amountPaid"]) == Decimal(2 * 2 * DAILY_RATE)
+    assert "status" not in changes
+
+
+def test_partial_cancellation_keeps_a_smaller_payment():
+    changes = pubsub_handler._cancellation_changes(enrollment(amountPaid=Decimal128("50")), [TUE], "m1")
+    assert money(changes["amountPaid"]) == Decimal("50.00")
+
+
+def test_full_cancellation_cancels_the_enrollment():
+    changes = pubsub_handler._cancellation_changes(enrollment(), [MON, TUE, WED], "m1")
+
+    assert changes["status"] == "cancelled"
+    assert changes["cancelledDates"] == [MON, TUE, WED]
+    assert money(changes["amountPaid"]) == 0
+    assert "campDates" not in changes
+
+
+def test_repeated_cancellation_changes_nothing_more():
+    registration = enrollment()
+    registration.update(pubsub_handler._cancellation_changes(registration, [TUE], "m1"))
+    again = pubsub_handler._cancellation_changes(registration, [TUE], "m1")
+
+    assert again["campDates"] == [MON, WED]
+    assert again["cancelledDates"] == [TUE]
+    assert again["cancellationEmailIds"] == ["m1"]
+    assert again["totalCost"] == registration["totalCost"]
+
+
+def test_days_outside_the_enrollment_are_ignored():
+    changes = pubsub_handler._cancellation_changes(enrollment(), [datetime(2026, 8, 3)], "m1")
+    assert changes["campDates"] == [MON, TUE, WED]
+    assert changes["cancelledDates"] == []
+
+
+class Query:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, field, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents
+
+
+class Registrations:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        return Query([
+            document for document in self.documents
+            if all(document.get(field) == value for field, value in query.items())
+        ])
+
+    async def delete_one(self, query):
+        matches = self.find(query).documents
+        for document in matches[:1]:
+            self.documents.remove(document)
+
+        class Result:
+            deleted_count = len(matches[:1])
+        return Result()
+
+
+class Database:
+    def __init__(self, documents):
+        self.registrations = Registrations(documents)
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Standalone cancellations stored before their enrollment, and what the handler did with them"""
+    calls = {"reassigned": [], "written": []}
+
+    class Sources:
+        async def reassign(self, from_registration, to_registration):
+            calls["reassigned"].append((from_registration, to_registration))
+
+    async def written(before, after):
+        calls["written"].append((before, after))
+
+    documents = [
+        {"_id": ObjectId(), "careRequestNumber": "CR-1", "unmatchedCancellation": True, "status": "cancelled",
+         "cancelledDates": [WED], "emailId": "m2", "emailReceivedAt": datetime(2026, 6, 3)},
+        {"_id": ObjectId(), "careRequestNumber": "CR-1", "unmatchedCancellation": True, "status": "cancelled",
+         "cancelledDates": [MON], "emailId": "m1", "emailReceivedAt": datetime(2026, 6, 2)},
+        {"_id": ObjectId(), "careRequestNumber": "CR-2", "unmatchedCancellation": True, "status": "cancelled",
+         "cancelledDates": [TUE], "emailId": "m3", "emailReceivedAt": datetime(2026, 6, 2)},
+    ]
+    database = Database(documents)
+    monkeypatch.setattr(pubsub_module, "get_database", lambda: database)
+    monkeypatch.setattr(pubsub_module, "registration_source_store", Sources())
+    monkeypatch.setattr(pubsub_module, "registration_written", written)
+    return database, calls
+
+
+def test_cancellations_stored_first_are_merged_into_the_enrollment(stored):
+    database, calls = stored
+    registration = enrollment()
+
+    pending = asyncio.run(pubsub_handler._merge_pending_cancellations(registration))
+
+    assert [cancellation["emailId"] for cancellation in pending] == ["m1", "m2"]
+    assert registration["campDates"] == [TUE]
+    assert registration["cancelledDates"] == [MON, WED]
+    assert registration["cancellationEmailIds"] == ["m1", "m2"]
+    assert money(registration["totalCost"]) == Decimal(1 * 2 * DAILY_RATE)
+
+    registration_id = ObjectId()
+    for cancellation in pending:
+        asyncio.run(pubsub_handler._remove_merged_cancellation(cancellation, registration_id))
+
+    assert [document["emailId"] for document in database.registrations.documents] == ["m3"]
+    assert calls["reassigned"] == [(cancellation["_id"], registration_id) for cancellation in pending]
+    # Each removed record is reported as deleted, so its unmatched revenue leaves the rollups
+    assert calls["written"] == [(cancellation, None) for cancellation in pending]
+
+
+def test_merged_cancellations_are_removed_once(stored):
+    database, calls = stored
+    pending = asyncio.run(pubsub_handler._merge_pending_cancellations(enrollment()))
+
+    asyncio.run(pubsub_handler._remove_merged_cancellation(pending[0], ObjectId()))
+    asyncio.run(pubsub_handler._remove_merged_cancellation(pending[0], ObjectId()))
+
+    assert len(calls["written"]) == 1
+
+
+def test_enrollment_without_care_request_merges_nothing(stored):
+    registration = enrollment(careRequestNumber=None)
+    assert asyncio.run(pubsub_handler._merge_pending_cancellations(registration)) == []
+    assert registration["campDates"] == [MON, TUE, WED]
@@ -0,0 +1,100 @@
+import asyncio
+
+from app.db.mongodb import analytics_read_anchor
+from app.services import change_counter
+from app.services.change_counter import ChangeCounter
+
+
+class Counters:
+    def __init__(self, fail=False):
+        self.documents = {}
+        self.fail = fail
+
+    async def find_one(self, query, projection=None, session=None):
+        return self.documents.get(query["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        if self.fail:
+            raise RuntimeError("primary stepped down")
+        document = self.documents.setdefault(query["_id"], {"version": 0})
+        document["version"] += update["$inc"]["version"]
+
+
+class Session:
+    def __init__(self, operation_time):
+        self.cluster_time = {"clusterTime": operation_time}
+        self.operation_time = operation_time
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class Client:
+    def __init__(self, operation_time):
+        self.operation_time = operation_time
+
+    async def start_session(self, causal_consistency=False):
+        return Session(self.operation_time)
+
+
+class Database:
+    def __init__(self, counters, operation_time=None):
+        self._counters = counters
+        self.client = Client(operation_time)
+
+
+def use_database(monkeypatch, database):
+    monkeypatch.setattr(change_counter, "get_database", lambda: database)
+
+
+def test_counter_starts_at_zero_and_counts_bumps(monkeypatch):
+    use_database(monkeypatch, Database(Counters()))
+    counter = ChangeCounter("registrations")
+
+    assert asyncio.run(counter.current()) == 0
+    asyncio.run(counter.bump())
+    asyncio.run(counter.bump())
+    assert asyncio.run(counter.current()) == 2
+
+
+def test_counters_are_per_collection(monkeypatch):
+    use_database(monkeypatch, Database(Counters()))
+
+    asyncio.run(ChangeCounter("registrations").bump())
+
+    assert asyncio.run(ChangeCounter("registration_sources").current()) == 0
+
+
+def test_failed_bump_does_not_fail_the_write(monkeypatch):
+    use_database(monkeypatch, Database(Counters(fail=True)))
+    asyncio.run(ChangeCounter("registrations").bump())
+
+
+def test_reads_after_anchors_analytics_reads_to_the_counter_read(monkeypatch):
+    use_database(monkeypatch, Database(Counters(), operation_time=42))
+    seen = []
+
+    async def read():
+        async with ChangeCounter("registrations").reads_after():
+            seen.append(analytics_read_anchor.get())
+        seen.append(analytics_read_anchor.get())
+
+    asyncio.run(read())
+
+    assert seen == [({"clusterTime": 42}, 42), None]
+
+
+def test_standalone_server_has_no_anchor(monkeypatch):
+    use_database(monkeypatch, Database(Counters()))
+    seen = []
+
+    async def read():
+        async with ChangeCounter("registrations").reads_after():
+            seen.append(analytics_read_anchor.get())
+
+    asyncio.run(read())
+
+    assert seen == [None]
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from bson import Decimal128
+
+from app.services.daily_stats import day_of, registration_contributions
+
+
+def registration(**fields):
+    return {
+        "status": "enrolled",
+        "campType": "Summer",
+        "location": "Redmond",
+        "campDates": [datetime(2026, 7, 6), datetime(2026, 7, 7)],
+        "enrollmentDate": datetime(2026, 6, 1, 18),
+        "totalCost": Decimal128("300.00"),
+        "amountPaid": Decimal128("100.00"),
+        **fields,
+    }
+
+
+def test_day_of_truncates_naive_values():
+    assert day_of(datetime(2026, 7, 6, 23, 59)) == datetime(2026, 7, 6)
+
+
+def test_day_of_takes_aware_values_in_utc():
+    assert day_of(datetime(2026, 7, 6, 7, tzinfo=timezone.utc)) == datetime(2026, 7, 6)
+    assert day_of(datetime(2026, 7, 6, 20, tzinfo=timezone.utc).astimezone()) == datetime(2026, 7, 6)
+
+
+def test_enrolled_registration_counts_camp_days_and_enrollment():
+    contributions = registration_contributions(registration())
+
+    assert contributions[(datetime(2026, 7, 6), "Summer", "Redmond")] == {"campDays": 1}
+    assert contributions[(datetime(2026, 7, 7), "Summer", "Redmond")] == {"campDays": 1}
+    assert contributions[(datetime(2026, 6, 1), "Summer", "Redmond")] == {
+        "enrollments": 1,
+        "revenue": Decimal("300.00"),
+        "paid": Decimal("100.00"),
+    }
+
+
+def test_enrollment_is_bucketed_on_its_business_local_day():
+    # 03:00 UTC on June 2 is still June 1 in Los Angeles
+    contributions = registration_contributions(registration(campDates=[], enrollmentDate=datetime(2026, 6, 2, 3)))
+    assert list(contributions) == [(datetime(2026, 6, 1), "Summer", "Redmond")]
+
+
+def test_cancelled_registration_counts_lost_revenue_only():
+    contributions = registration_contributions(registration(status="cancelled", cancellationDate=datetime(2026, 6, 10, 20)))
+    assert dict(contributions) == {
+        (datetime(2026, 6, 10), "Summer", "Redmond"): {"cancellations": 1, "lostRevenue": Decimal("200.00")},
+    }
+
+
+def test_missing_dimensions_and_amounts_default():
+    contributions = registration_contributions(registration(
+        campType=None, location=None, campDates=[], totalCost=None, amountPaid=None
+    ))
+    assert contributions[(datetime(2026, 6, 1), "Unknown", "Unknown")]["revenue"] == 0
+
+
+def test_no_registration_contributes_nothing():
+    assert registration_contributions(None) == {}
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.utils import etag as etag_module
+from app.utils.etag import _matches, conditional_etag, make_etag
+
+
+def request(path="/api/analytics/summary", query="", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers})
+
+
+def test_etag_ignores_parameter_order():
+    assert make_etag(request(query="a=1&b=2"), 7) == make_etag(request(query="b=2&a=1"), 7)
+
+
+def test_etag_changes_with_version_path_parameters_and_time_bucket():
+    etag = make_etag(request(query="a=1"), 7)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag(request(query="a=1"), 8) != etag
+    assert make_etag(request(path="/api/analytics/trends", query="a=1"), 7) != etag
+    assert make_etag(request(query="a=2"), 7) != etag
+    assert make_etag(request(query="a=1"), 7, time_bucket=1) != etag
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"old", W/"abc"', True),
+    ('"old",   "other"', False),
+    ("*", True),
+    ('"ABC"', False),
+])
+def test_if_none_match(if_none_match, matches):
+    assert _matches(if_none_match, '"abc"') is matches
+
+
+class Counter:
+    def __init__(self, version):
+        self.version = version
+
+    async def current(self, session=None):
+        return self.version
+
+
+def check(monkeypatch, incoming, version=3):
+    monkeypatch.setattr(etag_module, "registration_changes", Counter(version))
+    response = Response()
+    asyncio.run(conditional_etag()(incoming, response, current_user=None))
+    return response
+
+
+def test_current_etag_answers_304(monkeypatch):
+    etag = check(monkeypatch, request()).headers["ETag"]
+
+    with pytest.raises(HTTPException) as raised:
+        check(monkeypatch, request(if_none_match=f"W/{etag}"))
+
+    assert raised.value.status_code == 304
+    assert raised.value.headers["ETag"] == etag
+
+
+def test_stale_etag_runs_the_route(monkeypatch):
+    etag = check(monkeypatch, request()).headers["ETag"]
+
+    response = check(monkeypatch, request(if_none_match=etag), version=4)
+
+    assert response.headers["ETag"] != etag
+    assert response.headers["Cache-Control"] == "private, no-cache"
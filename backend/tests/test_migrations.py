@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.db import migrations
+from app.db.migrations import Migration, MigrationRunner
+
+
+class Records:
+    """The _migrations collection: just enough for the lease and applied versions"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def update_one(self, query, update, upsert=False):
+        self.documents.setdefault(query["_id"], {}).update(update["$set"])
+
+    def find(self, query, projection=None):
+        versions = [{"_id": key} for key in self.documents if isinstance(key, int)]
+
+        class Found:
+            async def to_list(self, length=None):
+                return versions
+        return Found()
+
+    async def insert_one(self, document):
+        self.documents[document["_id"]] = document
+
+    async def delete_one(self, query):
+        self.documents.pop(query["_id"], None)
+
+
+class Database:
+    def __init__(self):
+        self._migrations = Records()
+
+
+@pytest.fixture
+def rewrites(monkeypatch):
+    """Versions applied before each bump of the change counter and cache generation"""
+    database = Database()
+    seen = []
+
+    async def data_rewritten(runner):
+        seen.append(sorted(key for key in database._migrations.documents if isinstance(key, int)))
+
+    async def apply(db):
+        pass
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        Migration(1, "indexes", apply),
+        Migration(2, "rewrite", apply, rewrites_data=True),
+        Migration(3, "more indexes", apply),
+    ])
+    monkeypatch.setattr(MigrationRunner, "_data_rewritten", data_rewritten)
+    return database, seen
+
+
+def test_data_rewrites_invalidate_after_they_are_recorded(rewrites):
+    database, seen = rewrites
+
+    assert asyncio.run(MigrationRunner().run(database))
+    assert seen == [[1, 2]]
+
+    # Nothing pending: nothing invalidated again
+    assert asyncio.run(MigrationRunner().run(database))
+    assert seen == [[1, 2]]
+
+
+def test_enrollment_date_rewrite_invalidates():
+    versions = {m.version: m for m in migrations.MIGRATIONS}
+    assert versions[9].rewrites_data
+    assert not versions[8].rewrites_data
@@ -0,0 +1,81 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+from app.services import occupancy
+from app.services.occupancy import OccupancyEngine
+
+DAY = datetime(2026, 7, 6)
+
+
+def enrolled(registration_id, *children):
+    return {"_id": registration_id, "status": "enrolled", "campDates": [DAY], "children": list(children), "campType": "Summer", "location": "Redmond"}
+
+
+class Cursor:
+    def __init__(self, documents, during_scan):
+        self.documents = documents
+        self.during_scan = during_scan
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for i, document in enumerate(self.documents):
+            if i == 1:
+                self.during_scan()
+            yield document
+
+
+class Database:
+    def __init__(self, documents, during_scan):
+        self.registrations = self
+        self.cursor = Cursor(documents, during_scan)
+
+    def find(self, *args, **kwargs):
+        return self.cursor
+
+
+class NoAnchor:
+    @asynccontextmanager
+    async def reads_after(self):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def no_anchor(monkeypatch):
+    monkeypatch.setattr(occupancy, "registration_changes", NoAnchor())
+
+
+def children_on(engine, day=DAY):
+    matrix = engine.matrix
+    return int(matrix.daily_totals(day.date(), day.date(), matrix.column_mask())[0])
+
+
+def test_writes_during_a_build_are_counted_once():
+    engine = OccupancyEngine()
+    # "a" was read before its update, "b" after its insert, "c" is deleted after being read
+    before_a, after_a = enrolled("a", "Ada"), enrolled("a", "Ada", "Bo")
+    b, c = enrolled("b", "Cy"), enrolled("c", "Di", "Ed")
+
+    def writes():
+        engine.apply_change(before_a, after_a)
+        engine.apply_change(None, b)
+        engine.apply_change(c, None)
+
+    asyncio.run(engine.build(Database([before_a, b, c], writes)))
+
+    assert children_on(engine) == 3
+    assert engine.pending is None
+
+
+def test_writes_after_a_build_apply_in_place():
+    engine = OccupancyEngine()
+    asyncio.run(engine.build(Database([enrolled("a", "Ada")], lambda: None)))
+
+    engine.apply_change(None, enrolled("b", "Bo", "Cy"))
+
+    assert children_on(engine) == 3
+    assert children_on(engine, datetime(2026, 7, 7)) == 0
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+from bson import Decimal128
+from fastapi import HTTPException
+
+from app.services.period_comparison import (
+    compare_to_baseline,
+    covering_range,
+    growth_rate,
+    parse_ranges,
+    range_totals,
+)
+
+TODAY = datetime(2026, 3, 15)
+
+
+def test_presets_resolve_relative_to_today():
+    ranges = parse_ranges("this_month,last_month,last_7_days", TODAY)
+    assert ranges == {
+        "this_month": (datetime(2026, 3, 1), TODAY),
+        "last_month": (datetime(2026, 2, 1), datetime(2026, 2, 28)),
+        "last_7_days": (datetime(2026, 3, 9), TODAY),
+    }
+
+
+def test_last_month_wraps_into_the_previous_year():
+    assert parse_ranges("last_month", datetime(2026, 1, 10)) == {"last_month": (datetime(2025, 12, 1), datetime(2025, 12, 31))}
+
+
+def test_year_ago_maps_leap_day_to_february_28():
+    ranges = parse_ranges("this_month_last_year", datetime(2028, 2, 29))
+    assert ranges == {"this_month_last_year": (datetime(2027, 2, 1), datetime(2027, 2, 28))}
+
+
+def test_custom_ranges_keep_request_order():
+    ranges = parse_ranges("summer:2026-06-01..2026-08-31, spring:2026-03-01..2026-05-31", TODAY)
+    assert list(ranges) == ["summer", "spring"]
+    assert ranges["summer"] == (datetime(2026, 6, 1), datetime(2026, 8, 31))
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "next_decade",
+    "a:2026-01-01",
+    "a:2026-02-01..2026-01-01",
+    "a:2026-01-01..2026-01-31,a:2026-02-01..2026-02-28",
+    ",".join(f"r{i}:2026-01-01..2026-01-02" for i in range(13)),
+])
+def test_invalid_ranges_are_rejected(value):
+    with pytest.raises(HTTPException) as error:
+        parse_ranges(value, TODAY)
+    assert error.value.status_code == 400
+
+
+def test_covering_range_spans_every_range():
+    ranges = {"a": (datetime(2026, 2, 1), datetime(2026, 2, 28)), "b": (datetime(2025, 12, 1), datetime(2026, 1, 15))}
+    assert covering_range(ranges) == (datetime(2025, 12, 1), datetime(2026, 2, 28))
+
+
+def test_range_totals_fill_empty_facets_with_zeros():
+    ranges = {"now": (TODAY, TODAY), "then": (TODAY, TODAY)}
+    facets = {
+        "r0": [{"revenue": Decimal128("120.00"), "paid": Decimal128("20.00"), "outstanding": Decimal128("100.00"), "enrollments": 2}],
+        "r1": [],
+    }
+    totals = range_totals(facets, ranges)
+    assert totals["now"] == {"revenue": 120.0, "paid": 20.0, "outstanding": 100.0, "lostRevenue": 0, "enrollments": 2, "cancellations": 0}
+    assert totals["then"] == {"revenue": 0, "paid": 0, "outstanding": 0, "lostRevenue": 0, "enrollments": 0, "cancellations": 0}
+
+
+def test_growth_rate():
+    assert growth_rate(150, 100) == 50.0
+    assert growth_rate(-50, -100) == 50.0
+    assert growth_rate(10, 0) is None
+
+
+def test_comparisons_are_against_the_baseline():
+    totals = {"this": {"revenue": 150.0, "enrollments": 3}, "last": {"revenue": 100.0, "enrollments": 0}}
+    assert compare_to_baseline(totals, "last") == {
+        "this": {
+            "revenue": {"delta": 50.0, "growth": 50.0},
+            "enrollments": {"delta": 3, "growth": None},
+        }
+    }
@@ -0,0 +1,35 @@
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.registrations import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_selects_the_following_registrations():
+    last = {"_id": ObjectId("65f000000000000000000001"), "enrollmentDate": datetime(2026, 6, 1, 18, 30)}
+
+    assert decode_cursor(encode_cursor(last)) == {"$or": [
+        {"enrollmentDate": {"$lt": datetime(2026, 6, 1, 18, 30)}},
+        {"enrollmentDate": datetime(2026, 6, 1, 18, 30), "_id": {"$lt": last["_id"]}},
+    ]}
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor({"_id": ObjectId(), "enrollmentDate": datetime(2026, 6, 1)})
+    assert all(char.isalnum() or char in "-_=" for char in cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"[]").decode(),
+    base64.urlsafe_b64encode(b'{"d": "yesterday", "i": "65f000000000000000000001"}').decode(),
+    base64.urlsafe_b64encode(b'{"d": "2026-06-01T00:00:00", "i": "nope"}').decode(),
+    base64.urlsafe_b64encode(b'{"d": "2026-06-01T00:00:00"}').decode(),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,83 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson.decimal128 import Decimal128
+
+from app.services.registration_export import encode_csv, encode_ndjson
+
+COLUMNS = ["id", "childName", "children", "campDates", "enrollmentDate", "totalCost", "amountPaid", "employer"]
+
+ROW = {
+    "employer": None,
+    "amountPaid": 150.5,
+    "totalCost": Decimal128("200.00"),
+    # 16:30 UTC is 09:30 in Los Angeles (PDT)
+    "enrollmentDate": datetime(2026, 7, 1, 16, 30),
+    "campDates": [datetime(2026, 7, 6), datetime(2026, 7, 7)],
+    "children": ["Ada Lovelace", "Bo, Jr."],
+    "childName": "Ada Lovelace",
+    "id": "abc",
+}
+
+
+async def batches(*groups):
+    for rows in groups:
+        yield rows
+
+
+def encoded(encoder, *groups, columns=COLUMNS):
+    async def collect():
+        return b"".join([chunk async for chunk in encoder(batches(*groups), columns)]).decode("utf-8")
+    return asyncio.run(collect())
+
+
+def test_csv_header_follows_the_requested_column_order():
+    lines = encoded(encode_csv, [ROW], columns=["totalCost", "id", "childName"]).splitlines()
+
+    assert lines[0] == "totalCost,id,childName"
+    assert lines[1] == "200.0,abc,Ada Lovelace"
+
+
+def test_csv_row():
+    header, row = csv.reader(io.StringIO(encoded(encode_csv, [ROW])))
+
+    assert header == COLUMNS
+    assert dict(zip(header, row)) == {
+        "id": "abc",
+        "childName": "Ada Lovelace",
+        "children": "Ada Lovelace; Bo, Jr.",
+        "campDates": "2026-07-06; 2026-07-07",
+        "enrollmentDate": "2026-07-01T09:30:00-07:00",
+        "totalCost": "200.0",
+        "amountPaid": "150.5",
+        "employer": "",
+    }
+
+
+def test_empty_csv_export_is_just_the_header():
+    assert encoded(encode_csv) == ",".join(COLUMNS) + "\r\n"
+
+
+def test_ndjson_rows():
+    winter = {**ROW, "id": "def", "enrollmentDate": datetime(2026, 1, 15, 16, 30), "children": []}
+
+    lines = encoded(encode_ndjson, [ROW], [winter]).splitlines()
+
+    first, second = (json.loads(line) for line in lines)
+    assert list(first) == COLUMNS
+    assert first == {
+        "id": "abc",
+        "childName": "Ada Lovelace",
+        "children": ["Ada Lovelace", "Bo, Jr."],
+        "campDates": ["2026-07-06", "2026-07-07"],
+        "enrollmentDate": "2026-07-01T09:30:00-07:00",
+        "totalCost": 200.0,
+        "amountPaid": 150.5,
+        "employer": None,
+    }
+    # Standard time in winter
+    assert second["enrollmentDate"] == "2026-01-15T08:30:00-08:00"
+    assert second["children"] == []
@@ -0,0 +1,27 @@
+from app.services.registration_search import build_search_keys, email_prefix_filter
+
+
+def matches(registration, mongo_filter):
+    """Evaluate email_prefix_filter the way the server does (any array element for keys)"""
+    keys = build_search_keys(registration)["parentSearchKeys"]
+    return (
+        any(mongo_filter["parentSearchKeys"].match(key) for key in keys)
+        and bool(mongo_filter["parentEmail"].match(registration["parentEmail"]))
+    )
+
+
+def test_email_prefix_matches_the_email_only():
+    jane = {"parentName": "Jane Doe", "parentEmail": "Jane.Doe@example.com"}
+    janet = {"parentName": "Janet Roe", "parentEmail": "jroe@example.com"}
+
+    assert matches(jane, email_prefix_filter("jane"))
+    assert matches(jane, email_prefix_filter("JANE.DOE@ex"))
+    assert not matches(janet, email_prefix_filter("jane"))
+
+
+def test_email_prefix_is_anchored_and_escaped():
+    jane = {"parentName": "Jane Doe", "parentEmail": "jane.doe@example.com"}
+
+    assert not matches(jane, email_prefix_filter("doe@"))
+    assert not matches(jane, email_prefix_filter("jane.*"))
+    assert email_prefix_filter("a+b@x").get("parentSearchKeys").pattern == r"^a\+b@x"
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.services import seat_counters as seat_counters_module
+from app.services.seat_counters import ALL_LOCATIONS, SeatCounters, registration_seats, seat_deltas
+
+
+def enrolled(*camp_dates, children=("Ada",), location="Redmond"):
+    return {"status": "enrolled", "campDates": list(camp_dates), "children": list(children), "location": location}
+
+
+def test_seats_per_child_per_day_and_site():
+    seats = registration_seats(enrolled(datetime(2026, 7, 6), children=("Ada", "Bo")))
+    assert seats == {
+        (datetime(2026, 7, 6), "Redmond"): 2,
+        (datetime(2026, 7, 6), ALL_LOCATIONS): 2,
+    }
+
+
+def test_cancelled_registration_holds_no_seats():
+    assert registration_seats({**enrolled(datetime(2026, 7, 6)), "status": "cancelled"}) == {}
+
+
+def test_aware_and_naive_camp_dates_are_the_same_day():
+    # Stored documents carry naive UTC datetimes, request bodies aware ones
+    before = enrolled(datetime(2026, 7, 6), datetime(2026, 7, 7))
+    after = enrolled(datetime(2026, 7, 6, tzinfo=timezone.utc), datetime(2026, 7, 8, tzinfo=timezone.utc))
+
+    deltas = seat_deltas(before, after)
+
+    assert deltas == {
+        (datetime(2026, 7, 7), "Redmond"): -1,
+        (datetime(2026, 7, 7), ALL_LOCATIONS): -1,
+        (datetime(2026, 7, 8), "Redmond"): 1,
+        (datetime(2026, 7, 8), ALL_LOCATIONS): 1,
+    }
+    assert sorted(deltas)
+
+
+def test_aware_camp_dates_are_taken_in_utc():
+    # A browser in Los Angeles sends local midnight as 07:00Z
+    after = enrolled(datetime(2026, 7, 6, 7, tzinfo=timezone.utc))
+    assert set(seat_deltas(None, after)) == {(datetime(2026, 7, 6), "Redmond"), (datetime(2026, 7, 6), ALL_LOCATIONS)}
+
+
+def test_unchanged_registration_has_no_deltas():
+    registration = enrolled(datetime(2026, 7, 6))
+    assert seat_deltas(registration, dict(registration)) == {}
+
+
+class Counters:
+    """seat_counters without its unique index: a failed upsert condition inserts a duplicate"""
+
+    def __init__(self, index_error=None):
+        self.documents = []
+        self.index_error = index_error
+        self.index_requests = 0
+
+    async def create_indexes(self, indexes):
+        self.index_requests += 1
+        if self.index_error:
+            raise self.index_error
+
+    def _matches(self, document, query):
+        for field, value in query.items():
+            if isinstance(value, dict):
+                if not document[field] <= value["$lte"]:
+                    return False
+            elif document[field] != value:
+                return False
+        return True
+
+    async def update_one(self, query, update, upsert=False):
+        class Result:
+            matched_count = 0
+            upserted_id = None
+
+        result = Result()
+        for document in self.documents:
+            if self._matches(document, query):
+                document["seats"] += update["$inc"]["seats"]
+                result.matched_count = 1
+                return result
+        if upsert:
+            self.documents.append({"date": query["date"], "location": query["location"], "seats": update["$inc"]["seats"]})
+            result.upserted_id = len(self.documents)
+        return result
+
+    async def count_documents(self, query, limit=0):
+        return len([document for document in self.documents if self._matches(document, query)])
+
+
+def use_counters(monkeypatch, counters):
+    class Database:
+        seat_counters = counters
+
+    monkeypatch.setattr(seat_counters_module, "get_database", lambda: Database())
+
+
+def test_unique_index_is_created_before_the_first_counter_write(monkeypatch):
+    counters = Counters()
+    use_counters(monkeypatch, counters)
+    service = SeatCounters()
+    key = (datetime(2026, 7, 6), "Redmond")
+
+    assert asyncio.run(service._increment_within_limit(key, 1, 2))
+    assert asyncio.run(service._increment_within_limit(key, 1, 2))
+
+    assert counters.index_requests == 1
+    assert counters.documents == [{"date": key[0], "location": "Redmond", "seats": 2}]
+
+
+def test_full_counter_is_not_duplicated_without_the_unique_index(monkeypatch):
+    counters = Counters(index_error=RuntimeError("not authorized"))
+    use_counters(monkeypatch, counters)
+    service = SeatCounters()
+    key = (datetime(2026, 7, 6), "Redmond")
+
+    assert asyncio.run(service._increment_within_limit(key, 2, 2))
+    assert not asyncio.run(service._increment_within_limit(key, 1, 2))
+
+    assert counters.documents == [{"date": key[0], "location": "Redmond", "seats": 2}]
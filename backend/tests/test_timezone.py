@@ -0,0 +1,30 @@
+from datetime import date, datetime, timedelta, timezone
+
+from app.utils.timezone import day_bounds_utc, day_start_utc, local_day, to_utc
+
+
+def test_local_day_of_a_naive_utc_instant():
+    # 06:59 UTC is 23:59 the previous day in Los Angeles (PDT)
+    assert local_day(datetime(2026, 7, 7, 6, 59)) == datetime(2026, 7, 6)
+    assert local_day(datetime(2026, 7, 7, 7, 0)) == datetime(2026, 7, 7)
+
+
+def test_local_day_of_an_aware_instant():
+    assert local_day(datetime(2026, 7, 7, 6, 59, tzinfo=timezone.utc)) == datetime(2026, 7, 6)
+
+
+def test_day_start_follows_daylight_saving_time():
+    assert day_start_utc(date(2026, 7, 6)) == datetime(2026, 7, 6, 7)
+    assert day_start_utc(date(2026, 1, 6)) == datetime(2026, 1, 6, 8)
+
+
+def test_day_bounds_cover_the_whole_local_day():
+    start, end = day_bounds_utc(date(2026, 7, 6))
+    assert start == datetime(2026, 7, 6, 7)
+    assert local_day(end) == datetime(2026, 7, 6)
+    assert local_day(end + timedelta(microseconds=1)) == datetime(2026, 7, 7)
+
+
+def test_naive_query_parameters_are_business_local():
+    assert to_utc(datetime(2026, 7, 6)) == datetime(2026, 7, 6, 7)
+    assert to_utc(datetime(2026, 7, 6, tzinfo=timezone.utc)) == datetime(2026, 7, 6)
@@ -1,28 +1,54 @@
+import { useState } from 'react';
 import { motion } from 'framer-motion';
 import { Calendar, Users } from 'lucide-react';
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/card';
 import { formatDate } from '@/lib/utils';
-
-interface CapacityData {
-  date: string;
-  count: number;
-  registrations: Array<{
-    childName: string;
-    parentName: string;
-    campType: string;
-  }>;
-}
+import { DailyCapacityColumns } from '@/lib/api';
+import { useDayEnrollments } from '@/hooks/useAnalytics';
 
 interface DailyCapacityViewProps {
-  data: CapacityData[];
+  // From /daily-capacity?detail=none (or summary)
+  data?: DailyCapacityColumns;
   loading?: boolean;
 }
 
+function DayEnrollments({ date }: { date: string }) {
+  const { data: registrations, isLoading } = useDayEnrollments(date);
+
+  if (isLoading || !registrations) {
+    return <div className="h-8 animate-shimmer rounded-lg" />;
+  }
+
+  return (
+    <>
+      {registrations.slice(0, 5).map((reg: any) => (
+        <div
+          key={reg._id}
+          className="text-xs py-2 border-t border-border/30"
+        >
+          <div className="font-medium font-display">{reg.childName}</div>
+          <div className="text-muted-foreground text-[10px] mt-0.5">
+            {reg.campType || 'Camp'}
+          </div>
+        </div>
+      ))}
+      {registrations.length > 5 && (
+        <div className="text-xs text-muted-foreground pt-2 font-medium">
+          +{registrations.length - 5} more...
+        </div>
+      )}
+    </>
+  );
+}
+
 export default function DailyCapacityView({
   data,
   loading = false,
 }: DailyCapacityViewProps) {
-  if (loading) {
+  // Names are only fetched for the day under the pointer
+  const [openDate, setOpenDate] = useState<string | null>(null);
+
+  if (loading || !data) {
     return (
       <Card>
         <CardHeader>
@@ -48,7 +74,8 @@ export default function DailyCapacityView({
     );
   }
 
-  const maxCount = Math.max(...data.map((d) => d.count), 1);
+  const days = data.dates.map((date, i) => ({ date, count: data.counts[i] }));
+  const maxCount = Math.max(...data.counts, 1);
 
   return (
     <Card>
@@ -62,7 +89,7 @@ export default function DailyCapacityView({
       </CardHeader>
       <CardContent>
         <div className="grid grid-cols-7 gap-3">
-          {data.slice(0, 35).map((day, index) => {
+          {days.slice(0, 35).map((day, index) => {
             const intensity = day.count / maxCount;
             const bgOpacity = Math.max(0.05, intensity * 0.4);
 
@@ -73,6 +100,7 @@ export default function DailyCapacityView({
                 animate={{ opacity: 1, scale: 1 }}
                 transition={{ delay: index * 0.02, type: "spring", stiffness: 200 }}
                 className="group relative"
+                onMouseEnter={() => day.count > 0 && setOpenDate(day.date)}
               >
                 <motion.div
                   whileHover={{ scale: 1.1, y: -2 }}
@@ -109,22 +137,7 @@ export default function DailyCapacityView({
                         {day.count} enrollment{day.count !== 1 ? 's' : ''}
                       </div>
                       <div className="space-y-2 max-h-32 overflow-y-auto">
-                        {day.registrations.slice(0, 5).map((reg, i) => (
-                          <div
-                            key={i}
-                            className="text-xs py-2 border-t border-border/30"
-                          >
-                            <div className="font-medium font-display">{reg.childName}</div>
-                            <div className="text-muted-foreground text-[10px] mt-0.5">
-                              {reg.campType || 'Camp'}
-                            </div>
-                          </div>
-                        ))}
-                        {day.registrations.length > 5 && (
-                          <div className="text-xs text-muted-foreground pt-2 font-medium">
-                            +{day.registrations.length - 5} more...
-                          </div>
-                        )}
+                        {openDate === day.date && <DayEnrollments date={day.date} />}
                       </div>
                     </motion.div>
                   </div>
@@ -1,66 +1,40 @@
-import { useState } from 'react';
+import { useMemo, useState } from 'react';
 import { format, isSameDay, startOfMonth, endOfMonth, eachDayOfInterval } from 'date-fns';
 import { Calendar as CalendarIcon, ChevronLeft, ChevronRight, Users } from 'lucide-react';
 import { Card } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { cn } from '@/lib/utils';
 import { motion } from 'framer-motion';
-
-interface Registration {
-  _id: string;
-  childName: string;
-  parentName: string;
-  parentEmail: string;
-  parentPhone?: string;
-  employer?: string;
-  campDates: Array<{
-    date: string;
-    startTime: string;
-    endTime: string;
-    hours: number;
-  }>;
-  status: 'enrolled' | 'cancelled';
-  location?: string;
-  careRequestNumber?: string;
-}
+import { useDailyCapacity } from '@/hooks/useAnalytics';
 
 interface EnrollmentCalendarProps {
-  registrations: Registration[];
-  onDateClick: (date: Date, enrollments: Registration[]) => void;
+  onDateClick: (date: Date) => void;
   selectedDate?: Date | null;
+  // False while the dashboard bootstrap that carries this month is in flight
+  ready?: boolean;
 }
 
-export function EnrollmentCalendar({ registrations, onDateClick, selectedDate }: EnrollmentCalendarProps) {
+export function EnrollmentCalendar({ onDateClick, selectedDate, ready = true }: EnrollmentCalendarProps) {
   const [currentMonth, setCurrentMonth] = useState(new Date());
 
   const monthStart = startOfMonth(currentMonth);
   const monthEnd = endOfMonth(currentMonth);
   const daysInMonth = eachDayOfInterval({ start: monthStart, end: monthEnd });
 
-  // Get all registrations for a specific date (for passing to onClick)
-  const getRegistrationsForDate = (date: Date) => {
-    return registrations.filter(reg => {
-      if (!reg.campDates || reg.campDates.length === 0) return false;
-      
-      return reg.campDates.some((campDate: any) => {
-        try {
-          // campDate can be either a string or an object with a date property
-          const dateStr = typeof campDate === 'string' ? campDate : (campDate.date || campDate);
-          if (!dateStr) return false;
-          return isSameDay(new Date(dateStr as string), date);
-        } catch (e) {
-          console.error('Error parsing camp date:', campDate, e);
-          return false;
-        }
-      });
+  // Enrolled counts only; the day's registrations are fetched when it is clicked
+  const { data: capacity } = useDailyCapacity({
+    start_date: format(monthStart, 'yyyy-MM-dd'),
+    end_date: format(monthEnd, 'yyyy-MM-dd'),
+    detail: 'none',
+  }, { enabled: ready });
+
+  const enrolledCounts = useMemo(() => {
+    const counts: Record<string, number> = {};
+    capacity?.dates.forEach((date: string, i: number) => {
+      counts[date] = capacity.counts[i];
     });
-  };
-
-  // Get ONLY enrolled (non-cancelled) enrollments for display count
-  const getEnrolledCountForDate = (date: Date) => {
-    const regs = getRegistrationsForDate(date);
-    return regs.filter(reg => reg.status === 'enrolled').length;
-  };
+    return counts;
+  }, [capacity]);
 
   // Get the first day of week offset
   const firstDayOfWeek = monthStart.getDay();
@@ -127,9 +101,8 @@ export function EnrollmentCalendar({ registrations, onDateClick, selectedDate }:
 
           {/* Calendar days */}
           {daysInMonth.map((date, index) => {
-            const allRegistrations = getRegistrationsForDate(date);
-            const enrolledCount = getEnrolledCountForDate(date);
-            const hasRegistrations = allRegistrations.length > 0;
+            const enrolledCount = enrolledCounts[format(date, 'yyyy-MM-dd')] || 0;
+            const hasRegistrations = enrolledCount > 0;
             const isToday = isSameDay(date, new Date());
             const isSelected = selectedDate && isSameDay(date, selectedDate);
 
@@ -139,7 +112,7 @@ export function EnrollmentCalendar({ registrations, onDateClick, selectedDate }:
                 initial={{ opacity: 0, scale: 0.8 }}
                 animate={{ opacity: 1, scale: 1 }}
                 transition={{ duration: 0.2, delay: index * 0.01 }}
-                onClick={() => hasRegistrations && onDateClick(date, allRegistrations)}
+                onClick={() => onDateClick(date)}
                 whileHover={hasRegistrations ? { scale: 1.05, y: -2 } : {}}
                 whileTap={hasRegistrations ? { scale: 0.95 } : {}}
                 className={cn(
@@ -151,7 +124,6 @@ export function EnrollmentCalendar({ registrations, onDateClick, selectedDate }:
                   isToday && !isSelected && "ring-2 ring-primary/30 ring-offset-2 ring-offset-background",
                   isSelected && "bg-primary/20 border-primary ring-2 ring-primary ring-offset-2 ring-offset-background shadow-glow-warm"
                 )}
-                disabled={!hasRegistrations}
               >
                 <span className={cn(
                   "text-sm font-display font-medium mb-1",
@@ -1,11 +1,12 @@
-import { useQuery } from '@tanstack/react-query';
-import { analyticsAPI } from '@/lib/api';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { analyticsAPI, dashboardAPI, registrationAPI, AnalyticsQueryParams, DailyCapacityParams } from '@/lib/api';
 
-export function useDashboardSummary() {
+export function useDashboardSummary(options?: { live?: boolean }) {
   return useQuery({
     queryKey: ['dashboard-summary'],
     queryFn: analyticsAPI.getDashboardSummary,
-    refetchInterval: 30000, // Refetch every 30 seconds
+    // Live events invalidate the summary; poll every 30 seconds only without them
+    refetchInterval: options?.live ? false : 30000,
   });
 }
 
@@ -16,10 +17,34 @@ export function useRevenue(params?: { start_date?: string; end_date?: string })
   });
 }
 
-export function useDailyCapacity(params?: { start_date?: string; end_date?: string }) {
+export function useDailyCapacity(params?: DailyCapacityParams, options?: { enabled?: boolean }) {
   return useQuery({
     queryKey: ['daily-capacity', params],
     queryFn: () => analyticsAPI.getDailyCapacity(params),
+    enabled: options?.enabled ?? true,
+  });
+}
+
+// Names for one day, fetched only once that day is opened
+export function useDayEnrollments(date: string | null) {
+  return useQuery({
+    queryKey: ['registrations', 'by-camp-date', date],
+    queryFn: () => registrationAPI.getByCampDate(date as string, 'enrolled', 'calendar'),
+    enabled: !!date,
+  });
+}
+
+export function useAnalyticsQuery(params: AnalyticsQueryParams) {
+  return useQuery({
+    queryKey: ['analytics-query', params],
+    queryFn: () => analyticsAPI.query(params),
+  });
+}
+
+export function useComparison(params: { ranges: string; baseline?: string }) {
+  return useQuery({
+    queryKey: ['compare', params],
+    queryFn: () => analyticsAPI.compare(params),
   });
 }
 
@@ -30,3 +55,21 @@ export function useCancellations(params?: { start_date?: string; end_date?: stri
   });
 }
 
+// First paint in one request: the summary, capacity and revenue sections are
+// stored under the same keys as their own hooks, so those find them cached
+export function useDashboardBootstrap(day: string) {
+  const queryClient = useQueryClient();
+  return useQuery({
+    queryKey: ['dashboard-bootstrap', day],
+    queryFn: async () => {
+      const bootstrap = await dashboardAPI.bootstrap({ day });
+      const { summary, capacity, revenue } = bootstrap.sections;
+      if (summary?.data) queryClient.setQueryData(['dashboard-summary'], summary.data);
+      if (capacity?.data) queryClient.setQueryData(['daily-capacity', capacity.params], capacity.data);
+      if (revenue?.data) queryClient.setQueryData(['revenue', revenue.params], revenue.data);
+      return bootstrap;
+    },
+    // Only used while the dashboard is mounted; the sections keep their own caches
+    gcTime: 0,
+  });
+}
@@ -0,0 +1,54 @@
+import { useEffect, useRef, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { subscribeToEvents, RegistrationEvent } from '@/lib/api';
+
+// Registration fields shown by the analytics endpoints
+const ANALYTICS_FIELDS = [
+  'status',
+  'campDates',
+  'campType',
+  'location',
+  'enrollmentDate',
+  'cancellationDate',
+  'totalCost',
+  'amountPaid',
+  'childName',
+  'parentName',
+];
+
+const ANALYTICS_QUERY_KEYS = ['dashboard-summary', 'revenue', 'daily-capacity', 'cancellations', 'analytics-query', 'compare'];
+
+function affectsAnalytics(event: RegistrationEvent) {
+  if (event.type !== 'updated') return true;
+  return !event.fields || event.fields.some((field) => ANALYTICS_FIELDS.includes(field));
+}
+
+/**
+ * Keep cached queries fresh from the server's live event stream.
+ * Returns whether the stream is live (an event has arrived since the last
+ * error); callers fall back to polling when it is not.
+ */
+export function useRegistrationEvents(onEvent?: (event: RegistrationEvent) => void) {
+  const queryClient = useQueryClient();
+  const [live, setLive] = useState(false);
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  useEffect(() => {
+    return subscribeToEvents(
+      (event) => {
+        queryClient.invalidateQueries({ queryKey: ['registrations'] });
+        if ('id' in event) {
+          queryClient.invalidateQueries({ queryKey: ['registration', event.id] });
+        }
+        if (affectsAnalytics(event)) {
+          ANALYTICS_QUERY_KEYS.forEach((key) => queryClient.invalidateQueries({ queryKey: [key] }));
+        }
+        onEventRef.current?.(event);
+      },
+      setLive
+    );
+  }, [queryClient]);
+
+  return { live };
+}
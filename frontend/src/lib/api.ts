@@ -68,6 +68,9 @@ export const registrationAPI = {
     end_date?: string;
     skip?: number;
     limit?: number;
+    cursor?: string;
+    view?: 'table' | 'calendar' | 'detail';
+    fields?: string;
   }) => {
     const response = await api.get('/api/registrations/', { params });
     return response.data;
@@ -78,6 +81,11 @@ export const registrationAPI = {
     return response.data;
   },
   
+  getSource: async (id: string) => {
+    const response = await api.get(`/api/registrations/${id}/source`);
+    return response.data;
+  },
+  
   create: async (data: any) => {
     const response = await api.post('/api/registrations/', data);
     return response.data;
@@ -93,19 +101,82 @@ export const registrationAPI = {
     return response.data;
   },
   
+  search: async (q: string, params?: { status?: string; limit?: number; view?: string }) => {
+    const response = await api.get('/api/registrations/search/', { params: { q, ...params } });
+    return response.data;
+  },
+  
   searchByChild: async (childName: string) => {
     const response = await api.get(`/api/registrations/search/by-child/${childName}`);
     return response.data;
   },
   
-  getByCampDate: async (campDate: string, status?: string) => {
+  getByCampDate: async (campDate: string, status?: string, view?: string) => {
     const response = await api.get('/api/registrations/by-camp-date/', {
-      params: { camp_date: campDate, status }
+      params: { camp_date: campDate, status, view }
     });
     return response.data;
   },
 };
 
+// detail=none|summary return one array per field, index-aligned with dates
+export interface DailyCapacityParams {
+  start_date?: string;
+  end_date?: string;
+  detail?: 'none' | 'summary' | 'full';
+}
+
+export interface DailyCapacityColumns {
+  dateRange: { start: string; end: string };
+  dailyLimit: number | null;
+  detail: 'none' | 'summary';
+  dates: string[];
+  counts: number[];
+  seats: number[];
+  remaining: Array<number | null>;
+  campTypes?: Array<Record<string, number>>;
+}
+
+// group_by and metrics are comma-separated, e.g. group_by: 'month,location'
+export interface AnalyticsQueryParams {
+  group_by?: string;
+  metrics?: string;
+  pivot?: string;
+  start_date?: string;
+  end_date?: string;
+  status?: string;
+  location?: string;
+  employer?: string;
+  camp_type?: string;
+}
+
+// One section of the dashboard bootstrap: params are those of the equivalent
+// standalone request, data its response; timedOut replaces both on a timeout
+export interface BootstrapSection<T = any> {
+  params?: Record<string, string>;
+  data?: T;
+  timedOut?: boolean;
+}
+
+export interface DashboardBootstrap {
+  day: string;
+  sections: {
+    summary?: BootstrapSection;
+    capacity?: BootstrapSection<DailyCapacityColumns>;
+    day?: BootstrapSection<{ registrations: any[]; truncated: boolean }>;
+    revenue?: BootstrapSection;
+  };
+}
+
+// Dashboard API
+export const dashboardAPI = {
+  // sections: comma-separated subset of summary, capacity, day, revenue
+  bootstrap: async (params?: { day?: string; sections?: string }): Promise<DashboardBootstrap> => {
+    const response = await api.get('/api/dashboard/bootstrap', { params });
+    return response.data;
+  },
+};
+
 // Analytics API
 export const analyticsAPI = {
   getRevenue: async (params?: { start_date?: string; end_date?: string }) => {
@@ -113,7 +184,7 @@ export const analyticsAPI = {
     return response.data;
   },
   
-  getDailyCapacity: async (params?: { start_date?: string; end_date?: string }) => {
+  getDailyCapacity: async (params?: DailyCapacityParams) => {
     const response = await api.get('/api/analytics/daily-capacity', { params });
     return response.data;
   },
@@ -123,11 +194,110 @@ export const analyticsAPI = {
     return response.data;
   },
   
+  query: async (params: AnalyticsQueryParams) => {
+    const response = await api.get('/api/analytics/query', { params });
+    return response.data;
+  },
+  
+  // ranges: comma-separated presets (this_month, last_month, ...) or name:YYYY-MM-DD..YYYY-MM-DD
+  compare: async (params: { ranges: string; baseline?: string }) => {
+    const response = await api.get('/api/analytics/compare', { params });
+    return response.data;
+  },
+  
   getDashboardSummary: async () => {
     const response = await api.get('/api/analytics/dashboard-summary');
     return response.data;
   },
 };
 
+// Live registration events (Server-Sent Events)
+export type RegistrationEvent =
+  | { type: 'created' | 'updated' | 'cancelled'; id: string; dates: string[]; status?: string; fields?: string[] }
+  | { type: 'deleted'; id: string }
+  | { type: 'resync' }
+  | { type: 'unavailable' };
+
+const EVENTS_RETRY_MS = 5000;
+
+// The server retries change streams with backoff when they are unsupported
+const EVENTS_UNAVAILABLE_RETRY_MS = 60000;
+
+// EventSource cannot send the Authorization header, so the stream is read with fetch.
+// Returns a function that closes the stream. onLiveChange(false) is called on
+// any stream error or end, onLiveChange(true) on the first event after each
+// (re)connect; the stream is reopened until closed.
+export const subscribeToEvents = (
+  onEvent: (event: RegistrationEvent) => void,
+  onLiveChange?: (live: boolean) => void
+): (() => void) => {
+  const controller = new AbortController();
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+  let reconnecting = false;
+
+  const connect = async () => {
+    let retryMs = EVENTS_RETRY_MS;
+    try {
+      const token = clerkTokenGetter ? await clerkTokenGetter() : null;
+      const response = await fetch(`${API_BASE_URL}/api/events`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal: controller.signal,
+      });
+      if (response.status === 503) {
+        retryMs = EVENTS_UNAVAILABLE_RETRY_MS;
+        throw new Error('Live events are unavailable');
+      }
+      if (!response.ok || !response.body) {
+        throw new Error(`Event stream failed with status ${response.status}`);
+      }
+
+      // Changes made while the previous connection was down were missed
+      if (reconnecting) onEvent({ type: 'resync' });
+      reconnecting = true;
+
+      let receivedEvent = false;
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop() ?? '';
+        for (const message of messages) {
+          const data = message
+            .split('\n')
+            .filter((line) => line.startsWith('data: '))
+            .map((line) => line.slice(6))
+            .join('\n');
+          if (!data) continue;
+          const event = JSON.parse(data) as RegistrationEvent | { type: 'ready' };
+          if (event.type === 'unavailable') {
+            retryMs = EVENTS_UNAVAILABLE_RETRY_MS;
+            throw new Error('Live events are unavailable');
+          }
+          if (!receivedEvent) {
+            receivedEvent = true;
+            onLiveChange?.(true);
+          }
+          if (event.type !== 'ready') onEvent(event);
+        }
+      }
+      throw new Error('Event stream ended');
+    } catch (error) {
+      if (controller.signal.aborted) return;
+      console.error('Registration event stream error:', error);
+      onLiveChange?.(false);
+      retryTimer = setTimeout(connect, retryMs);
+    }
+  };
+
+  connect();
+  return () => {
+    controller.abort();
+    clearTimeout(retryTimer);
+  };
+};
+
 export default api;
 
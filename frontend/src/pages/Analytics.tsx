@@ -1,12 +1,14 @@
 import { useState, useEffect } from 'react';
 import { TrendingUp, DollarSign, XCircle, BarChart3 } from 'lucide-react';
 import { motion } from 'framer-motion';
+import { format, subDays } from 'date-fns';
 import { useAuth } from '@clerk/clerk-react';
 import DashboardLayout from '@/components/dashboard/DashboardLayout';
 import { KPICard } from '@/components/dashboard/KPICard';
 import RevenueChart from '@/components/dashboard/RevenueChart';
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/card';
-import { useRevenue, useDashboardSummary } from '@/hooks/useAnalytics';
+import { useRevenue, useDashboardSummary, useComparison } from '@/hooks/useAnalytics';
+import { useRegistrationEvents } from '@/hooks/useRegistrationEvents';
 import { setClerkTokenGetter } from '@/lib/api';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
@@ -18,12 +20,17 @@ export default function Analytics() {
     setClerkTokenGetter(getToken);
   }, [getToken]);
   const [dateRange] = useState({
-    start_date: new Date(Date.now() - 30 * 24 * 60 * 60 * 1000).toISOString().split('T')[0],
-    end_date: new Date().toISOString().split('T')[0],
+    start_date: format(subDays(new Date(), 30), 'yyyy-MM-dd'),
+    end_date: format(new Date(), 'yyyy-MM-dd'),
   });
 
   const { data: revenueData } = useRevenue(dateRange);
-  const { data: summary } = useDashboardSummary();
+  const { live } = useRegistrationEvents();
+  const { data: summary } = useDashboardSummary({ live });
+  // This month against last month, resolved in one request
+  const { data: comparison } = useComparison({ ranges: 'this_month,last_month' });
+  const revenueGrowth = comparison?.comparisons?.this_month?.revenue?.growth;
+  const cancellationGrowth = comparison?.comparisons?.this_month?.lostRevenue?.growth;
 
   const campTypeData = revenueData?.revenueByCampType
     ? Object.entries(revenueData.revenueByCampType).map(([name, value]) => ({
@@ -59,6 +66,7 @@ export default function Analytics() {
               value={`$${(summary?.totalEnrolledRevenue || 0).toLocaleString()}`}
               subtitle="All-time enrolled"
               icon={DollarSign}
+              trend={revenueGrowth != null ? { value: revenueGrowth, label: 'new revenue vs last month' } : undefined}
               variant="success"
             />
           </motion.div>
@@ -72,6 +80,7 @@ export default function Analytics() {
               value={`$${(summary?.totalCancelledRevenue || 0).toLocaleString()}`}
               subtitle="Lost to cancellations"
               icon={XCircle}
+              trend={cancellationGrowth != null ? { value: cancellationGrowth, label: 'lost vs last month' } : undefined}
               variant="warning"
             />
           </motion.div>
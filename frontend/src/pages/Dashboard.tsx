@@ -1,4 +1,4 @@
-import { useState, useMemo, useEffect } from 'react';
+import { useState, useMemo, useEffect, useRef } from 'react';
 import { Calendar as CalendarIcon, ChevronLeft, ChevronRight } from 'lucide-react';
 import { format } from 'date-fns';
 import { motion } from 'framer-motion';
@@ -9,7 +9,8 @@ import SearchFilters from '@/components/dashboard/SearchFilters';
 import { EnrollmentCalendar } from '@/components/dashboard/EnrollmentCalendar';
 import { EnrollmentDetailModal } from '@/components/dashboard/EnrollmentDetailModal';
 import { Button } from '@/components/ui/button';
-import { useRegistrations } from '@/hooks/useRegistrations';
+import { useDashboardBootstrap } from '@/hooks/useAnalytics';
+import { useRegistrationEvents } from '@/hooks/useRegistrationEvents';
 import { registrationAPI, setClerkTokenGetter } from '@/lib/api';
 
 export default function Dashboard() {
@@ -28,16 +29,39 @@ export default function Dashboard() {
   const [localSearchTerm, setLocalSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('');
   const [isLoadingDateData, setIsLoadingDateData] = useState(false);
+  const [dateDataVersion, setDateDataVersion] = useState(0);
   const itemsPerPage = 10;
 
-  // Fetch all registrations for calendar display (need all dates to show enrollment dots)
-  const { data: allRegistrations } = useRegistrations({ limit: 500 });
+  // Summary, calendar month, today's registrations and revenue in one request
+  const [initialDay] = useState(() => format(new Date(), 'yyyy-MM-dd'));
+  const bootstrap = useDashboardBootstrap(initialDay);
+  const bootstrapDayUsed = useRef(false);
+
+  // Refetch the selected day only when a live event touches it
+  useRegistrationEvents((event) => {
+    const dateStr = selectedDate ? format(selectedDate, 'yyyy-MM-dd') : undefined;
+    if (event.type === 'resync' || event.type === 'deleted' || (dateStr && 'dates' in event && event.dates.includes(dateStr))) {
+      setDateDataVersion((version) => version + 1);
+    }
+  });
 
   // When a date is selected, fetch registrations for that specific date
   useEffect(() => {
     if (selectedDate) {
       setIsLoadingDateData(true);
-      const dateStr = selectedDate.toISOString().split('T')[0];
+      // Local calendar day (toISOString would give the UTC day, a day late in the evening)
+      const dateStr = format(selectedDate, 'yyyy-MM-dd');
+      // The first day shown comes with the bootstrap payload
+      if (bootstrap.isLoading) return;
+      const seeded = bootstrap.data?.sections.day;
+      if (!bootstrapDayUsed.current) {
+        bootstrapDayUsed.current = true;
+        if (seeded?.data && seeded.params?.camp_date === dateStr) {
+          setDateRegistrations(seeded.data.registrations);
+          setIsLoadingDateData(false);
+          return;
+        }
+      }
       registrationAPI.getByCampDate(dateStr)
         .then((data) => {
           setDateRegistrations(data);
@@ -51,7 +75,7 @@ export default function Dashboard() {
       // Clear date registrations when no date is selected
       setDateRegistrations([]);
     }
-  }, [selectedDate]);
+  }, [selectedDate, dateDataVersion, bootstrap.isLoading, bootstrap.data]);
 
   // Always display dateRegistrations (which are fetched based on selected date)
   const displayRegistrations = dateRegistrations;
@@ -117,7 +141,7 @@ export default function Dashboard() {
     setCurrentPage(1);
   };
 
-  const handleDateClick = (date: Date, _enrollments: any[]) => {
+  const handleDateClick = (date: Date) => {
     setSelectedDate(date);
     setLocalSearchTerm('');
     setStatusFilter('');
@@ -170,9 +194,9 @@ export default function Dashboard() {
             transition={{ duration: 0.4, delay: 0.1 }}
           >
             <EnrollmentCalendar
-              registrations={allRegistrations || []}
               onDateClick={handleDateClick}
               selectedDate={selectedDate}
+              ready={!bootstrap.isLoading}
             />
           </motion.div>
 